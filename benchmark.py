@@ -0,0 +1,1505 @@
+"""Micro-benchmarks for the hospital system's data structures.
+
+Run ``python benchmark.py --help`` to list the available benchmarks.
+"""
+import argparse
+import asyncio
+import bisect
+import gc
+import heapq
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from main import (BATCH_COMMANDS, PATIENT_INDEX_BACKENDS, PROFILER, CleaningQueue, PatientTable,
+                  ROOM_TYPE_PREFERENCES, ROOM_TYPE_TIER_COST, SEVERITY_DISTANCE_WEIGHT, AVLTree,
+                  DynamicMST, EnhancedHospitalSystem, MinHeapPriorityQueue, RoomManager, Staff, StaffManager,
+                  Router, Treatment, TreatmentLog, make_patient_index)
+from metrics import HospitalMetrics
+from persistence import HospitalStore
+from sharding import ShardedHospital, make_region
+from snapshots import SnapshotPublisher
+from sqlite_store import SQLiteStore
+from workload import SEVERITY_MIX, generate_events, make_campus, make_facility_graph, make_patients
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def report(name, seconds, operations):
+    per_op = seconds / operations * 1e6 if operations else 0.0
+    print(f"  {name:<32} {seconds * 1000:10.2f} ms   {per_op:9.2f} us/op")
+
+
+class LegacyPriorityQueue:
+    """The original queue: Patient objects compared with Patient.__lt__, linear-scan removal."""
+
+    def __init__(self):
+        self.heap = []
+
+    def add_patient(self, patient):
+        self.heap.append(patient)
+        self._up_heap(len(self.heap) - 1)
+
+    def _up_heap(self, index):
+        while index > 0:
+            parent_index = (index - 1) // 2
+            if self.heap[index] < self.heap[parent_index]:
+                self.heap[index], self.heap[parent_index] = self.heap[parent_index], self.heap[index]
+                index = parent_index
+            else:
+                break
+
+    def _down_heap(self, index):
+        while True:
+            left_child = 2 * index + 1
+            right_child = 2 * index + 2
+            smallest = index
+            if left_child < len(self.heap) and self.heap[left_child] < self.heap[smallest]:
+                smallest = left_child
+            if right_child < len(self.heap) and self.heap[right_child] < self.heap[smallest]:
+                smallest = right_child
+            if smallest != index:
+                self.heap[index], self.heap[smallest] = self.heap[smallest], self.heap[index]
+                index = smallest
+            else:
+                break
+
+    def pop_patient(self):
+        patient = self.heap[0]
+        self.remove_patient(patient.patient_id)
+        return patient
+
+    def remove_patient(self, patient_id):
+        for index, patient in enumerate(self.heap):
+            if patient.patient_id == patient_id:
+                last_patient = self.heap.pop()
+                if index < len(self.heap):
+                    self.heap[index] = last_patient
+                    if index > 0 and self.heap[index] < self.heap[(index - 1) // 2]:
+                        self._up_heap(index)
+                    else:
+                        self._down_heap(index)
+                return True
+        return False
+
+    def ordered_patients(self):
+        return sorted(self.heap)
+
+
+class LegacyAVLNode:
+    """The original AVL node, with a per-instance __dict__."""
+
+    def __init__(self, patient):
+        self.patient = patient
+        self.left = None
+        self.right = None
+        self.height = 1
+
+
+class LegacyAVLTree(AVLTree):
+    """The original recursive insert / find / delete."""
+
+    def insert(self, patient):
+        self.root = self._insert_recursive(self.root, patient)
+
+    def _insert_recursive(self, node, patient):
+        if not node:
+            return LegacyAVLNode(patient)
+        if patient.patient_id < node.patient.patient_id:
+            node.left = self._insert_recursive(node.left, patient)
+        else:
+            node.right = self._insert_recursive(node.right, patient)
+        node.height = max(self.height(node.left), self.height(node.right)) + 1
+        balance = self.balance_factor(node)
+        if balance > 1 and patient.patient_id < node.left.patient.patient_id:
+            return self.right_rotate(node)
+        if balance < -1 and patient.patient_id > node.right.patient.patient_id:
+            return self.left_rotate(node)
+        if balance > 1 and patient.patient_id > node.left.patient.patient_id:
+            node.left = self.left_rotate(node.left)
+            return self.right_rotate(node)
+        if balance < -1 and patient.patient_id < node.right.patient.patient_id:
+            node.right = self.right_rotate(node.right)
+            return self.left_rotate(node)
+        return node
+
+    def find_patient(self, patient_id):
+        return self._find_recursive(self.root, patient_id)
+
+    def _find_recursive(self, node, patient_id):
+        if not node:
+            return None
+        if patient_id == node.patient.patient_id:
+            return node.patient
+        elif patient_id < node.patient.patient_id:
+            return self._find_recursive(node.left, patient_id)
+        else:
+            return self._find_recursive(node.right, patient_id)
+
+    def delete_patient(self, patient_id):
+        self.root = self._delete_recursive(self.root, patient_id)
+
+    def _delete_recursive(self, node, patient_id):
+        if not node:
+            return None
+        if patient_id < node.patient.patient_id:
+            node.left = self._delete_recursive(node.left, patient_id)
+        elif patient_id > node.patient.patient_id:
+            node.right = self._delete_recursive(node.right, patient_id)
+        else:
+            if not node.left:
+                return node.right
+            elif not node.right:
+                return node.left
+            temp = node.right
+            while temp.left:
+                temp = temp.left
+            node.patient = temp.patient
+            node.right = self._delete_recursive(node.right, temp.patient.patient_id)
+        node.height = max(self.height(node.left), self.height(node.right)) + 1
+        balance = self.balance_factor(node)
+        if balance > 1 and self.balance_factor(node.left) >= 0:
+            return self.right_rotate(node)
+        if balance > 1 and self.balance_factor(node.left) < 0:
+            node.left = self.left_rotate(node.left)
+            return self.right_rotate(node)
+        if balance < -1 and self.balance_factor(node.right) <= 0:
+            return self.left_rotate(node)
+        if balance < -1 and self.balance_factor(node.right) > 0:
+            node.right = self.right_rotate(node.right)
+            return self.left_rotate(node)
+        return node
+
+
+def legacy_find_nearest_vacant_room(room_manager, start_room_id, room_types=None):
+    """The original per-call Dijkstra search, optionally filtered by room type."""
+    distances = {room_id: float('inf') for room_id in room_manager.rooms}
+    distances[start_room_id] = 0
+    priority_queue = [(0, start_room_id)]
+    visited = set()
+    while priority_queue:
+        current_distance, current_room = heapq.heappop(priority_queue)
+        if current_room in visited:
+            continue
+        visited.add(current_room)
+        room = room_manager.rooms[current_room]
+        if room.is_vacant and current_room != "Reception" and (room_types is None or room.room_type in room_types):
+            return current_room
+        for neighbor, weight in room_manager.graph.get_neighbors(current_room):
+            distance = current_distance + weight
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                heapq.heappush(priority_queue, (distance, neighbor))
+    return None
+
+
+def legacy_find_room_for_severity(room_manager, start_room_id, severity):
+    # Without per-type structures, each preference tier needs a full vacancy scan
+    # and, if any room of the tier is free, a graph search.
+    for room_types in ROOM_TYPE_PREFERENCES[severity]:
+        if any(room.is_vacant and room.room_type in room_types for room in room_manager.rooms.values()):
+            room_id = legacy_find_nearest_vacant_room(room_manager, start_room_id, room_types)
+            if room_id:
+                return room_id
+    return None
+
+
+def filled_queue(queue_class, patients):
+    # Pushing in sorted order never sifts, so building the queue stays cheap.
+    queue = queue_class()
+    if queue_class is LegacyPriorityQueue:
+        queue.heap = sorted(patients)
+    else:
+        for patient in sorted(patients):
+            queue.add_patient(patient)
+    return queue
+
+
+def bench_heap_remove(sizes, operations):
+    print("Priority queue: remove_patient / update_priority")
+    for size in sizes:
+        patients = make_patients(size)
+        victims = random.Random(size).sample(range(1, size + 1), operations)
+        print(f"{size} queued patients, {operations} operations")
+
+        queue = filled_queue(LegacyPriorityQueue, patients)
+        seconds, _ = timed(lambda: [queue.remove_patient(pid) for pid in victims])
+        report("remove_patient (linear scan)", seconds, operations)
+
+        queue = filled_queue(MinHeapPriorityQueue, patients)
+        seconds, _ = timed(lambda: [queue.remove_patient(pid) for pid in victims])
+        report("remove_patient (indexed)", seconds, operations)
+
+        queue = filled_queue(MinHeapPriorityQueue, patients)
+        rng = random.Random(size + 1)
+        seconds, _ = timed(lambda: [queue.update_priority(pid, severity=rng.randint(1, 3))
+                                    for pid in victims])
+        report("update_priority (indexed)", seconds, operations)
+
+
+def bench_heap_ops(sizes):
+    print("Priority queue: push / pop / ordered listing")
+    for size in sizes:
+        patients = make_patients(size)
+        random.Random(size).shuffle(patients)
+        print(f"{size} patients")
+        for label, queue_class in (("Patient.__lt__", LegacyPriorityQueue),
+                                   ("precomputed keys", MinHeapPriorityQueue)):
+            queue = queue_class()
+            seconds, _ = timed(lambda: [queue.add_patient(patient) for patient in patients])
+            report(f"push ({label})", seconds, size)
+            seconds, _ = timed(queue.ordered_patients)
+            report(f"ordered listing ({label})", seconds, size)
+            if queue_class is MinHeapPriorityQueue:
+                seconds, _ = timed(lambda: queue.top_k(20))
+                report("next 20 patients (lazy heap walk)", seconds, 20)
+            seconds, _ = timed(lambda: [queue.pop_patient() for _ in range(size)])
+            report(f"pop ({label})", seconds, size)
+
+
+def bench_avl(sizes, operations):
+    print("AVL tree: recursive vs iterative with __slots__ nodes")
+    for size in sizes:
+        patients = make_patients(size)
+        shuffled = patients[:]
+        random.Random(size).shuffle(shuffled)
+        lookups = random.Random(size + 1).sample(range(1, size + 1), operations)
+        print(f"{size} patients, {operations} lookups / deletes")
+        for label, tree_class in (("recursive", LegacyAVLTree), ("iterative", AVLTree)):
+            tree = tree_class()
+            seconds, _ = timed(lambda: [tree.insert(patient) for patient in patients])
+            report(f"sequential insert ({label})", seconds, size)
+            tree = tree_class()
+            seconds, _ = timed(lambda: [tree.insert(patient) for patient in shuffled])
+            report(f"random insert ({label})", seconds, size)
+            seconds, _ = timed(lambda: [tree.find_patient(pid) for pid in lookups])
+            report(f"find_patient ({label})", seconds, operations)
+            seconds, _ = timed(lambda: [tree.delete_patient(pid) for pid in lookups])
+            report(f"delete_patient ({label})", seconds, operations)
+
+            tree = tree_class()
+            tracemalloc.start()
+            for patient in patients:
+                tree.insert(patient)
+            node_bytes, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {'node memory (' + label + ')':<32} {node_bytes / 2**20:10.2f} MiB"
+                  f"   {node_bytes / size:9.1f} B/node")
+            del tree
+        tracemalloc.start()
+        measured = make_patients(size)
+        patient_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del measured
+        print(f"  {'Patient memory (__slots__)':<32} {patient_bytes / 2**20:10.2f} MiB"
+              f"   {patient_bytes / size:9.1f} B/patient")
+
+
+def bench_index(sizes, operations, fanout, scan_width):
+    print("Patient index backends: insert / find / range scan / delete")
+    for size in sizes:
+        patients = make_patients(size)
+        rng = random.Random(size)
+        lookups = rng.sample(range(1, size + 1), operations)
+        scan_starts = [rng.randint(1, max(1, size - scan_width)) for _ in range(operations)]
+        print(f"{size} patients (IDs arrive in increasing order), {operations} operations")
+        for backend in PATIENT_INDEX_BACKENDS:
+            options = {"fanout": fanout} if backend == "btree" else {}
+            index = make_patient_index(backend, **options)
+            seconds, _ = timed(lambda: [index.insert(patient) for patient in patients])
+            report(f"insert ({backend})", seconds, size)
+            seconds, _ = timed(lambda: [index.find_patient(pid) for pid in lookups])
+            report(f"find_patient ({backend})", seconds, operations)
+            seconds, _ = timed(lambda: [list(index.range_scan(low, low + scan_width))
+                                        for low in scan_starts[:100]])
+            report(f"range_scan {scan_width} IDs ({backend})", seconds, min(operations, 100))
+            seconds, _ = timed(lambda: [index.delete_patient(pid) for pid in lookups])
+            report(f"delete_patient ({backend})", seconds, operations)
+
+
+def bench_rooms(room_counts, operations):
+    print("Room allocation: Dijkstra per admission vs precomputed vacancy index")
+    for room_count in room_counts:
+        print(f"{room_count} rooms, {operations} admit / discharge cycles")
+        for label, find in (("Dijkstra", legacy_find_nearest_vacant_room),
+                            ("vacancy index", RoomManager.find_nearest_vacant_room)):
+            room_manager = make_campus(room_count)
+            rng = random.Random(room_count)
+            occupied = []
+
+            def cycle():
+                for _ in range(operations):
+                    room_id = find(room_manager, "Reception")
+                    if room_id is None or (occupied and rng.random() < 0.4):
+                        room_manager.rooms[occupied.pop(rng.randrange(len(occupied)))].is_vacant = True
+                    else:
+                        room_manager.rooms[room_id].is_vacant = False
+                        occupied.append(room_id)
+            seconds, _ = timed(cycle)
+            report(f"admit/discharge ({label})", seconds, operations)
+
+
+def bench_room_types(room_counts, operations):
+    print("Severity-matched room allocation: type scan + Dijkstra vs per-type vacancy heaps")
+    for room_count in room_counts:
+        print(f"{room_count} mixed-type rooms, {operations} admit / discharge cycles")
+        for label, find in (("scan + Dijkstra", legacy_find_room_for_severity),
+                            ("per-type index", RoomManager.find_room_for_severity)):
+            room_manager = make_campus(room_count)
+            rng = random.Random(room_count)
+            occupied = []
+
+            def cycle():
+                for _ in range(operations):
+                    room_id = find(room_manager, "Reception", rng.randint(1, 3))
+                    if room_id is None or (occupied and rng.random() < 0.4):
+                        if occupied:
+                            room_manager.rooms[occupied.pop(rng.randrange(len(occupied)))].is_vacant = True
+                    else:
+                        room_manager.rooms[room_id].is_vacant = False
+                        occupied.append(room_id)
+            seconds, _ = timed(cycle)
+            report(f"admit/discharge ({label})", seconds, operations)
+
+
+def waiting_hospital(room_count, patient_count):
+    hospital = EnhancedHospitalSystem()
+    make_campus(room_count, room_manager=hospital.room_manager)
+    patients = make_patients(patient_count)
+    hospital.avl_tree.bulk_insert(patients)
+    hospital.priority_queue.add_patients(patients)
+    hospital.waiting_queue.add_patients(patients)
+    if hospital.patient_table is not None:
+        hospital.patient_table.add_many(patients)
+    return hospital
+
+
+def greedy_assign(hospital, k):
+    """k separate find_room_for_severity calls, highest priority first."""
+    room_manager = hospital.room_manager
+    distances = room_manager.vacancy_index("Reception").distances
+    total_cost = 0
+    assigned = 0
+    for _ in range(k):
+        patient = hospital.waiting_queue.pop_patient()
+        if patient is None:
+            break
+        room_id = room_manager.find_room_for_severity("Reception", patient.severity)
+        if room_id is None:
+            continue
+        room_manager.rooms[room_id].is_vacant = False
+        tiers = ROOM_TYPE_PREFERENCES[patient.severity]
+        tier = next(tier for tier, types in enumerate(tiers) if room_manager.rooms[room_id].room_type in types)
+        total_cost += SEVERITY_DISTANCE_WEIGHT[patient.severity] * distances[room_id] + tier * ROOM_TYPE_TIER_COST
+        assigned += 1
+    return assigned, total_cost
+
+
+def bench_assign_batch(sizes):
+    print("Batch room assignment: k greedy lookups vs one min-cost matching")
+    for size in sizes:
+        print(f"{size} waiting patients x {size} vacant rooms")
+        hospital = waiting_hospital(size, size)
+        seconds, (assigned, total_cost) = timed(greedy_assign, hospital, size)
+        report("greedy", seconds, size)
+        print(f"  {'':<32} {assigned} assigned, total cost {total_cost:.0f}")
+
+        hospital = waiting_hospital(size, size)
+        seconds, (_, stats) = timed(hospital.assign_batch, size)
+        report(f"assign_batch ({stats['solver']})", seconds, size)
+        print(f"  {'':<32} {stats['assigned']} assigned, total cost {stats['total_cost']:.0f}, "
+              f"build {stats['build_seconds'] * 1000:.1f} ms, solve {stats['solve_seconds'] * 1000:.1f} ms")
+
+
+def bench_treatments(sizes, operations, patient_count=10_000):
+    print("Treatment log: linked-list scan vs patient / date indexes")
+    for size in sizes:
+        rng = random.Random(size)
+        log = TreatmentLog()
+        for number in range(size):
+            day = number * 365 // size
+            log.append(Treatment(str(number), rng.randint(1, patient_count), f"S{rng.randint(1, 200)}",
+                                 "Checkup", f"2026-{day // 31 + 1:02d}-{day % 28 + 1:02d}"))
+        lookups = [rng.randint(1, patient_count) for _ in range(operations)]
+        print(f"{size} treatments over {patient_count} patients, {operations} lookups")
+
+        def scan(patient_id):
+            records = []
+            current = log.head
+            while current:
+                if current.data.patient_id == patient_id:
+                    records.append(current.data)
+                current = current.next
+            return records
+        scan_count = max(1, operations // 100)
+        seconds, _ = timed(lambda: [scan(patient_id) for patient_id in lookups[:scan_count]])
+        report("per-patient (list scan)", seconds, scan_count)
+        seconds, _ = timed(lambda: [log.records_for_patient(patient_id) for patient_id in lookups])
+        report("per-patient (index)", seconds, operations)
+        seconds, _ = timed(lambda: [log.records_between("2026-03-01", "2026-03-07") for _ in range(operations)])
+        report("one-week date range (index)", seconds, operations)
+
+
+def bench_staff(sizes, operations):
+    print("Staff lookup: list scan vs StaffManager index")
+    roles = ["Doctor", "Nurse", "Surgeon", "Technician", "Porter"]
+    for size in sizes:
+        rng = random.Random(size)
+        staff_members = [Staff(f"S{number}", f"Staff {number}", rng.choice(roles)) for number in range(size)]
+        manager = StaffManager()
+        seconds, _ = timed(manager.add_many, staff_members)
+        lookups = [f"S{rng.randrange(size)}" for _ in range(operations)]
+        print(f"{size} staff, {operations} lookups")
+        report("add_many", seconds, size)
+
+        def scan(staff_id):
+            for staff in staff_members:
+                if staff.staff_id == staff_id:
+                    return staff
+            return None
+        seconds, _ = timed(lambda: [scan(staff_id) for staff_id in lookups])
+        report("lookup (list scan)", seconds, operations)
+        seconds, _ = timed(lambda: [manager.get(staff_id) for staff_id in lookups])
+        report("lookup (get)", seconds, operations)
+        seconds, _ = timed(lambda: [manager.by_role(role) for role in roles])
+        report("by_role", seconds, len(roles))
+
+
+class LegacyCleaningQueue:
+    """The original list-backed cleaning queue."""
+
+    def __init__(self):
+        self.cleaning_queue = []
+
+    def add_room_to_cleaning(self, room_id):
+        if room_id not in self.cleaning_queue:
+            self.cleaning_queue.append(room_id)
+
+    def get_next_room_to_clean(self):
+        return self.cleaning_queue[0] if self.cleaning_queue else None
+
+    def mark_room_cleaned(self, room_id):
+        if room_id in self.cleaning_queue:
+            self.cleaning_queue.remove(room_id)
+            return True
+        return False
+
+
+def bench_cleaning(sizes):
+    print("Cleaning queue: list vs ordered dict, after a mass discharge")
+    for size in sizes:
+        room_ids = [f"Ward {number}" for number in range(size)]
+        rng = random.Random(size)
+        out_of_order = rng.sample(room_ids, size // 2)
+        print(f"{size} rooms queued at once")
+        for label, queue_class in (("list", LegacyCleaningQueue), ("ordered dict", CleaningQueue)):
+            queue = queue_class()
+
+            def churn():
+                for room_id in room_ids:
+                    queue.add_room_to_cleaning(room_id)
+                for room_id in room_ids:
+                    queue.add_room_to_cleaning(room_id)  # duplicates are ignored
+                for room_id in out_of_order:
+                    queue.mark_room_cleaned(room_id)
+                while queue.get_next_room_to_clean():
+                    queue.mark_room_cleaned(queue.get_next_room_to_clean())
+            seconds, _ = timed(churn)
+            report(f"enqueue / clean ({label})", seconds, size * 3)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def service_client(reader, writer, requests, patient_count, rng, latencies):
+    for request_id in range(requests):
+        roll = rng.random()
+        if roll < 0.5:
+            request = {"op": "find_patient", "patient_id": rng.randint(1, patient_count)}
+        elif roll < 0.7:
+            request = {"op": "next_patient"}
+        elif roll < 0.85:
+            request = {"op": "admit", "name": "Load", "age": rng.randint(1, 95), "gender": "F",
+                       "severity": rng.randint(1, 3)}
+        else:
+            request = {"op": "discharge", "patient_id": rng.randint(1, patient_count)}
+        request["id"] = request_id
+        start = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        await reader.readline()
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run_service_load(address, connections, requests, patient_count):
+    if address.startswith("unix:"):
+        connect = lambda: asyncio.open_unix_connection(address[len("unix:"):])
+    else:
+        host, port = address.rsplit(":", 1)
+        connect = lambda: asyncio.open_connection(host, int(port))
+    streams = await asyncio.gather(*(connect() for _ in range(connections)))
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(service_client(reader, writer, requests, patient_count, random.Random(number), latencies)
+                           for number, (reader, writer) in enumerate(streams)))
+    return time.perf_counter() - start, latencies
+
+
+def bench_service(connections, requests, preload, address=None, unix_path=None):
+    print(f"Service: {connections} concurrent connections x {requests} requests "
+          "(50% find_patient, 20% next_patient, 15% admit, 15% discharge)")
+    server = None
+    if address is None:
+        command = [sys.executable, "service.py", "--port", "0", "--preload", str(preload)]
+        if unix_path:
+            command += ["--unix", unix_path]
+        server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        address = server.stdout.readline().split("listening on ", 1)[1].strip()
+    try:
+        seconds, latencies = asyncio.run(run_service_load(address, connections, requests, max(preload, 1)))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    latencies.sort()
+    print(f"  {len(latencies)} requests in {seconds:.2f} s ({len(latencies) / seconds:,.0f} requests/s)")
+    print(f"  latency p50 {percentile(latencies, 0.5) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms,"
+          f" max {latencies[-1] * 1000:.2f} ms")
+
+
+def bench_bulk_admit(sizes):
+    print("Admission: one add at a time vs bulk_admit")
+    for size in sizes:
+        print(f"{size} patients")
+        hospital = EnhancedHospitalSystem()
+        patients = make_patients(size)
+
+        def one_at_a_time():
+            for patient in patients:
+                hospital.avl_tree.insert(patient)
+                hospital.priority_queue.add_patient(patient)
+        seconds, _ = timed(one_at_a_time)
+        report("insert + add_patient", seconds, size)
+
+        hospital = EnhancedHospitalSystem()
+        patients = make_patients(size)
+        seconds, _ = timed(hospital.bulk_admit, patients)
+        report("bulk_admit", seconds, size)
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def bench_restart(patient_count, treatment_count, tail, fsync_records, parent=None):
+    print("Persistence: snapshot + journal tail restart, group commit vs fsync per record")
+    directory = tempfile.mkdtemp(prefix="hospital-", dir=parent)
+    try:
+        rng = random.Random(patient_count)
+        hospital = EnhancedHospitalSystem()
+        hospital.bulk_admit(make_patients(patient_count))
+        hospital.staff_manager.add_many(Staff(f"S{number}", f"Staff {number}", "Doctor") for number in range(200))
+
+        def treatments():
+            for number in range(treatment_count):
+                day = number * 365 // treatment_count
+                patient_id = rng.randint(1, patient_count)
+                hospital.avl_tree.find_patient(patient_id).treatments.append("Checkup")
+                yield Treatment(f"T{number}", patient_id, f"S{number % 200}", "Checkup",
+                                f"2025-{day // 31 + 1:02d}-{day % 28 + 1:02d}")
+        seconds, _ = timed(hospital.treatment_log.extend, treatments())
+        print(f"{patient_count} patients, {treatment_count} treatments, {tail} journaled tail records")
+        report("build state (bulk paths)", seconds, patient_count + treatment_count)
+
+        store = HospitalStore(directory, snapshot_every=0)
+        store.open(hospital)
+        seconds, _ = timed(store.snapshot)
+        report("write snapshot", seconds, patient_count + treatment_count)
+        print(f"  snapshot size {directory_size(directory) / 2**20:.1f} MiB")
+
+        def journal_tail():
+            for number in range(tail):
+                if number % 4 == 0:
+                    hospital.admit_patient(f"Tail {number}", 40, "F", 3)
+                else:
+                    hospital.record_treatment(f"J{number}", rng.randint(1, patient_count), "S1", "Checkup")
+            store.commit()
+        seconds, _ = timed(journal_tail)
+        report(f"journal tail ({store.journal.commits} fsyncs)", seconds, tail)
+        store.close()
+        del hospital, store
+
+        store = HospitalStore(directory)
+        seconds, restored = timed(store.open)
+        report("restart (snapshot + tail)", seconds, patient_count + treatment_count)
+        print(f"  replayed {store.replayed} records, {len(restored.avl_tree)} patients,"
+              f" {len(restored.treatment_log)} treatments")
+        store.close()
+        del restored, store
+    finally:
+        shutil.rmtree(directory)
+
+    gc.collect()  # free the restored system now rather than during the timed runs below
+    for group_size in (1, 256):
+        directory = tempfile.mkdtemp(prefix="hospital-", dir=parent)
+        try:
+            store = HospitalStore(directory, group_size=group_size, commit_interval=float("inf"), snapshot_every=0)
+            hospital = store.open()
+            hospital.register_staff("S1", "Staff 1", "Doctor")
+            hospital.admit_patient("Ann", 40, "F", 3)
+
+            def record():
+                for number in range(fsync_records):
+                    hospital.record_treatment(f"G{number}", 1, "S1", "Checkup")
+                store.commit()
+            seconds, _ = timed(record)
+            report(f"journal, group_size={group_size}", seconds, fsync_records)
+            store.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+def bench_sqlite(records, patient_count, cache_size, lookups, parent=None):
+    print("SQLite store: transaction batching and cache fault-in")
+    for batch_size in (1, 1_000):
+        directory = tempfile.mkdtemp(prefix="hospital-", dir=parent)
+        try:
+            store = SQLiteStore(os.path.join(directory, "hospital.db"), batch_size=batch_size)
+            hospital = store.open()
+            hospital.register_staff("S1", "Staff 1", "Doctor")
+            hospital.admit_patient("Ann", 40, "F", 3)
+            count = records if batch_size > 1 else max(1, records // 20)
+
+            def record():
+                for number in range(count):
+                    hospital.record_treatment(f"T{number}", 1, "S1", "Checkup")
+                store.commit()
+            seconds, _ = timed(record)
+            report(f"record_treatment, batch_size={batch_size}", seconds, count)
+            store.close()
+        finally:
+            shutil.rmtree(directory)
+
+    directory = tempfile.mkdtemp(prefix="hospital-", dir=parent)
+    try:
+        path = os.path.join(directory, "hospital.db")
+        store = SQLiteStore(path)
+        hospital = store.open()
+        seconds, _ = timed(hospital.bulk_admit, make_patients(patient_count))
+        store.close()
+        report(f"bulk_admit {patient_count} patients", seconds, patient_count)
+
+        store = SQLiteStore(path, cache_size=cache_size)
+        seconds, hospital = timed(store.open)
+        report("open", seconds, patient_count)
+        # Discharged patients are the cold ones: the cache keeps the most recent
+        # cache_size of them and faults older ones in from the database.
+        discharge_count = patient_count - patient_count // 10
+        discharged = [patient.patient_id for patient in hospital.avl_tree.range_scan()][:discharge_count]
+        seconds, _ = timed(lambda: [hospital.discharge(patient_id) for patient_id in discharged])
+        store.commit()
+        report(f"discharge {discharge_count} patients", seconds, discharge_count)
+        cache = hospital.avl_tree
+        print(f"  {len(cache)} admitted, {len(cache.cold)} of {discharge_count} discharged patients cached,"
+              f" lookups over the oldest discharged patients")
+        rng = random.Random(patient_count)
+        evicted = discharged[:max(0, discharge_count - cache_size)] or discharged
+        hot_set = rng.sample(evicted, min(len(evicted), max(1, cache_size // 4)))
+        patient_ids = [rng.choice(hot_set) for _ in range(lookups)]
+        cache.hits = cache.misses = 0
+        seconds, _ = timed(lambda: [hospital.find_patient(patient_id) for patient_id in patient_ids])
+        report("find_patient, cold cache", seconds, lookups)
+        seconds, _ = timed(lambda: [hospital.find_patient(patient_id) for patient_id in patient_ids])
+        report("find_patient, warm cache", seconds, lookups)
+        print(f"  {cache.misses} misses, {cache.hits} hits")
+        seconds, rows = timed(store.query, "SELECT severity, COUNT(*) FROM patients WHERE active GROUP BY severity")
+        report("census query (SQL)", seconds, 1)
+        store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_census(sizes, repeats):
+    print("Census over waiting patients: Python walk vs PatientTable columns")
+    for size in sizes:
+        hospital = EnhancedHospitalSystem()
+        hospital.bulk_admit(make_patients(size))
+        waiting = hospital.waiting_queue
+        table = hospital.patient_table
+        now = time.time()
+        print(f"{size} patients, {len(waiting)} waiting, {repeats} repeats")
+
+        def walk():
+            severities = Counter()
+            total_wait = 0.0
+            ages = [0] * 5
+            for entry in waiting.heap:
+                patient = entry[4]
+                severities[patient.severity] += 1
+                total_wait += now - patient.arrival_time
+                ages[bisect.bisect_right((18, 40, 65, 80), patient.age)] += 1
+            return severities, total_wait / len(waiting.heap), ages
+        seconds, _ = timed(lambda: [walk() for _ in range(repeats)])
+        report("Python walk", seconds, repeats)
+
+        def vectorized():
+            return (table.severity_counts(waiting_only=True), table.mean_wait(now), table.age_histogram())
+        seconds, _ = timed(lambda: [vectorized() for _ in range(repeats)])
+        report("PatientTable", seconds, repeats)
+
+        patients = make_patients(size)
+        tracemalloc.start()
+        fresh = PatientTable()
+        fresh.add_many(patients)
+        table_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"  table memory {table_bytes / size:.0f} B/patient (rows plus patient_id -> row map)")
+
+
+def bench_metrics(events, room_count):
+    print("Metrics engine: per-event update and readout cost")
+    room_manager = make_campus(room_count)
+    metrics = HospitalMetrics(room_manager)
+    start = time.time()
+    patients = make_patients(events)
+    room_ids = [room_id for room_id, room in room_manager.rooms.items() if room.is_vacant]
+    print(f"{events} events per kind, {len(room_ids)} rooms")
+    clock = [start + offset * 0.5 for offset in range(events)]
+
+    seconds, _ = timed(lambda: [metrics.patient_roomed(patient, now) for patient, now in zip(patients, clock)])
+    report("patient_roomed", seconds, events)
+    seconds, _ = timed(lambda: [metrics.treatment_recorded(patient, now) for patient, now in zip(patients, clock)])
+    report("treatment_recorded", seconds, events)
+    # Occupy every room in turn, then vacate them all, and so on.
+    seconds, _ = timed(lambda: [metrics.room_changed(room_ids[number % len(room_ids)],
+                                                     number // len(room_ids) % 2 == 1, now)
+                                for number, now in enumerate(clock)])
+    report("room_changed", seconds, events)
+    seconds, _ = timed(lambda: [metrics.patient_discharged(patient, now + 3600)
+                                for patient, now in zip(patients, clock)])
+    report("patient_discharged", seconds, events)
+    now = clock[-1] + 3600
+    seconds, _ = timed(lambda: [metrics.snapshot(now) for _ in range(100)])
+    report("snapshot (readout)", seconds, 100)
+
+
+def bench_profile(patient_count, operations):
+    print("Instrumentation overhead: the same workload with the profiler off, on and off again")
+    rng = random.Random(5)
+    lookups = [rng.randint(1, patient_count) for _ in range(operations)]
+
+    def workload():
+        hospital = EnhancedHospitalSystem()
+        patients = make_patients(patient_count)
+        hospital.bulk_admit(patients)
+        hospital.register_staff("S1", "Staff 1", "Doctor")
+        # Free the rooms bulk_admit handed out so every walk-in below gets one.
+        for patient in patients:
+            if patient.room_id:
+                hospital.discharge(patient.patient_id)
+                hospital.mark_room_clean()
+        start = time.perf_counter()
+        for number, patient_id in enumerate(lookups):
+            hospital.find_patient(patient_id)
+            hospital.record_treatment(f"T{number}", patient_id, "S1", "Checkup")
+            admitted = hospital.admit_patient("Walk-in", 30, "F", number % 3 + 1)
+            if admitted.ok:
+                hospital.discharge(admitted.data.patient_id)
+                hospital.mark_room_clean()
+        return time.perf_counter() - start
+
+    print(f"{patient_count} patients, {operations} rounds of find + treatment + admit/discharge/clean")
+    timings = {}
+    for phase in ("off", "on", "off again"):
+        if phase == "on":
+            PROFILER.reset()
+            PROFILER.enable()
+        gc.collect()
+        timings[phase] = workload()
+        PROFILER.disable()
+        report(f"profiler {phase}", timings[phase], operations)
+    print(f"  overhead on {timings['on'] / timings['off'] - 1:+.1%}, "
+          f"off again {timings['off again'] / timings['off'] - 1:+.1%}")
+    print(PROFILER.report())
+
+
+def bench_shards(campus_count, wards_per_campus, rounds):
+    print("Sharded campuses: one process per campus vs one EnhancedHospitalSystem for the whole region")
+    beds = campus_count * wards_per_campus
+    print(f"{campus_count} campuses x {wards_per_campus} wards, {rounds} rounds of admit / find / discharge "
+          f"on {os.cpu_count()} cores")
+    rng = random.Random(3)
+    severities = [rng.choice(list(SEVERITY_MIX)) for _ in range(beds)]
+
+    hospital = EnhancedHospitalSystem()
+    make_campus(beds, room_manager=hospital.room_manager)
+
+    def single():
+        for _ in range(rounds):
+            admitted = [hospital.admit_patient("Patient", 40, "F", severity) for severity in severities]
+            ids = [result.data.patient_id for result in admitted if result.ok]
+            for patient_id in ids:
+                hospital.find_patient(patient_id)
+            for patient_id in ids:
+                hospital.discharge(patient_id)
+                hospital.mark_room_clean()
+        return len(ids)
+    seconds, admitted = timed(single)
+    report("single system", seconds, rounds * admitted * 3)
+
+    campuses, campus_graph = make_region(campus_count, wards_per_campus)
+    with ShardedHospital(campuses, campus_graph) as region:
+        names = region.names
+
+        def sharded():
+            for _ in range(rounds):
+                admitted = region.execute_many([
+                    {"op": "admit", "campus": names[number % campus_count], "name": "Patient", "age": 40,
+                     "gender": "F", "severity": severity} for number, severity in enumerate(severities)])
+                ids = [result.data["patient_id"] for result in admitted if result.ok]
+                region.execute_many([{"op": "find_patient", "patient_id": patient_id} for patient_id in ids])
+                region.execute_many([{"op": "discharge", "patient_id": patient_id} for patient_id in ids])
+                region.execute_many([{"op": "clean_room", "campus": result.data["campus"]}
+                                     for result in admitted if result.ok])
+            return len(ids)
+        seconds, admitted = timed(sharded)
+        report(f"{campus_count} shards (execute_many)", seconds, rounds * admitted * 3)
+
+        def one_at_a_time():
+            ids = [region.admit_patient("Patient", 40, "F", severity).data["patient_id"]
+                   for severity in severities[:1000]]
+            for patient_id in ids:
+                region.find_patient(patient_id)
+            return len(ids)
+        seconds, count = timed(one_at_a_time)
+        report(f"{campus_count} shards (per-call round trips)", seconds, count * 2)
+        seconds, _ = timed(lambda: [region.next_patient() for _ in range(1000)])
+        report("next_patient (cached tops + 1 call)", seconds, 1000)
+
+
+def bench_snapshots(patient_count, room_count, reader_count, seconds):
+    print("Dashboard reads: locked reads of live state vs copy-on-write snapshots")
+    print(f"{patient_count} patients, {room_count} wards, {reader_count} reader threads, {seconds:.1f} s per run "
+          f"on {os.cpu_count()} cores")
+
+    def fresh_hospital():
+        hospital = EnhancedHospitalSystem()
+        make_campus(room_count, room_manager=hospital.room_manager)
+        hospital.bulk_admit(make_patients(patient_count, severity_mix=SEVERITY_MIX))
+        hospital.current_id = patient_count
+        return hospital
+
+    def run(hospital, dashboard, write, writing):
+        stop = threading.Event()
+        reads = [[] for _ in range(reader_count)]  # per reader: read latencies in ns
+        writes = [0]
+
+        def reader(latencies):
+            clock = time.perf_counter_ns
+            while not stop.is_set():
+                start = clock()
+                dashboard()
+                latencies.append(clock() - start)
+
+        def writer():
+            # Discharge a roomed patient, clean the room and admit someone new, keeping occupancy steady.
+            rng = random.Random(5)
+            roomed = [patient.patient_id for patient in hospital.avl_tree.range_scan() if patient.room_id]
+            while not stop.is_set():
+                write(hospital.discharge, roomed.pop(rng.randrange(len(roomed))))
+                write(hospital.mark_room_clean)
+                result = write(hospital.admit_patient, "Patient", rng.randint(1, 95), "F", rng.choice((1, 2, 3)))
+                if result.ok:
+                    roomed.append(result.data.patient_id)
+                writes[0] += 3
+
+        threads = [threading.Thread(target=reader, args=(latencies,)) for latencies in reads]
+        if writing:
+            threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        latencies = sorted(itertools.chain.from_iterable(reads))
+        p99 = latencies[int(len(latencies) * 0.99)] / 1e3 if latencies else 0.0
+        return len(latencies) / seconds, p99, writes[0] / seconds
+
+    live = fresh_hospital()
+    lock = threading.Lock()
+
+    def locked_dashboard():
+        with lock:
+            live.priority_queue.top_k(20)
+            {room_type: len(rooms) for room_type, rooms in live.room_manager.vacant_rooms.items()}
+            tuple(live.room_manager.cleaning_queue.cleaning_queue)
+
+    def locked_write(command, *args):
+        with lock:
+            return command(*args)
+
+    published = fresh_hospital()
+    publisher = SnapshotPublisher(published)
+
+    def snapshot_dashboard():
+        snapshot = publisher.current
+        snapshot.priority_page(0, 20)
+        dict(snapshot.vacant_counts)
+        snapshot.cleaning
+
+    def unlocked_write(command, *args):
+        return command(*args)
+
+    for label, hospital, dashboard, write in (("locked live state", live, locked_dashboard, locked_write),
+                                              ("snapshots", published, snapshot_dashboard, unlocked_write)):
+        for writing in (False, True):
+            reads, p99, writes = run(hospital, dashboard, write, writing)
+            load = f"{writes:,.0f} writes/s" if writing else "no writes"
+            print(f"  {label:<18} {load:>18}: {reads:12,.0f} reads/s   p99 {p99:9.1f} us")
+
+    print("Single-threaded write cost (discharge + clean + admit)")
+    for label, hospital in (("without publisher", live), ("publishing snapshots", published)):
+        rng = random.Random(6)
+        roomed = [patient.patient_id for patient in hospital.avl_tree.range_scan() if patient.room_id]
+
+        def churn():
+            for _ in range(2_000):
+                hospital.discharge(roomed.pop(rng.randrange(len(roomed))))
+                hospital.mark_room_clean()
+                result = hospital.admit_patient("Patient", rng.randint(1, 95), "F", rng.choice((1, 2, 3)))
+                if result.ok:
+                    roomed.append(result.data.patient_id)
+        seconds, _ = timed(churn)
+        report(label, seconds, 6_000)
+
+
+def bench_network(node_count, edge_count, updates):
+    print("Corridor network design: full MST rebuilds vs an incrementally maintained MST")
+    print(f"{node_count} nodes, {edge_count} edges, {updates} updates of each kind")
+    seconds, graph = timed(make_facility_graph, node_count, edge_count)
+    report("build Graph (dict adjacency)", seconds, edge_count)
+    graph_bytes = peak_memory(make_facility_graph, node_count, edge_count)
+    seconds, csr = timed(graph.to_csr)
+    report("convert to CSR arrays", seconds, edge_count)
+    csr_bytes = csr.indptr.nbytes + csr.indices.nbytes + csr.weights.nbytes
+    print(f"  adjacency memory: {graph_bytes / 2**20:.1f} MiB as dicts, {csr_bytes / 2**20:.1f} MiB as CSR arrays")
+
+    seconds, _ = timed(graph.prim_mst, 0)
+    report("Prim (heap, dict adjacency)", seconds, edge_count)
+    seconds, _ = timed(graph.kruskal_mst)
+    report("Kruskal (union-find, dicts)", seconds, edge_count)
+    seconds, forest = timed(csr.kruskal_mst)
+    rebuild = seconds
+    report("Kruskal (union-find, CSR)", seconds, edge_count)
+    seconds, mst = timed(DynamicMST, graph)
+    report("DynamicMST build", seconds, edge_count)
+
+    rng = random.Random(9)
+    nodes = list(graph.adjacency_list)
+
+    def insert():
+        for _ in range(updates):
+            from_node, to_node = rng.sample(nodes, 2)
+            graph.add_edge(from_node, to_node, rng.randint(1, 100))
+
+    def remove_tree_edges():
+        # Tree edges are the expensive case: each one needs a replacement across the cut.
+        for from_node, to_node, _ in rng.sample(list(mst.edges()), updates):
+            graph.remove_edge(from_node, to_node)
+
+    def remove_other_edges():
+        removed = 0
+        while removed < updates:
+            from_node = rng.choice(nodes)
+            neighbors = [neighbor for neighbor in graph.adjacency_list[from_node]
+                         if neighbor not in mst.tree[from_node]]
+            if neighbors:
+                graph.remove_edge(from_node, rng.choice(neighbors))
+                removed += 1
+
+    def reweight():
+        for _ in range(updates):
+            from_node = rng.choice(nodes)
+            neighbors = graph.adjacency_list[from_node]
+            if neighbors:
+                graph.add_edge(from_node, rng.choice(list(neighbors)), rng.randint(1, 100))
+
+    for label, update in (("insert edge", insert), ("remove tree edge", remove_tree_edges),
+                          ("remove non-tree edge", remove_other_edges), ("reweight edge", reweight)):
+        seconds, _ = timed(update)
+        report(f"incremental {label}", seconds, updates)
+    print(f"  a full CSR Kruskal rebuild per update would cost {rebuild * 1e6:,.0f} us/op")
+    forest = graph.to_csr().kruskal_mst()
+    check = "matches" if sum(weight for _, _, weight in forest) == mst.total_weight else "DOES NOT match"
+    print(f"  maintained total weight {mst.total_weight} {check} a fresh Kruskal run")
+
+
+def bench_routing(node_count, edge_count, queries, landmarks):
+    print("Corridor routing: point-to-point searches, cached distance oracle and multi-source nearest")
+    graph = make_facility_graph(node_count, edge_count)
+    print(f"{node_count} nodes, {edge_count} edges, {queries} queries per method")
+    rng = random.Random(4)
+    nodes = list(graph.adjacency_list)
+    pairs = [tuple(rng.sample(nodes, 2)) for _ in range(queries)]
+    router = Router(graph, landmarks=landmarks)
+
+    seconds, _ = timed(router.tree, nodes[0])
+    report("full shortest-path tree", seconds, 1)
+    router.trees.clear()
+    seconds, _ = timed(router._build_landmarks)
+    report(f"choose {landmarks} landmarks (ALT)", seconds, 1)
+    answers = {}
+    sample = pairs[:max(1, queries // 10)]  # plain Dijkstra and ALT are slow here; time them on fewer pairs
+    for method, method_pairs in (("dijkstra", sample), ("astar", sample), ("bidirectional", pairs)):
+        seconds, routes = timed(lambda: [router.route(source, target, method) for source, target in method_pairs])
+        answers[method] = [route.distance for route in routes][:len(sample)]
+        report(f"point-to-point ({method})", seconds, len(method_pairs))
+    check = "agree" if answers["dijkstra"] == answers["bidirectional"] == answers["astar"] else "DO NOT agree"
+    print(f"  the three searches {check} on every distance")
+
+    # Most queries start from a few busy places (entrances, nurse stations).
+    hubs = rng.sample(nodes, 10)
+    hub_pairs = [(rng.choice(hubs), rng.choice(nodes)) for _ in range(queries * 10)]
+    seconds, _ = timed(lambda: [router.route(source, target) for source, target in hub_pairs])
+    report("oracle, 10 hubs (cold)", seconds, len(hub_pairs))
+    seconds, _ = timed(lambda: [router.route(source, target) for source, target in hub_pairs])
+    report("oracle, 10 hubs (cached trees)", seconds, len(hub_pairs))
+
+    staff_rooms = rng.sample(nodes, 50)
+    targets = [rng.choice(nodes) for _ in range(queries)]
+    router.trees.clear()
+    seconds, _ = timed(lambda: [router.nearest(target, staff_rooms) for target in targets])
+    report("nearest of 50 staff (multi-source)", seconds, queries)
+    seconds, _ = timed(lambda: [min(router.route(room, target, "bidirectional").distance for room in staff_rooms)
+                                for target in targets[:max(1, queries // 10)]])
+    report("nearest of 50 staff (50 searches)", seconds, max(1, queries // 10))
+
+
+class LatencyRecorder:
+    """Per-call latencies by operation name, for the regression suite."""
+
+    def __init__(self):
+        self.samples = {}  # operation -> [ns]
+
+    def call(self, operation, function, *args, **kwargs):
+        start = time.perf_counter_ns()
+        result = function(*args, **kwargs)
+        elapsed = time.perf_counter_ns() - start
+        samples = self.samples.get(operation)
+        if samples is None:
+            samples = self.samples[operation] = []
+        samples.append(elapsed)
+        return result
+
+    def results(self, case, size):
+        """One machine-readable record per operation."""
+        records = []
+        for operation, samples in self.samples.items():
+            samples = sorted(samples)
+            count = len(samples)
+            seconds = sum(samples) / 1e9
+            records.append({
+                "case": case,
+                "operation": operation,
+                "size": size,
+                "operations": count,
+                "seconds": seconds,
+                "ops_per_second": count / seconds if seconds else None,
+                "mean_us": seconds / count * 1e6,
+                "p50_us": samples[(count - 1) // 2] / 1e3,
+                "p95_us": samples[min(count - 1, int(count * 0.95))] / 1e3,
+                "p99_us": samples[min(count - 1, int(count * 0.99))] / 1e3,
+                "max_us": samples[-1] / 1e3,
+            })
+        return records
+
+
+def peak_memory(function, *args):
+    """Peak bytes allocated while function(*args) runs."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def suite_heap(size, lookups, rng):
+    patients = make_patients(size, severity_mix=SEVERITY_MIX)
+    recorder = LatencyRecorder()
+    queue = MinHeapPriorityQueue()
+    for patient in patients:
+        recorder.call("add_patient", queue.add_patient, patient)
+    for patient_id in rng.sample(range(1, size + 1), lookups):
+        recorder.call("update_priority", queue.update_priority, patient_id, severity=rng.randint(1, 3))
+    for patient_id in rng.sample(range(1, size + 1), lookups):
+        recorder.call("remove_patient", queue.remove_patient, patient_id)
+    for _ in range(min(lookups, len(queue))):
+        recorder.call("pop_patient", queue.pop_patient)
+
+    def build():
+        MinHeapPriorityQueue().add_patients(make_patients(size, severity_mix=SEVERITY_MIX))
+    return recorder.results("heap", size), peak_memory(build)
+
+
+def suite_avl(size, lookups, rng):
+    patients = make_patients(size, severity_mix=SEVERITY_MIX)
+    rng.shuffle(patients)
+    recorder = LatencyRecorder()
+    tree = AVLTree()
+    for patient in patients:
+        recorder.call("insert", tree.insert, patient)
+    for patient_id in rng.choices(range(1, size + 1), k=lookups):
+        recorder.call("find_patient", tree.find_patient, patient_id)
+    for patient_id in rng.sample(range(1, size + 1), lookups):
+        recorder.call("delete_patient", tree.delete_patient, patient_id)
+
+    def build():
+        tree = AVLTree()
+        for patient in make_patients(size, severity_mix=SEVERITY_MIX):
+            tree.insert(patient)
+    return recorder.results("avl", size), peak_memory(build)
+
+
+def suite_rooms(room_count, lookups, rng):
+    room_manager = make_campus(room_count)
+    rooms = room_manager.rooms
+    occupied = []
+    recorder = LatencyRecorder()
+    # Admit until the campus is about 80% full, then alternate admissions and discharges.
+    for _ in range(lookups):
+        if occupied and (len(occupied) > room_count * 0.8 or rng.random() < 0.4):
+            room_id = occupied.pop(rng.randrange(len(occupied)))
+            recorder.call("vacate", setattr, rooms[room_id], "is_vacant", True)
+            continue
+        room_id = recorder.call("find_room_for_severity", room_manager.find_room_for_severity,
+                                "Reception", rng.choices(list(SEVERITY_MIX), list(SEVERITY_MIX.values()))[0])
+        if room_id:
+            recorder.call("occupy", setattr, rooms[room_id], "is_vacant", False)
+            occupied.append(room_id)
+    return recorder.results("rooms", room_count), peak_memory(make_campus, room_count)
+
+
+def suite_treatments(size, lookups, rng):
+    patient_count = max(1, size // 10)
+    days = [f"2025-{month:02d}-{day:02d}" for month in range(1, 13) for day in range(1, 29)]
+    treatments = [Treatment(f"T{number}", rng.randint(1, patient_count), f"S{rng.randint(1, 200)}", "Checkup",
+                            days[number * len(days) // size]) for number in range(size)]
+    recorder = LatencyRecorder()
+    log = TreatmentLog()
+    for treatment in treatments:
+        recorder.call("append", log.append, treatment)
+    for patient_id in rng.choices(range(1, patient_count + 1), k=lookups):
+        recorder.call("records_for_patient", log.records_for_patient, patient_id)
+    for start in rng.choices(range(len(days) - 7), k=lookups):
+        recorder.call("records_between", log.records_between, days[start], days[start + 7])
+
+    def build():
+        log = TreatmentLog()
+        for treatment in treatments:
+            log.append(treatment)
+    return recorder.results("treatments", size), peak_memory(build)
+
+
+def suite_cleaning(size, lookups, rng):
+    room_ids = [f"Ward {number}" for number in range(size)]
+    room_types = {room_id: rng.choice(["General", "ICU", "Surgery"]) for room_id in room_ids}
+    recorder = LatencyRecorder()
+    queue = CleaningQueue(room_types.__getitem__)
+    for room_id in room_ids:
+        recorder.call("add_room_to_cleaning", queue.add_room_to_cleaning, room_id)
+    for room_id in rng.sample(room_ids, lookups):
+        recorder.call("mark_room_cleaned", queue.mark_room_cleaned, room_id)
+    while queue:
+        recorder.call("pop_next_room", queue.pop_next_room)
+
+    def build():
+        queue = CleaningQueue(room_types.__getitem__)
+        for room_id in room_ids:
+            queue.add_room_to_cleaning(room_id)
+    return recorder.results("cleaning", size), peak_memory(build)
+
+
+def suite_system(room_count, events):
+    commands = generate_events(events, room_count)
+
+    def run(recorder):
+        hospital = EnhancedHospitalSystem()
+        make_campus(room_count, room_manager=hospital.room_manager)
+        failures = Counter()
+        for command in commands:
+            arguments = dict(command)
+            op = arguments.pop("op")
+            if not recorder.call(op, getattr(hospital, BATCH_COMMANDS[op]), **arguments):
+                failures[op] += 1
+        return failures
+
+    recorder = LatencyRecorder()
+    started = time.perf_counter()
+    failures = run(recorder)
+    elapsed = time.perf_counter() - started
+    records = recorder.results("system", room_count)
+    for record in records:
+        record["failed"] = failures[record["operation"]]
+    records.append({"case": "system", "operation": "all", "size": room_count, "operations": len(commands),
+                    "seconds": elapsed, "ops_per_second": len(commands) / elapsed})
+    return records, peak_memory(run, LatencyRecorder())
+
+
+def compare_results(current, baseline, tolerance):
+    """Operations whose mean latency or peak memory grew by more than tolerance over the baseline."""
+    regressions = []
+    previous = {(record["case"], record["operation"], record["size"]): record for record in baseline["latency"]}
+    for record in current["latency"]:
+        old = previous.get((record["case"], record["operation"], record["size"]))
+        if old and old.get("mean_us") and record.get("mean_us") and record["mean_us"] > old["mean_us"] * (1 + tolerance):
+            regressions.append(f"{record['case']}.{record['operation']} @ {record['size']}: mean "
+                               f"{old['mean_us']:.2f} -> {record['mean_us']:.2f} us")
+    previous = {(record["case"], record["size"]): record for record in baseline["memory"]}
+    for record in current["memory"]:
+        old = previous.get((record["case"], record["size"]))
+        if old and record["peak_bytes"] > old["peak_bytes"] * (1 + tolerance):
+            regressions.append(f"{record['case']} @ {record['size']}: peak memory "
+                               f"{old['peak_bytes'] / 2**20:.1f} -> {record['peak_bytes'] / 2**20:.1f} MiB")
+    return regressions
+
+
+def bench_suite(sizes, room_counts, events, lookups, seed, output=None, baseline=None, tolerance=0.25):
+    """Run every subsystem and the whole system on synthetic workloads; returns the regressions found."""
+    print("Regression suite: throughput, latency percentiles and peak memory per subsystem")
+    rng = random.Random(seed)
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "parameters": {"sizes": sizes, "rooms": room_counts, "events": events, "lookups": lookups,
+                           "seed": seed},
+        },
+        "latency": [],
+        "memory": [],
+    }
+    cases = [(case, size, function) for size in sizes
+             for case, function in (("heap", suite_heap), ("avl", suite_avl), ("treatments", suite_treatments),
+                                    ("cleaning", suite_cleaning))]
+    cases += [("rooms", room_count, suite_rooms) for room_count in room_counts]
+    for case, size, function in cases:
+        gc.collect()
+        records, peak_bytes = function(size, min(lookups, size // 4), rng)
+        results["latency"] += records
+        results["memory"].append({"case": case, "size": size, "peak_bytes": peak_bytes})
+    for room_count in room_counts:
+        gc.collect()
+        records, peak_bytes = suite_system(room_count, events)
+        results["latency"] += records
+        results["memory"].append({"case": "system", "size": room_count, "peak_bytes": peak_bytes})
+
+    print(f"  {'operation':<40}{'size':>9}{'ops/s':>12}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'max us':>10}")
+    for record in results["latency"]:
+        name = f"{record['case']}.{record['operation']}"
+        if "p50_us" in record:
+            print(f"  {name:<40}{record['size']:>9}{record['ops_per_second']:>12,.0f}{record['p50_us']:>10.2f}"
+                  f"{record['p95_us']:>10.2f}{record['p99_us']:>10.2f}{record['max_us']:>10.2f}")
+        else:
+            print(f"  {name:<40}{record['size']:>9}{record['ops_per_second']:>12,.0f}")
+    for record in results["memory"]:
+        print(f"  {record['case'] + ' peak memory':<40}{record['size']:>9}{record['peak_bytes'] / 2**20:>12.2f} MiB")
+
+    if output:
+        with open(output, "w") as stream:
+            json.dump(results, stream, indent=2)
+        print(f"Results written to {output}")
+    regressions = []
+    if baseline:
+        with open(baseline) as stream:
+            previous = json.load(stream)
+        if previous["meta"]["parameters"] != results["meta"]["parameters"]:
+            print(f"Warning: {baseline} was run with different parameters: {previous['meta']['parameters']}")
+        regressions = compare_results(results, previous, tolerance)
+        print(f"{len(regressions)} regressions over {tolerance:.0%} against {baseline}")
+        for regression in regressions:
+            print(f"  {regression}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    heap_remove = subparsers.add_parser("heap-remove", help="indexed vs linear-scan heap removal")
+    heap_remove.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    heap_remove.add_argument("--operations", type=int, default=50)
+
+    heap_ops = subparsers.add_parser("heap-ops", help="precomputed-key vs Patient.__lt__ heap operations")
+    heap_ops.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+
+    avl = subparsers.add_parser("avl", help="recursive vs iterative AVL tree latency and memory")
+    avl.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    avl.add_argument("--operations", type=int, default=10_000)
+
+    index = subparsers.add_parser("index", help="compare the patient index backends")
+    index.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    index.add_argument("--operations", type=int, default=10_000)
+    index.add_argument("--fanout", type=int, default=64)
+    index.add_argument("--scan-width", type=int, default=100)
+
+    rooms = subparsers.add_parser("rooms", help="per-call Dijkstra vs vacancy index room allocation")
+    rooms.add_argument("--rooms", type=int, nargs="+", default=[200, 2_000])
+    rooms.add_argument("--operations", type=int, default=2_000)
+
+    room_types = subparsers.add_parser("room-types", help="severity-matched room allocation by room type")
+    room_types.add_argument("--rooms", type=int, nargs="+", default=[2_000, 5_000])
+    room_types.add_argument("--operations", type=int, default=2_000)
+
+    assign_batch = subparsers.add_parser("assign-batch", help="greedy vs min-cost batch room assignment")
+    assign_batch.add_argument("--sizes", type=int, nargs="+", default=[100, 500])
+
+    treatments = subparsers.add_parser("treatments", help="treatment log scans vs indexes")
+    treatments.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    treatments.add_argument("--operations", type=int, default=1_000)
+
+    staff = subparsers.add_parser("staff", help="staff lookup by list scan vs index")
+    staff.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    staff.add_argument("--operations", type=int, default=10_000)
+
+    cleaning = subparsers.add_parser("cleaning", help="list vs ordered-dict cleaning queue")
+    cleaning.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+
+    service = subparsers.add_parser("service", help="load-test the asyncio service (service.py)")
+    service.add_argument("--connections", type=int, default=1_000)
+    service.add_argument("--requests", type=int, default=20, help="requests per connection")
+    service.add_argument("--preload", type=int, default=100_000, help="patients preloaded into the server")
+    service.add_argument("--address", help="host:port or unix:PATH of a running server (default: start one)")
+    service.add_argument("--unix", metavar="PATH", help="start the server on this Unix socket")
+
+    restart = subparsers.add_parser("restart", help="snapshot/journal restart time and group-commit throughput")
+    restart.add_argument("--patients", type=int, default=1_000_000)
+    restart.add_argument("--treatments", type=int, default=10_000_000)
+    restart.add_argument("--tail", type=int, default=10_000, help="journal records written after the snapshot")
+    restart.add_argument("--fsync-records", type=int, default=2_000)
+    restart.add_argument("--dir", help="parent directory for the data files (default: system temp)")
+
+    sqlite = subparsers.add_parser("sqlite", help="SQLite store write batching and cache fault-in")
+    sqlite.add_argument("--records", type=int, default=20_000)
+    sqlite.add_argument("--patients", type=int, default=100_000)
+    sqlite.add_argument("--cache-size", type=int, default=10_000)
+    sqlite.add_argument("--lookups", type=int, default=10_000)
+    sqlite.add_argument("--dir", help="parent directory for the database (default: system temp)")
+
+    census = subparsers.add_parser("census", help="Python walk vs vectorized PatientTable census")
+    census.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    census.add_argument("--repeats", type=int, default=10)
+
+    metrics = subparsers.add_parser("metrics", help="metrics engine update and readout cost")
+    metrics.add_argument("--events", type=int, default=100_000)
+    metrics.add_argument("--rooms", type=int, default=2_000)
+
+    profile = subparsers.add_parser("profile", help="instrumentation cost with the profiler on and off")
+    profile.add_argument("--patients", type=int, default=100_000)
+    profile.add_argument("--operations", type=int, default=20_000)
+
+    shards = subparsers.add_parser("shards", help="sharded multi-process campuses vs one system")
+    shards.add_argument("--campuses", type=int, default=4)
+    shards.add_argument("--wards", type=int, default=5_000, help="wards per campus")
+    shards.add_argument("--rounds", type=int, default=2)
+
+    network = subparsers.add_parser("network", help="full vs incremental MST on a large facility graph")
+    network.add_argument("--nodes", type=int, default=50_000)
+    network.add_argument("--edges", type=int, default=500_000)
+    network.add_argument("--updates", type=int, default=2_000)
+
+    routing = subparsers.add_parser("routing", help="shortest-path searches, distance oracle and nearest staff")
+    routing.add_argument("--nodes", type=int, default=50_000)
+    routing.add_argument("--edges", type=int, default=150_000)
+    routing.add_argument("--queries", type=int, default=200)
+    routing.add_argument("--landmarks", type=int, default=8)
+
+    snapshots = subparsers.add_parser("snapshots", help="dashboard reads under write load: locks vs snapshots")
+    snapshots.add_argument("--patients", type=int, default=100_000)
+    snapshots.add_argument("--rooms", type=int, default=2_000)
+    snapshots.add_argument("--readers", type=int, default=4)
+    snapshots.add_argument("--seconds", type=float, default=3.0)
+
+    suite = subparsers.add_parser("suite", help="whole-system and per-subsystem regression suite with JSON output")
+    suite.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    suite.add_argument("--rooms", type=int, nargs="+", default=[500, 2_000])
+    suite.add_argument("--events", type=int, default=50_000, help="commands in each whole-system event stream")
+    suite.add_argument("--lookups", type=int, default=10_000, help="lookups / removals per subsystem case")
+    suite.add_argument("--seed", type=int, default=1)
+    suite.add_argument("--output", metavar="PATH", help="write the results as JSON to PATH")
+    suite.add_argument("--baseline", metavar="PATH", help="compare against an earlier --output file")
+    suite.add_argument("--tolerance", type=float, default=0.25,
+                       help="slowdown or memory growth counted as a regression (default: 0.25 = 25%%)")
+
+    bulk_admit = subparsers.add_parser("bulk-admit", help="per-patient inserts vs bulk_admit")
+    bulk_admit.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+
+    args = parser.parse_args()
+    if args.benchmark == "heap-remove":
+        bench_heap_remove(args.sizes, args.operations)
+    elif args.benchmark == "heap-ops":
+        bench_heap_ops(args.sizes)
+    elif args.benchmark == "avl":
+        bench_avl(args.sizes, args.operations)
+    elif args.benchmark == "index":
+        bench_index(args.sizes, args.operations, args.fanout, args.scan_width)
+    elif args.benchmark == "rooms":
+        bench_rooms(args.rooms, args.operations)
+    elif args.benchmark == "room-types":
+        bench_room_types(args.rooms, args.operations)
+    elif args.benchmark == "assign-batch":
+        bench_assign_batch(args.sizes)
+    elif args.benchmark == "treatments":
+        bench_treatments(args.sizes, args.operations)
+    elif args.benchmark == "staff":
+        bench_staff(args.sizes, args.operations)
+    elif args.benchmark == "cleaning":
+        bench_cleaning(args.sizes)
+    elif args.benchmark == "service":
+        bench_service(args.connections, args.requests, args.preload, args.address, args.unix)
+    elif args.benchmark == "restart":
+        bench_restart(args.patients, args.treatments, args.tail, args.fsync_records, args.dir)
+    elif args.benchmark == "sqlite":
+        bench_sqlite(args.records, args.patients, args.cache_size, args.lookups, args.dir)
+    elif args.benchmark == "census":
+        bench_census(args.sizes, args.repeats)
+    elif args.benchmark == "metrics":
+        bench_metrics(args.events, args.rooms)
+    elif args.benchmark == "profile":
+        bench_profile(args.patients, args.operations)
+    elif args.benchmark == "shards":
+        bench_shards(args.campuses, args.wards, args.rounds)
+    elif args.benchmark == "network":
+        bench_network(args.nodes, args.edges, args.updates)
+    elif args.benchmark == "routing":
+        bench_routing(args.nodes, args.edges, args.queries, args.landmarks)
+    elif args.benchmark == "snapshots":
+        bench_snapshots(args.patients, args.rooms, args.readers, args.seconds)
+    elif args.benchmark == "suite":
+        if bench_suite(args.sizes, args.rooms, args.events, args.lookups, args.seed, args.output, args.baseline,
+                       args.tolerance):
+            sys.exit(1)
+    elif args.benchmark == "bulk-admit":
+        bench_bulk_admit(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
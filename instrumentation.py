@@ -0,0 +1,173 @@
+"""Opt-in hot-path instrumentation for the hospital system.
+
+A Profiler holds a list of registered targets (a class plus a method or
+property name). enable() swaps each target for a wrapper that times the call
+into a latency histogram and, where a counter function is registered, adds
+to named counters such as rotations. disable() puts the original functions
+back, so the wrappers cost nothing once disabled. Both can be called at any
+time, e.g. from a running service.
+
+Counts that depend on what a loop does, such as key comparisons, are kept
+by the loop itself: it tallies them in a local variable and adds the total
+with count() on exit when the profiler's enabled flag is set. That costs a
+local increment per step while disabled, and counts exactly the comparisons
+that were made without walking the structure a second time.
+
+Latencies are kept in power-of-two nanosecond buckets, so recording is O(1)
+and percentiles are accurate to within a factor of two per bucket. report()
+renders a text table and to_json() the same numbers as plain values.
+
+This module knows nothing about the hospital classes; main.py registers
+the targets (see main.PROFILER).
+"""
+import json
+import time
+
+
+class LatencyHistogram:
+    """Call count, total and power-of-two nanosecond buckets for one target."""
+
+    __slots__ = ("count", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * 48  # bucket b holds durations in [2**(b-1), 2**b) ns
+
+    def record(self, elapsed_ns):
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[min(elapsed_ns.bit_length(), 47)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls, in ns."""
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return min(1 << bucket, self.max_ns)
+        return self.max_ns
+
+    def to_json(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.count / 1e3 if self.count else 0.0,
+            "p50_us": self.percentile(0.5) / 1e3,
+            "p99_us": self.percentile(0.99) / 1e3,
+            "max_us": self.max_ns / 1e3,
+            "buckets_ns": {str(1 << bucket): count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.targets = []      # (owner, name, label, timed, counter)
+        self.originals = {}    # (owner, name) -> original attribute
+        self.histograms = {}   # label -> LatencyHistogram
+        self.counters = {}     # counter name -> count
+        self.enabled = False
+
+    def register(self, owner, name, label=None, timed=True, counter=None):
+        """Instrument owner.name (a method or a property's setter) when enabled.
+
+        counter(self, *args, **kwargs) is called before the original and returns
+        a dict of counter increments, e.g. {"comparisons": 12}.
+        """
+        self.targets.append((owner, name, label or f"{owner.__name__}.{name}", timed, counter))
+        if self.enabled:
+            self._patch(*self.targets[-1])
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _wrap(self, function, label, timed, counter):
+        histogram = self.histograms.setdefault(label, LatencyHistogram())
+        counters = self.counters
+        clock = time.perf_counter_ns
+
+        def wrapper(*args, **kwargs):
+            if counter is not None:
+                for name, amount in counter(*args, **kwargs).items():
+                    counters[name] = counters.get(name, 0) + amount
+            if not timed:
+                return function(*args, **kwargs)
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.record(clock() - start)
+        wrapper.__wrapped__ = function
+        wrapper.__name__ = getattr(function, "__name__", label)
+        return wrapper
+
+    def _patch(self, owner, name, label, timed, counter):
+        original = owner.__dict__[name]
+        self.originals[owner, name] = original
+        if isinstance(original, property):
+            patched = property(original.fget, self._wrap(original.fset, label, timed, counter), original.fdel,
+                               original.__doc__)
+        else:
+            patched = self._wrap(original, label, timed, counter)
+        setattr(owner, name, patched)
+
+    def enable(self):
+        if not self.enabled:
+            for target in self.targets:
+                self._patch(*target)
+            self.enabled = True
+
+    def disable(self):
+        if self.enabled:
+            for (owner, name), original in self.originals.items():
+                setattr(owner, name, original)
+            self.originals.clear()
+            self.enabled = False
+
+    def reset(self):
+        # Wrappers keep references to their histogram and the counters dict, so clear in place.
+        for histogram in self.histograms.values():
+            histogram.__init__()
+        self.counters.clear()
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def to_json(self):
+        return {
+            "enabled": self.enabled,
+            "timings": {label: histogram.to_json()
+                        for label, histogram in sorted(self.histograms.items()) if histogram.count},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def dumps(self):
+        return json.dumps(self.to_json(), indent=2)
+
+    def report(self):
+        """Text table of every target that was called, slowest total first."""
+        lines = [f"{'target':<40}{'calls':>10}{'total ms':>11}{'mean us':>10}{'p50 us':>10}"
+                 f"{'p99 us':>10}{'max us':>10}"]
+        histograms = sorted(((label, histogram) for label, histogram in self.histograms.items() if histogram.count),
+                            key=lambda item: -item[1].total_ns)
+        for label, histogram in histograms:
+            data = histogram.to_json()
+            lines.append(f"{label:<40}{data['count']:>10}{data['total_ms']:>11.2f}{data['mean_us']:>10.2f}"
+                         f"{data['p50_us']:>10.2f}{data['p99_us']:>10.2f}{data['max_us']:>10.2f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<40}{value:>10}")
+        return "\n".join(lines)
+
+
+def rotation(*args, **kwargs):
+    return {"avl.rotations": 1}
@@ -1,7 +1,30 @@
+import abc
+import argparse
+import bisect
+import csv
+import json
+import sys
 import time
 import heapq
+import itertools
+from collections import Counter, OrderedDict, deque, namedtuple
+
+from instrumentation import Profiler, rotation
+from metrics import HospitalMetrics
+
+try:
+    import numpy as np
+except ImportError:  # optional; needed for PatientTable and vectorized assignment costs
+    np = None
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # optional; assign_batch falls back to a pure-Python solver
+    linear_sum_assignment = None
 
 class Patient:
+    __slots__ = ("patient_id", "name", "age", "gender", "severity", "arrival_time",
+                 "disease", "history", "treatments", "room_id")
+
     def __init__(self, patient_id, name, age, gender, severity, arrival_time, disease=None):
         self.patient_id = patient_id
         self.name = name
@@ -29,56 +52,184 @@ class Patient:
         self.treatments.append(treatment)
         
 class MinHeapPriorityQueue:
+    """Indexed binary min-heap of patients.
+
+    Each heap entry is a list [severity, age, arrival_time, seq, patient, index].
+    Heap order is decided by C-level comparison of the leading key fields instead
+    of Patient.__lt__; seq is unique, so comparisons never reach the patient.
+    The entry's last slot tracks its current heap index, which lets
+    remove_patient and update_priority find a patient without scanning.
+    """
+
     def __init__(self):
         self.heap = []
+        self.entries = {}  # patient_id -> heap entry
+        self.severity_counts = Counter()  # severity -> queued patients
+        self._seq = itertools.count()
 
-    def add_patient(self, patient):
-        self.heap.append(patient)
-        self._up_heap(len(self.heap) - 1)
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, patient_id):
+        return patient_id in self.entries
 
-    def _up_heap(self, index):
-        while index > 0:
+    def add_patient(self, patient):
+        if patient.patient_id in self.entries:
+            raise ValueError(f"Patient {patient.patient_id} is already in the priority queue")
+        entry = [patient.severity, patient.age, patient.arrival_time, next(self._seq), patient, len(self.heap)]
+        self.entries[patient.patient_id] = entry
+        self.severity_counts[patient.severity] += 1
+        self.heap.append(entry)
+        self._up_heap(entry[5])
+
+    def add_patients(self, patients):
+        """Add many patients at once with a single O(n) heapify."""
+        entries = self.entries
+        heap = self.heap
+        for patient in patients:
+            if patient.patient_id in entries:
+                raise ValueError(f"Patient {patient.patient_id} is already in the priority queue")
+            entry = [patient.severity, patient.age, patient.arrival_time, next(self._seq), patient, 0]
+            entries[patient.patient_id] = entry
+            self.severity_counts[patient.severity] += 1
+            heap.append(entry)
+        heapq.heapify(heap)
+        for index, entry in enumerate(heap):
+            entry[5] = index
+
+    def _up_heap(self, index, stop=0):
+        heap = self.heap
+        entry = heap[index]
+        comparisons = 0
+        while index > stop:
+            comparisons += 1
             parent_index = (index - 1) // 2
-            if self.heap[index] < self.heap[parent_index]:
-                self.heap[index], self.heap[parent_index] = self.heap[parent_index], self.heap[index]
+            parent = heap[parent_index]
+            if entry < parent:
+                heap[index] = parent
+                parent[5] = index
                 index = parent_index
             else:
                 break
+        heap[index] = entry
+        entry[5] = index
+        if PROFILER.enabled:
+            PROFILER.count("heap.comparisons", comparisons)
 
     def get_next_patient(self):
         if not self.heap:
             return None
-        return self.heap[0]
+        return self.heap[0][4]
+
+    def pop_patient(self):
+        """Remove and return the highest-priority patient."""
+        heap = self.heap
+        if not heap:
+            return None
+        top = heap[0]
+        last_entry = heap.pop()
+        if heap:
+            heap[0] = last_entry
+            self._down_heap(0)
+        del self.entries[top[4].patient_id]
+        self.severity_counts[top[0]] -= 1
+        return top[4]
 
     def _down_heap(self, index):
-        while True:
-            left_child = 2 * index + 1
-            right_child = 2 * index + 2
-            smallest = index
-
-            if left_child < len(self.heap) and self.heap[left_child] < self.heap[smallest]:
-                smallest = left_child
-            if right_child < len(self.heap) and self.heap[right_child] < self.heap[smallest]:
-                smallest = right_child
-
-            if smallest != index:
-                self.heap[index], self.heap[smallest] = self.heap[smallest], self.heap[index]
-                index = smallest
-            else:
-                break
+        # Bottom-up sift (as in heapq): walk the hole down to a leaf along the smaller
+        # children, then bubble the displaced entry back up. Entries moved from the
+        # end of the heap usually belong near the bottom, so this saves comparisons.
+        heap = self.heap
+        size = len(heap)
+        start = index
+        entry = heap[index]
+        comparisons = 0
+        child = 2 * index + 1
+        while child < size:
+            right_child = child + 1
+            if right_child < size:
+                comparisons += 1
+                if not heap[child] < heap[right_child]:
+                    child = right_child
+            child_entry = heap[child]
+            heap[index] = child_entry
+            child_entry[5] = index
+            index = child
+            child = 2 * index + 1
+        heap[index] = entry
+        entry[5] = index
+        if PROFILER.enabled:
+            PROFILER.count("heap.comparisons", comparisons)
+        if index > start:
+            self._up_heap(index, start)
+
+    def _sift(self, index):
+        if index > 0:
+            if PROFILER.enabled:
+                PROFILER.count("heap.comparisons")
+            if self.heap[index] < self.heap[(index - 1) // 2]:
+                self._up_heap(index)
+                return
+        self._down_heap(index)
 
     def remove_patient(self, patient_id):
-        for index, patient in enumerate(self.heap):
-            if patient.patient_id == patient_id:
-                last_patient = self.heap.pop()
-                if index < len(self.heap):
-                    self.heap[index] = last_patient
-                    if index > 0 and self.heap[index] < self.heap[(index - 1) // 2]:
-                        self._up_heap(index)
-                    else:
-                        self._down_heap(index)
-                return True
-        return False
+        entry = self.entries.pop(patient_id, None)
+        if entry is None:
+            return False
+        self.severity_counts[entry[0]] -= 1
+        index = entry[5]
+        last_entry = self.heap.pop()
+        if index < len(self.heap):
+            self.heap[index] = last_entry
+            last_entry[5] = index
+            self._sift(index)
+        return True
+
+    def update_priority(self, patient_id, severity=None, age=None):
+        """Change a queued patient's severity and/or age and restore heap order in O(log n).
+
+        This re-keys this queue only, though it sets the fields on the shared
+        Patient; EnhancedHospitalSystem.update_priority re-keys both queues.
+        """
+        entry = self.entries.get(patient_id)
+        if entry is None:
+            return False
+        patient = entry[4]
+        if severity is not None:
+            self.severity_counts[entry[0]] -= 1
+            self.severity_counts[severity] += 1
+            patient.severity = entry[0] = severity
+        if age is not None:
+            patient.age = entry[1] = age
+        self._sift(entry[5])
+        return True
+
+    def ordered_patients(self):
+        return [entry[4] for entry in sorted(self.heap)]
+
+    def iter_priority_order(self):
+        """Yield queued patients in priority order without sorting the heap.
+
+        A small frontier heap starts at the root and takes in an entry's two
+        children once the entry is yielded, so the first k patients cost
+        O(k log k) however long the queue is. Don't change the queue while
+        iterating.
+        """
+        heap = self.heap
+        size = len(heap)
+        frontier = heap[:1]
+        while frontier:
+            entry = heapq.heappop(frontier)
+            yield entry[4]
+            child = 2 * entry[5] + 1
+            if child < size:
+                heapq.heappush(frontier, heap[child])
+                if child + 1 < size:
+                    heapq.heappush(frontier, heap[child + 1])
+
+    def top_k(self, k):
+        """The k highest-priority patients, best first, in O(k log k)."""
+        return list(itertools.islice(self.iter_priority_order(), k))
 
     def display_patients(self):
         if not self.heap:
@@ -86,7 +237,7 @@ class MinHeapPriorityQueue:
             return
         print("\nPatients in Priority Queue (ordered by priority):")
         print("-" * 50)
-        for patient in sorted(self.heap):
+        for patient in self.iter_priority_order():
             print(f"ID: {patient.patient_id}")
             print(f"Name: {patient.name}")
             print(f"Age: {patient.age}")
@@ -97,35 +248,244 @@ class MinHeapPriorityQueue:
             print("-" * 30)
 
 
+class PatientTable:
+    """Column store of admitted patients for vectorized census queries.
+
+    Mirrors the numeric fields of every admitted patient in one NumPy array
+    per column, one row per patient, so counts, means and histograms over
+    thousands of patients run as array operations without touching Patient
+    objects. Gender, disease and room are stored as codes into interned
+    string tables; a room code of -1 means the patient is still waiting for a
+    room. add reuses the rows of discharged patients; add_many appends.
+    Adding, moving or removing a patient costs O(1) amortized.
+    """
+
+    COLUMNS = {"patient_id": "i8", "age": "i2", "severity": "i1", "gender": "i2",
+               "arrival_time": "f8", "disease": "i4", "room": "i4", "live": "?"}
+    INTERNED = ("gender", "disease", "room")
+
+    def __init__(self, capacity=1024):
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in self.COLUMNS.items()}
+        self.row_of = {}   # patient_id -> row
+        self.free_rows = []
+        self.used = 0      # rows ever handed out; rows from used on are unused
+        self.codes = {name: {} for name in self.INTERNED}   # value -> code
+        self.values = {name: [] for name in self.INTERNED}  # code -> value
+
+    def __len__(self):
+        return len(self.row_of)
+
+    def _code(self, column, value):
+        if value is None:
+            return -1
+        codes = self.codes[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.values[column].append(value)
+        return code
+
+    def _row_values(self, patient):
+        return {"patient_id": patient.patient_id, "age": patient.age, "severity": patient.severity,
+                "gender": self._code("gender", patient.gender), "arrival_time": patient.arrival_time,
+                "disease": self._code("disease", patient.disease), "room": self._code("room", patient.room_id),
+                "live": True}
+
+    def _grow(self, needed):
+        capacity = len(self.columns["live"])
+        if needed > capacity:
+            capacity = max(needed, capacity * 2)
+            for name, column in self.columns.items():
+                grown = np.zeros(capacity, column.dtype)
+                grown[:self.used] = column[:self.used]
+                self.columns[name] = grown
+
+    def add(self, patient):
+        if patient.patient_id in self.row_of:
+            raise ValueError(f"Patient {patient.patient_id} is already in the table")
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            self._grow(self.used + 1)
+            row = self.used
+            self.used += 1
+        for name, value in self._row_values(patient).items():
+            self.columns[name][row] = value
+        self.row_of[patient.patient_id] = row
+
+    def add_many(self, patients):
+        """Append many patients, filling each column with one array assignment."""
+        patients = list(patients)
+        for patient in patients:
+            if patient.patient_id in self.row_of:
+                raise ValueError(f"Patient {patient.patient_id} is already in the table")
+        start, stop = self.used, self.used + len(patients)
+        self._grow(stop)
+        columns = self.columns
+        columns["patient_id"][start:stop] = [patient.patient_id for patient in patients]
+        columns["age"][start:stop] = [patient.age for patient in patients]
+        columns["severity"][start:stop] = [patient.severity for patient in patients]
+        columns["arrival_time"][start:stop] = [patient.arrival_time for patient in patients]
+        for name, attribute in (("gender", "gender"), ("disease", "disease"), ("room", "room_id")):
+            columns[name][start:stop] = [self._code(name, getattr(patient, attribute)) for patient in patients]
+        columns["live"][start:stop] = True
+        self.row_of.update((patient.patient_id, start + offset) for offset, patient in enumerate(patients))
+        self.used = stop
+
+    def remove(self, patient_id):
+        row = self.row_of.pop(patient_id, None)
+        if row is not None:
+            self.columns["live"][row] = False
+            self.free_rows.append(row)
+
+    def set_room(self, patient_id, room_id):
+        self.columns["room"][self.row_of[patient_id]] = self._code("room", room_id)
+
+    def set_priority(self, patient_id, severity, age):
+        row = self.row_of[patient_id]
+        self.columns["severity"][row] = severity
+        self.columns["age"][row] = age
+
+    def _mask(self, waiting_only):
+        mask = self.columns["live"][:self.used]
+        if waiting_only:
+            mask = mask & (self.columns["room"][:self.used] < 0)
+        return mask
+
+    def severity_counts(self, waiting_only=False):
+        """{severity: patients}, for all admitted patients or only those waiting for a room."""
+        counts = np.bincount(self.columns["severity"][:self.used], weights=self._mask(waiting_only), minlength=4)
+        return {severity: int(count) for severity, count in enumerate(counts) if count}
+
+    def mean_wait(self, now=None, waiting_only=True):
+        """Mean seconds since arrival, or None if there is nobody to average."""
+        mask = self._mask(waiting_only)
+        count = np.count_nonzero(mask)
+        if not count:
+            return None
+        total_arrival = np.dot(self.columns["arrival_time"][:self.used], mask)
+        return float((time.time() if now is None else now) - total_arrival / count)
+
+    def age_histogram(self, bins=(0, 18, 40, 65, 80, 200), waiting_only=True):
+        """Patient counts per age bin [edge, next edge) as (bin edges, counts)."""
+        bins = list(bins)
+        bin_of = np.searchsorted(bins, self.columns["age"][:self.used], side="right") - 1
+        in_range = (bin_of >= 0) & (bin_of < len(bins) - 1)
+        counts = np.bincount(np.clip(bin_of, 0, len(bins) - 1), weights=self._mask(waiting_only) & in_range,
+                             minlength=len(bins))
+        return bins, counts[:len(bins) - 1].astype(int).tolist()
+
+    def counts_by(self, column, waiting_only=False):
+        """{value: patients} for an interned column: "gender", "disease" or "room"."""
+        codes = self.columns[column][:self.used][self._mask(waiting_only)]
+        values = self.values[column]
+        counts = np.bincount(codes[codes >= 0], minlength=len(values))
+        result = {values[code]: int(count) for code, count in enumerate(counts) if count}
+        missing = int((codes < 0).sum())
+        if missing:
+            result[None] = missing
+        return result
+
 class Room:
     def __init__(self, room_id, is_vacant=True, room_type="General"):
         self.room_id = room_id
-        self.is_vacant = is_vacant
+        self._is_vacant = is_vacant
         self.room_type = room_type
         self.condition = "Clean"
+        self.vacancy_listener = None  # called as listener(room_id, is_vacant) on change
+
+    @property
+    def is_vacant(self):
+        return self._is_vacant
+
+    @is_vacant.setter
+    def is_vacant(self, value):
+        changed = value != self._is_vacant
+        self._is_vacant = value
+        if changed and self.vacancy_listener:
+            self.vacancy_listener(self.room_id, value)
 
     def __str__(self):
         return f"{self.room_id} - {self.room_type} (Vacant: {self.is_vacant}, Condition: {self.condition})"
 
 class Graph:
+    """Undirected weighted graph kept as node -> {neighbor: weight}.
+
+    A pair of nodes has at most one edge: adding an edge that already exists
+    sets its weight. edge_listeners are called as listener(from_node,
+    to_node, weight) after an edge is added or gets shorter, and
+    edge_removed_listeners as listener(from_node, to_node, old_weight) after
+    one is removed or gets longer. node_listeners are called as
+    listener(node) after add_node adds a node with no edges yet.
+    """
+
     def __init__(self):
         self.adjacency_list = {}
+        self.edge_count = 0
+        self.edge_listeners = []
+        self.edge_removed_listeners = []
+        self.node_listeners = []
+
+    def __len__(self):
+        return len(self.adjacency_list)
+
+    def add_node(self, node):
+        if node not in self.adjacency_list:
+            self.adjacency_list[node] = {}
+            for listener in self.node_listeners:
+                listener(node)
 
     def add_edge(self, from_node, to_node, weight):
-        if from_node not in self.adjacency_list:
-            self.adjacency_list[from_node] = []
-        if to_node not in self.adjacency_list:
-            self.adjacency_list[to_node] = []
-        self.adjacency_list[from_node].append((to_node, weight))
-        self.adjacency_list[to_node].append((from_node, weight))
+        adjacency = self.adjacency_list
+        if from_node not in adjacency:
+            adjacency[from_node] = {}
+        if to_node not in adjacency:
+            adjacency[to_node] = {}
+        old_weight = adjacency[from_node].get(to_node)
+        if old_weight == weight:
+            return
+        adjacency[from_node][to_node] = weight
+        adjacency[to_node][from_node] = weight
+        if old_weight is None:
+            self.edge_count += 1
+        if old_weight is None or weight < old_weight:
+            for listener in self.edge_listeners:
+                listener(from_node, to_node, weight)
+        else:
+            for listener in self.edge_removed_listeners:
+                listener(from_node, to_node, old_weight)
+
+    def remove_edge(self, from_node, to_node):
+        """Remove the edge between two nodes; returns False if there is none."""
+        old_weight = self.adjacency_list.get(from_node, {}).pop(to_node, None)
+        if old_weight is None:
+            return False
+        del self.adjacency_list[to_node][from_node]
+        self.edge_count -= 1
+        for listener in self.edge_removed_listeners:
+            listener(from_node, to_node, old_weight)
+        return True
+
+    def weight(self, from_node, to_node):
+        return self.adjacency_list.get(from_node, {}).get(to_node)
 
     def get_neighbors(self, node):
-        return self.adjacency_list.get(node, [])
+        neighbors = self.adjacency_list.get(node)
+        return neighbors.items() if neighbors is not None else ()
+
+    def edges(self):
+        """Yield every edge once as (from_node, to_node, weight)."""
+        seen = set()
+        for node, neighbors in self.adjacency_list.items():
+            seen.add(node)
+            for neighbor, weight in neighbors.items():
+                if neighbor not in seen:
+                    yield node, neighbor, weight
 
     def prim_mst(self, start_node):
         mst = []
         visited = set([start_node])
-        edges = [(weight, start_node, to) for to, weight in self.adjacency_list[start_node]]
+        edges = [(weight, start_node, to) for to, weight in self.adjacency_list[start_node].items()]
         heapq.heapify(edges)
 
         while edges:
@@ -133,12 +493,528 @@ class Graph:
             if to not in visited:
                 visited.add(to)
                 mst.append((frm, to, weight))
-                for next_to, next_weight in self.adjacency_list[to]:
+                for next_to, next_weight in self.adjacency_list[to].items():
                     if next_to not in visited:
                         heapq.heappush(edges, (next_weight, to, next_to))
         return mst
-    
+
+    def kruskal_mst(self):
+        """Minimum spanning forest of the whole graph as (from_node, to_node, weight) edges.
+
+        Sorts the edges once and joins components with a union-find, so it
+        costs O(E log E) and, unlike prim_mst, covers every component.
+        """
+        components = UnionFind()
+        return [(from_node, to_node, weight)
+                for weight, from_node, to_node in sorted((weight, from_node, to_node)
+                                                         for from_node, to_node, weight in self.edges())
+                if components.union(from_node, to_node)]
+
+    def to_csr(self):
+        """Compact array copy of the graph (needs NumPy), see CSRGraph."""
+        return CSRGraph.from_graph(self)
+
+class UnionFind:
+    """Disjoint sets over hashable items with path halving and union by size."""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        parent = self.parent
+        if item not in parent:
+            parent[item] = item
+            self.size[item] = 1
+            return item
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first, second):
+        """Join the sets of first and second; False if they were already one set."""
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+        return True
+
+class CSRGraph:
+    """Read-only compressed sparse row copy of a Graph for whole-graph analysis.
+
+    Node i's neighbors are indices[indptr[i]:indptr[i + 1]] with the matching
+    weights, all in flat NumPy arrays: about 12 bytes per edge direction
+    instead of a dict entry per direction, and the edge list for Kruskal is
+    sorted in C. nodes maps a node index back to the Graph's node.
+    """
+
+    def __init__(self, nodes, indptr, indices, weights):
+        self.nodes = nodes
+        self.node_index = {node: index for index, node in enumerate(nodes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+    @classmethod
+    def from_graph(cls, graph):
+        if np is None:
+            raise RuntimeError("CSRGraph needs NumPy")
+        nodes = list(graph.adjacency_list)
+        node_index = {node: index for index, node in enumerate(nodes)}
+        degrees = np.fromiter((len(neighbors) for neighbors in graph.adjacency_list.values()), np.int64, len(nodes))
+        indptr = np.zeros(len(nodes) + 1, np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        indices = np.fromiter((node_index[neighbor] for neighbors in graph.adjacency_list.values()
+                               for neighbor in neighbors), np.int32, int(indptr[-1]))
+        # Let NumPy pick the dtype, so integer corridor lengths stay integers.
+        weights = np.array([weight for neighbors in graph.adjacency_list.values() for weight in neighbors.values()])
+        return cls(nodes, indptr, indices, weights)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def edge_count(self):
+        return len(self.indices) // 2
+
+    def get_neighbors(self, node):
+        index = self.node_index[node]
+        start, stop = self.indptr[index], self.indptr[index + 1]
+        nodes = self.nodes
+        return [(nodes[neighbor], weight)
+                for neighbor, weight in zip(self.indices[start:stop].tolist(), self.weights[start:stop].tolist())]
+
+    def kruskal_mst(self):
+        """Minimum spanning forest as (from_node, to_node, weight) edges, sorted by weight in NumPy."""
+        sources = np.repeat(np.arange(len(self.nodes), dtype=np.int32), np.diff(self.indptr))
+        once = sources < self.indices  # each undirected edge appears in both rows; keep one
+        sources, targets, weights = sources[once], self.indices[once], self.weights[once]
+        order = np.argsort(weights, kind="stable")
+        parent = list(range(len(self.nodes)))
+        nodes = self.nodes
+        mst = []
+        for source, target, weight in zip(sources[order].tolist(), targets[order].tolist(), weights[order].tolist()):
+            source_root, target_root = source, target
+            while parent[source_root] != source_root:  # path halving
+                parent[source_root] = source_root = parent[parent[source_root]]
+            while parent[target_root] != target_root:
+                parent[target_root] = target_root = parent[parent[target_root]]
+            if source_root != target_root:
+                parent[target_root] = source_root
+                mst.append((nodes[source], nodes[target], weight))
+                if len(mst) == len(nodes) - 1:
+                    break
+        return mst
+
+class DynamicMST:
+    """Minimum spanning forest of a Graph, kept up to date as its edges change.
+
+    Built once with Kruskal, then maintained from the graph's edge listeners
+    without recomputing the forest:
+
+    - A new or shorter edge between two trees links them. Inside one tree it
+      replaces the heaviest edge on the tree path between its ends, if that
+      edge is heavier: O(depth of the two ends).
+    - A removed or longer forest edge cuts its tree in two, and the lightest
+      edge across the cut reconnects it. The cut is searched from the smaller
+      side only: O(nodes and edges of the smaller side).
+    - Anything else (a non-tree edge removed or made longer, a tree edge
+      made shorter) changes no more than a weight.
+
+    Each tree keeps parent pointers to an arbitrary root; linking two trees
+    reroots one side by reversing the path from the new edge to its root.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.parent = {}  # node -> parent in its tree, None at a root
+        self.tree = {}    # node -> {neighbor: weight} over forest edges
+        self.total_weight = 0
+        self.edge_count = 0
+        for node in graph.adjacency_list:
+            self.parent[node] = None
+            self.tree[node] = {}
+        forest = graph.to_csr().kruskal_mst() if np is not None else graph.kruskal_mst()
+        for from_node, to_node, weight in forest:
+            self.tree[from_node][to_node] = self.tree[to_node][from_node] = weight
+            self.total_weight += weight
+            self.edge_count += 1
+        seen = set()
+        for root in self.tree:
+            if root in seen:
+                continue
+            seen.add(root)
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                for child in self.tree[node]:
+                    if child not in seen:
+                        seen.add(child)
+                        self.parent[child] = node
+                        stack.append(child)
+        graph.edge_listeners.append(self.edge_shortened)
+        graph.edge_removed_listeners.append(self.edge_lengthened)
+
+    def detach(self):
+        self.graph.edge_listeners.remove(self.edge_shortened)
+        self.graph.edge_removed_listeners.remove(self.edge_lengthened)
+
+    def _add_node(self, node):
+        if node not in self.parent:
+            self.parent[node] = None
+            self.tree[node] = {}
+
+    def _heaviest_on_path(self, from_node, to_node):
+        """(weight, child, parent) of the heaviest forest edge between two nodes, or None in different trees."""
+        parent, tree = self.parent, self.tree
+        ancestors = set()
+        node = from_node
+        while node is not None:
+            ancestors.add(node)
+            node = parent[node]
+        meet = to_node
+        while meet not in ancestors:
+            meet = parent[meet]
+            if meet is None:
+                return None
+        heaviest = None
+        for node in (from_node, to_node):
+            while node != meet:
+                up = parent[node]
+                if heaviest is None or tree[node][up] > heaviest[0]:
+                    heaviest = (tree[node][up], node, up)
+                node = up
+        return heaviest
+
+    def _reroot(self, node):
+        parent = self.parent
+        previous = None
+        while node is not None:
+            parent[node], previous, node = previous, node, parent[node]
+
+    def _link(self, from_node, to_node, weight):
+        self._reroot(from_node)
+        self.parent[from_node] = to_node
+        self.tree[from_node][to_node] = self.tree[to_node][from_node] = weight
+        self.total_weight += weight
+        self.edge_count += 1
+
+    def _cut(self, from_node, to_node):
+        weight = self.tree[from_node].pop(to_node)
+        del self.tree[to_node][from_node]
+        if self.parent[from_node] == to_node:
+            self.parent[from_node] = None
+        else:
+            self.parent[to_node] = None
+        self.total_weight -= weight
+        self.edge_count -= 1
+
+    def _smaller_side(self, first, second):
+        # Walk both trees a node at a time so the work is bounded by the smaller one.
+        tree = self.tree
+        sides = [({first}, [first]), ({second}, [second])]
+        while True:
+            for seen, stack in sides:
+                if not stack:
+                    return seen
+                node = stack.pop()
+                for neighbor in tree[node]:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        stack.append(neighbor)
+
+    def edge_shortened(self, from_node, to_node, weight):
+        """Graph listener: an edge was added or got shorter."""
+        if from_node == to_node:
+            return
+        self._add_node(from_node)
+        self._add_node(to_node)
+        old_weight = self.tree[from_node].get(to_node)
+        if old_weight is not None:
+            self.tree[from_node][to_node] = self.tree[to_node][from_node] = weight
+            self.total_weight += weight - old_weight
+            return
+        heaviest = self._heaviest_on_path(from_node, to_node)
+        if heaviest is None:
+            self._link(from_node, to_node, weight)
+        elif weight < heaviest[0]:
+            self._cut(heaviest[1], heaviest[2])
+            self._link(from_node, to_node, weight)
+
+    def edge_lengthened(self, from_node, to_node, old_weight):
+        """Graph listener: an edge was removed or got longer."""
+        if to_node not in self.tree.get(from_node, ()):
+            return
+        self._cut(from_node, to_node)
+        side = self._smaller_side(from_node, to_node)
+        best = None
+        for node in side:
+            for neighbor, weight in self.graph.get_neighbors(node):
+                if neighbor not in side and (best is None or weight < best[0]):
+                    best = (weight, node, neighbor)
+        if best is not None:
+            self._link(best[1], best[2], best[0])
+
+    def edges(self, root=None):
+        """Yield forest edges as (from_node, to_node, weight), breadth first from root (every tree if None)."""
+        tree = self.tree
+        if root is None:
+            roots = [node for node, parent in self.parent.items() if parent is None]
+        else:
+            roots = [root] if root in tree else []
+        for start in roots:
+            seen = {start}
+            queue = deque([start])
+            while queue:
+                node = queue.popleft()
+                for neighbor, weight in tree[node].items():
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        queue.append(neighbor)
+                        yield node, neighbor, weight
+
+Route = namedtuple("Route", "distance path")
+
+class Router:
+    """Shortest paths with full routes over a Graph, from any source.
+
+    - route(source, target) answers from a cached shortest-path tree when
+      either end has one, in O(path length). A source asked about
+      `hot_after` times gets its full tree built and cached (least recently
+      used trees are dropped past `cache_size`), so repeated queries from
+      busy places such as Reception become lookups. Otherwise it runs a
+      bidirectional Dijkstra. method="astar" runs A* with landmark lower
+      bounds (ALT) instead: the landmarks are chosen farthest-first and their
+      distances computed on first use. ALT pays off on long, road-like
+      corridor networks but not on compact, well-connected ones, where the
+      bidirectional search already settles few nodes.
+    - nearest(target, sources) answers a multi-source query, e.g. the
+      nearest room holding an available clinician. Corridors are two-way,
+      so it runs one Dijkstra out from target that stops at the first source
+      it settles.
+
+    Any change to the graph drops the cached trees and landmarks.
+    """
+
+    def __init__(self, graph, landmarks=8, cache_size=64, hot_after=3):
+        self.graph = graph
+        self.landmark_count = landmarks
+        self.cache_size = cache_size
+        self.hot_after = hot_after
+        self.trees = OrderedDict()  # source -> (distances, predecessors), least recently used first
+        self.source_hits = Counter()
+        self.landmark_distances = None  # node -> tuple of distances from each landmark, -1 if unreachable
+        graph.edge_listeners.append(self._graph_changed)
+        graph.edge_removed_listeners.append(self._graph_changed)
+        graph.node_listeners.append(self._graph_changed)
+
+    def detach(self):
+        self.graph.edge_listeners.remove(self._graph_changed)
+        self.graph.edge_removed_listeners.remove(self._graph_changed)
+        self.graph.node_listeners.remove(self._graph_changed)
+
+    def _graph_changed(self, *change):
+        self.trees.clear()
+        self.source_hits.clear()
+        self.landmark_distances = None
+
+    def _dijkstra(self, sources, targets=()):
+        """Distances and predecessors from every node in sources (at distance 0).
+
+        Stops as soon as it settles a node in targets and returns that node
+        too (None if the search ran out first).
+        """
+        neighbors_of = self.graph.adjacency_list
+        distances = dict.fromkeys(sources, 0)
+        predecessors = dict.fromkeys(sources)
+        heap = [(0, source) for source in distances]
+        settled = set()
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            if node in targets:
+                return distances, predecessors, node
+            for neighbor, weight in neighbors_of[node].items():
+                candidate = distance + weight
+                if candidate < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = candidate
+                    predecessors[neighbor] = node
+                    heapq.heappush(heap, (candidate, neighbor))
+        return distances, predecessors, None
+
+    @staticmethod
+    def _path(predecessors, node):
+        path = []
+        while node is not None:
+            path.append(node)
+            node = predecessors[node]
+        path.reverse()
+        return path
+
+    def tree(self, source):
+        """Cached (distances, predecessors) of the full shortest-path tree from source."""
+        tree = self.trees.get(source)
+        if tree is None:
+            tree = self.trees[source] = self._dijkstra([source])[:2]
+            if len(self.trees) > self.cache_size:
+                self.trees.popitem(last=False)
+        else:
+            self.trees.move_to_end(source)
+        return tree
+
+    def route(self, source, target, method="auto"):
+        """Shortest Route(distance, path) from source to target, or None if target can't be reached.
+
+        method is "auto" (cached trees, then bidirectional Dijkstra), "astar", "bidirectional" or "dijkstra".
+        """
+        neighbors_of = self.graph.adjacency_list
+        if source not in neighbors_of or target not in neighbors_of:
+            raise ValueError(f"Unknown node {source if source not in neighbors_of else target!r}")
+        if method == "auto":
+            for start, end in ((source, target), (target, source)):
+                if start in self.trees:
+                    distances, predecessors = self.tree(start)
+                    if end not in distances:
+                        return None
+                    path = self._path(predecessors, end)
+                    return Route(distances[end], path[::-1] if start == target else path)
+            self.source_hits[source] += 1
+            if self.source_hits[source] >= self.hot_after:
+                self.tree(source)
+                return self.route(source, target)
+            method = "bidirectional"
+        if method == "astar":
+            return self._astar(source, target)
+        if method == "bidirectional":
+            return self._bidirectional(source, target)
+        if method == "dijkstra":
+            distances, predecessors, reached = self._dijkstra([source], {target})
+            return Route(distances[target], self._path(predecessors, target)) if reached is not None else None
+        raise ValueError(f"Unknown routing method {method!r}")
+
+    def nearest(self, target, sources):
+        """(source, Route from it to target) for the source nearest to target, or None if none can reach it."""
+        sources = set(sources)
+        if not sources:
+            return None
+        if target in self.trees:
+            distances, predecessors = self.tree(target)
+            reachable = [source for source in sources if source in distances]
+            if not reachable:
+                return None
+            source = min(reachable, key=distances.__getitem__)
+            return source, Route(distances[source], self._path(predecessors, source)[::-1])
+        if target not in self.graph.adjacency_list:
+            raise ValueError(f"Unknown node {target!r}")
+        # Corridors are two-way, so search out from target and stop at the first source reached.
+        distances, predecessors, source = self._dijkstra([target], sources)
+        if source is None:
+            return None
+        return source, Route(distances[source], self._path(predecessors, source)[::-1])
+
+    def _build_landmarks(self):
+        # Farthest-first: each new landmark is the node farthest from the ones already chosen.
+        nodes = list(self.graph.adjacency_list)
+        table = {node: [] for node in nodes}
+        nearest_landmark = dict.fromkeys(nodes, float('inf'))
+        landmark = nodes[0] if nodes else None
+        for _ in range(min(self.landmark_count, len(nodes))):
+            distances = self._dijkstra([landmark])[0]
+            for node in nodes:
+                distance = distances.get(node, -1)
+                table[node].append(distance)
+                if 0 <= distance < nearest_landmark[node]:
+                    nearest_landmark[node] = distance
+            # Prefer nodes this landmark can't reach, so other components get landmarks too.
+            landmark = max(nodes, key=lambda node: (nearest_landmark[node] == float('inf'), nearest_landmark[node]))
+        self.landmark_distances = {node: tuple(distances) for node, distances in table.items()}
+
+    def _astar(self, source, target):
+        if self.landmark_distances is None:
+            self._build_landmarks()
+        landmark_distances = self.landmark_distances
+        to_target = landmark_distances[target]
+        estimates = {}
+
+        def estimate(node):
+            # Triangle inequality: |d(L, target) - d(L, node)| <= d(node, target) for every landmark L.
+            bound = estimates.get(node)
+            if bound is None:
+                bound = 0
+                for landmark_to_target, landmark_to_node in zip(to_target, landmark_distances[node]):
+                    if landmark_to_target >= 0 and landmark_to_node >= 0:
+                        gap = abs(landmark_to_target - landmark_to_node)
+                        if gap > bound:
+                            bound = gap
+                    elif landmark_to_target >= 0 or landmark_to_node >= 0:
+                        bound = float('inf')  # different components
+                        break
+                estimates[node] = bound
+            return bound
+
+        neighbors_of = self.graph.adjacency_list
+        distances = {source: 0}
+        predecessors = {source: None}
+        heap = [(estimate(source), 0, source)]
+        settled = set()
+        while heap:
+            _, distance, node = heapq.heappop(heap)
+            if node == target:
+                return Route(distance, self._path(predecessors, target))
+            if node in settled:
+                continue
+            settled.add(node)
+            for neighbor, weight in neighbors_of[node].items():
+                candidate = distance + weight
+                if candidate < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = candidate
+                    predecessors[neighbor] = node
+                    bound = estimate(neighbor)
+                    if bound != float('inf'):
+                        heapq.heappush(heap, (candidate + bound, candidate, neighbor))
+        return None
+
+    def _bidirectional(self, source, target):
+        if source == target:
+            return Route(0, [source])
+        neighbors_of = self.graph.adjacency_list
+        distances = ({source: 0}, {target: 0})
+        predecessors = ({source: None}, {target: None})
+        heaps = ([(0, source)], [(0, target)])
+        settled = (set(), set())
+        best, meeting = float('inf'), None
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            distance, node = heapq.heappop(heaps[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+            mine, other = distances[side], distances[1 - side]
+            for neighbor, weight in neighbors_of[node].items():
+                candidate = distance + weight
+                if candidate < mine.get(neighbor, float('inf')):
+                    mine[neighbor] = candidate
+                    predecessors[side][neighbor] = node
+                    heapq.heappush(heaps[side], (candidate, neighbor))
+                if neighbor in other and mine[neighbor] + other[neighbor] < best:
+                    best, meeting = mine[neighbor] + other[neighbor], neighbor
+        if meeting is None:
+            return None
+        forward = self._path(predecessors[0], meeting)
+        backward = self._path(predecessors[1], meeting)
+        return Route(best, forward + backward[-2::-1])
+
 class Treatment:
+    __slots__ = ("treatment_id", "patient_id", "staff_id", "treatment_details", "date")
+
     def __init__(self, treatment_id, patient_id, staff_id, treatment_details, date):
         self.treatment_id = treatment_id
         self.patient_id = patient_id
@@ -147,6 +1023,8 @@ class Treatment:
         self.date = date
 
 class DLLNode:
+    __slots__ = ("data", "next", "prev")
+
     def __init__(self, data):
         self.data = data
         self.next = None
@@ -186,16 +1064,220 @@ class DoublyLinkedList:
             current = current.next
         return data_list
 
+    def __iter__(self):
+        current = self.head
+        while current:
+            yield current.data
+            current = current.next
+
+    def __reversed__(self):
+        current = self.tail
+        while current:
+            yield current.data
+            current = current.prev
+
+class TreatmentLog(DoublyLinkedList):
+    """Append-only treatment log with secondary indexes.
+
+    Records stay in the linked list in insertion order for streaming in either
+    direction. Per-patient and per-staff lists make lookups O(k) in the matching
+    records, and a date-sorted array answers date-range queries with bisect.
+    Dates are "YYYY-MM-DD" strings, which sort chronologically.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+        self.by_patient = {}  # patient_id -> [Treatment]
+        self.by_staff = {}    # staff_id -> [Treatment]
+        self.dates = []       # sorted dates, parallel to dated_records
+        self.dated_records = []
+
+    def __len__(self):
+        return self.count
+
+    def append(self, treatment):
+        super().append(treatment)
+        self.count += 1
+        self.by_patient.setdefault(treatment.patient_id, []).append(treatment)
+        self.by_staff.setdefault(treatment.staff_id, []).append(treatment)
+        # Records are logged as they happen, so this is nearly always a plain append.
+        if not self.dates or treatment.date >= self.dates[-1]:
+            self.dates.append(treatment.date)
+            self.dated_records.append(treatment)
+        else:
+            index = bisect.bisect_right(self.dates, treatment.date)
+            self.dates.insert(index, treatment.date)
+            self.dated_records.insert(index, treatment)
+
+    def extend(self, treatments):
+        """Append many treatments in one pass, e.g. when restoring a snapshot."""
+        by_patient = self.by_patient
+        by_staff = self.by_staff
+        tail = self.tail
+        in_order = True
+        last_date = self.dates[-1] if self.dates else None
+        added = []
+        for treatment in treatments:
+            node = DLLNode(treatment)
+            if tail:
+                tail.next = node
+                node.prev = tail
+            else:
+                self.head = node
+            tail = node
+            added.append(treatment)
+            patient_records = by_patient.get(treatment.patient_id)
+            if patient_records is None:
+                by_patient[treatment.patient_id] = [treatment]
+            else:
+                patient_records.append(treatment)
+            staff_records = by_staff.get(treatment.staff_id)
+            if staff_records is None:
+                by_staff[treatment.staff_id] = [treatment]
+            else:
+                staff_records.append(treatment)
+            if in_order and last_date is not None and treatment.date < last_date:
+                in_order = False
+            last_date = treatment.date
+        self.tail = tail
+        self.count += len(added)
+        if in_order:
+            self.dates.extend(treatment.date for treatment in added)
+            self.dated_records.extend(added)
+        else:
+            # sorted() is stable, so records with equal dates keep their log order.
+            merged = sorted(itertools.chain(self.dated_records, added), key=lambda treatment: treatment.date)
+            self.dated_records = merged
+            self.dates = [treatment.date for treatment in merged]
+
+    def records_for_patient(self, patient_id):
+        return list(self.by_patient.get(patient_id, ()))
+
+    def records_for_staff(self, staff_id):
+        return list(self.by_staff.get(staff_id, ()))
+
+    def records_between(self, start_date=None, end_date=None):
+        """Records dated start_date <= date <= end_date, oldest first; None leaves a side open."""
+        low, high = self._date_bounds(start_date, end_date)
+        return self.dated_records[low:high]
+
+    def _date_bounds(self, start_date, end_date):
+        low = 0 if start_date is None else bisect.bisect_left(self.dates, start_date)
+        high = len(self.dates) if end_date is None else bisect.bisect_right(self.dates, end_date)
+        return low, high
+
+    def iter_records(self, patient_id=None, staff_id=None, start_date=None, end_date=None):
+        """Yield the records matching every given filter without copying the log.
+
+        A patient or staff filter walks that patient's (or clinician's) own
+        records in log order; a date range alone walks the date-sorted array
+        between two bisects, oldest first; no filter streams the linked list.
+        """
+        if patient_id is not None or staff_id is not None:
+            if patient_id is not None:
+                records = self.by_patient.get(patient_id, ())
+            else:
+                records = self.by_staff.get(staff_id, ())
+            for treatment in records:
+                if ((staff_id is None or treatment.staff_id == staff_id)
+                        and (start_date is None or treatment.date >= start_date)
+                        and (end_date is None or treatment.date <= end_date)):
+                    yield treatment
+        elif start_date is not None or end_date is not None:
+            dated_records = self.dated_records
+            for index in range(*self._date_bounds(start_date, end_date)):
+                yield dated_records[index]
+        else:
+            yield from self
+
+class PatientIndex(abc.ABC):
+    """Interface for the patient_id -> Patient index used by EnhancedHospitalSystem.
+
+    Backends keep at most one patient per ID (insert raises ValueError on a
+    duplicate) and can list patients in ascending ID order through range_scan.
+    """
+
+    @abc.abstractmethod
+    def __len__(self):
+        ...
+
+    @abc.abstractmethod
+    def insert(self, patient):
+        ...
+
+    @abc.abstractmethod
+    def find_patient(self, patient_id):
+        ...
+
+    @abc.abstractmethod
+    def delete_patient(self, patient_id):
+        """Remove a patient by ID. Returns True if the patient was indexed."""
+
+    @abc.abstractmethod
+    def range_scan(self, low=None, high=None):
+        """Yield patients with low <= patient_id <= high in ascending ID order.
+
+        A bound of None leaves that side of the range open.
+        """
+
+    def bulk_insert(self, patients):
+        """Insert many patients, rebuilding the index from one sorted pass."""
+        self._load_sorted(self._merged_with(patients))
+
+    def _load_sorted(self, patients):
+        # Backends override this to rebuild from the merged, sorted patients in
+        # O(n); the fallback inserts the ones not indexed yet one at a time.
+        for patient in patients:
+            if self.find_patient(patient.patient_id) is None:
+                self.insert(patient)
+
+    def _merged_with(self, patients):
+        # Merge the index's own ordered patients with the sorted new batch. Sorting
+        # is linear when the new IDs already arrive in order, as they do on replay.
+        new_patients = sorted(patients, key=lambda patient: patient.patient_id)
+        merged = list(heapq.merge(self.range_scan(), new_patients,
+                                  key=lambda patient: patient.patient_id))
+        for previous, current in zip(merged, merged[1:]):
+            if previous.patient_id == current.patient_id:
+                raise ValueError(f"Duplicate patient ID {current.patient_id}")
+        return merged
+
+    def display_patients(self):
+        for patient in self.range_scan():
+            print(f"\nID: {patient.patient_id}")
+            print(f"Name: {patient.name}")
+            print(f"Age: {patient.age}")
+            print(f"Gender: {patient.gender}")
+            print(f"Severity: {patient.severity}")
+            print(f"Room: {patient.room_id}")
+            if patient.disease:
+                print(f" Disease: {patient.disease}")
+            print("-" * 30)
+
 class AVLNode:
+    __slots__ = ("patient", "left", "right", "height")
+
     def __init__(self, patient):
         self.patient = patient
         self.left = None
         self.right = None
         self.height = 1
 
-class AVLTree:
+class AVLTree(PatientIndex):
+    """AVL tree of patients keyed by patient_id.
+
+    Insert, find and delete walk the tree iteratively and keep the root-to-node
+    path on an explicit stack for rebalancing, so deep trees never hit Python's
+    recursion limit or pay per-level call overhead.
+    """
+
     def __init__(self):
         self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
 
     def height(self, node):
         if not node:
@@ -225,129 +1307,852 @@ class AVLTree:
         y.height = max(self.height(y.left), self.height(y.right)) + 1
         return y
 
+    def _rebalance(self, node):
+        node.height = max(self.height(node.left), self.height(node.right)) + 1
+        balance = self.height(node.left) - self.height(node.right)
+        if balance > 1:
+            if self.balance_factor(node.left) < 0:
+                node.left = self.left_rotate(node.left)
+            return self.right_rotate(node)
+        if balance < -1:
+            if self.balance_factor(node.right) > 0:
+                node.right = self.right_rotate(node.right)
+            return self.left_rotate(node)
+        return node
+
+    def _rebalance_path(self, path):
+        # Walk back up from the deepest changed node. Once a subtree keeps its old
+        # height, nothing above it can have changed, so the walk stops early.
+        checked = 0
+        for depth in range(len(path) - 1, -1, -1):
+            checked += 1
+            node = path[depth]
+            old_height = node.height
+            subtree = self._rebalance(node)
+            if depth:
+                parent = path[depth - 1]
+                if parent.left is node:
+                    parent.left = subtree
+                else:
+                    parent.right = subtree
+            else:
+                self.root = subtree
+            if subtree.height == old_height:
+                break
+        if PROFILER.enabled:
+            PROFILER.count("avl.rebalance_checks", checked)
+
     def insert(self, patient):
+        new_node = AVLNode(patient)
         if not self.root:
-            self.root = AVLNode(patient)
+            self.root = new_node
+            self.size = 1
             return
-        self.root = self._insert_recursive(self.root, patient)
-
-    def _insert_recursive(self, node, patient):
-        if not node:
-            return AVLNode(patient)
-
-        if patient.patient_id < node.patient.patient_id:
-            node.left = self._insert_recursive(node.left, patient)
+        patient_id = patient.patient_id
+        path = []
+        node = self.root
+        while node:
+            path.append(node)
+            node_id = node.patient.patient_id
+            if patient_id == node_id:
+                if PROFILER.enabled:
+                    PROFILER.count("avl.comparisons", len(path))
+                raise ValueError(f"Duplicate patient ID {patient_id}")
+            node = node.left if patient_id < node_id else node.right
+        if PROFILER.enabled:
+            # One per node on the path, plus the one that picks the new leaf's side.
+            PROFILER.count("avl.comparisons", len(path) + 1)
+
+        parent = path[-1]
+        if patient_id < parent.patient.patient_id:
+            parent.left = new_node
         else:
-            node.right = self._insert_recursive(node.right, patient)
-
+            parent.right = new_node
+        self.size += 1
+        self._rebalance_path(path)
+
+    def _load_sorted(self, patients):
+        # A perfectly balanced tree built from sorted patients needs no rotations.
+        self.root = self._build_balanced(patients, 0, len(patients) - 1)
+        self.size = len(patients)
+
+    def _build_balanced(self, patients, low, high):
+        # Recursion depth is only log2(n) here, since every split halves the range.
+        if low > high:
+            return None
+        mid = (low + high) // 2
+        node = AVLNode(patients[mid])
+        node.left = self._build_balanced(patients, low, mid - 1)
+        node.right = self._build_balanced(patients, mid + 1, high)
         node.height = max(self.height(node.left), self.height(node.right)) + 1
-        balance = self.balance_factor(node)
-
-        if balance > 1 and patient.patient_id < node.left.patient.patient_id:
-            return self.right_rotate(node)
-        if balance < -1 and patient.patient_id > node.right.patient.patient_id:
-            return self.left_rotate(node)
-        if balance > 1 and patient.patient_id > node.left.patient.patient_id:
-            node.left = self.left_rotate(node.left)
-            return self.right_rotate(node)
-        if balance < -1 and patient.patient_id < node.right.patient.patient_id:
-            node.right = self.right_rotate(node.right)
-            return self.left_rotate(node)
-
         return node
 
+    def range_scan(self, low=None, high=None):
+        # In-order walk that skips subtrees lying wholly below low and stops past high.
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                if low is not None and node.patient.patient_id < low:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if high is not None and node.patient.patient_id > high:
+                return
+            yield node.patient
+            node = node.right
+
     def find_patient(self, patient_id):
-        return self._find_recursive(self.root, patient_id)
+        node = self.root
+        comparisons = 0
+        while node:
+            comparisons += 1
+            node_id = node.patient.patient_id
+            if patient_id == node_id:
+                break
+            node = node.left if patient_id < node_id else node.right
+        if PROFILER.enabled:
+            PROFILER.count("avl.comparisons", comparisons)
+        return node.patient if node else None
 
-    def _find_recursive(self, node, patient_id):
+    def delete_patient(self, patient_id):
+        path = []
+        node = self.root
+        while node and node.patient.patient_id != patient_id:
+            path.append(node)
+            node = node.left if patient_id < node.patient.patient_id else node.right
+        if PROFILER.enabled:
+            # Every node on the path, plus the match itself when there is one.
+            PROFILER.count("avl.comparisons", len(path) + (node is not None))
         if not node:
-            return None
-        if patient_id == node.patient.patient_id:
-            return node.patient
-        elif patient_id < node.patient.patient_id:
-            return self._find_recursive(node.left, patient_id)
+            return False
+
+        if node.left and node.right:
+            # Copy the in-order successor into this node, then unlink the successor.
+            path.append(node)
+            successor = node.right
+            steps = 1
+            while successor.left:
+                steps += 1
+                path.append(successor)
+                successor = successor.left
+            if PROFILER.enabled:
+                PROFILER.count("avl.successor_steps", steps)
+            node.patient = successor.patient
+            node = successor
+
+        child = node.left or node.right
+        if path:
+            parent = path[-1]
+            if parent.left is node:
+                parent.left = child
+            else:
+                parent.right = child
         else:
-            return self._find_recursive(node.right, patient_id)
+            self.root = child
+        self.size -= 1
+        self._rebalance_path(path)
+        return True
+
+    def display_patients(self):
+        self._display_preorder(self.root)
+
+    def _display_preorder(self, node):
+        stack = [node] if node else []
+        while stack:
+            node = stack.pop()
+            patient = node.patient
+            print(f"\nID: {patient.patient_id}")
+            print(f"Name: {patient.name}")
+            print(f"Age: {patient.age}")
+            print(f"Gender: {patient.gender}")
+            print(f"Severity: {patient.severity}")
+            print(f"Room: {patient.room_id}")
+            if patient.disease:
+                print(f" Disease: {patient.disease}")
+            print("-" * 30)
+            # Push right first so the left subtree is visited next
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+
+class DictPatientIndex(PatientIndex):
+    """Hash index: O(1) insert, find and delete.
+
+    There is no key order to walk, so range_scan sorts the matching IDs on every
+    call. Best when the workload is almost entirely point lookups.
+    """
+
+    def __init__(self):
+        self.patients = {}
+
+    def __len__(self):
+        return len(self.patients)
+
+    def insert(self, patient):
+        if patient.patient_id in self.patients:
+            raise ValueError(f"Duplicate patient ID {patient.patient_id}")
+        self.patients[patient.patient_id] = patient
+
+    def bulk_insert(self, patients):
+        patients = list(patients)
+        for patient in patients:
+            if patient.patient_id in self.patients:
+                raise ValueError(f"Duplicate patient ID {patient.patient_id}")
+        new_patients = {patient.patient_id: patient for patient in patients}
+        if len(new_patients) != len(patients):
+            raise ValueError("Duplicate patient ID in batch")
+        self.patients.update(new_patients)
+
+    def find_patient(self, patient_id):
+        return self.patients.get(patient_id)
 
     def delete_patient(self, patient_id):
-        self.root = self._delete_recursive(self.root, patient_id)
+        return self.patients.pop(patient_id, None) is not None
 
-    def _delete_recursive(self, node, patient_id):
-        if not node:
-            return None
+    def range_scan(self, low=None, high=None):
+        patient_ids = sorted(patient_id for patient_id in self.patients
+                             if (low is None or patient_id >= low)
+                             and (high is None or patient_id <= high))
+        for patient_id in patient_ids:
+            yield self.patients[patient_id]
 
-        if patient_id < node.patient.patient_id:
-            node.left = self._delete_recursive(node.left, patient_id)
-        elif patient_id > node.patient.patient_id:
-            node.right = self._delete_recursive(node.right, patient_id)
-        else:
-            if not node.left:
-                return node.right
-            elif not node.right:
-                return node.left
+class SortedArrayPatientIndex(PatientIndex):
+    """Parallel sorted arrays of IDs and patients searched with bisect.
 
-            temp = self._min_value_node(node.right)
-            node.patient = temp.patient
-            node.right = self._delete_recursive(node.right, temp.patient.patient_id)
+    IDs handed out by add_patient only grow, so inserts are nearly always O(1)
+    appends; out-of-order inserts and deletes shift the tail of the arrays.
+    Finds are O(log n) and range scans are contiguous slices.
+    """
 
-        if not node:
-            return None
+    def __init__(self):
+        self.patient_ids = []
+        self.patients = []
 
-        node.height = max(self.height(node.left), self.height(node.right)) + 1
-        balance = self.balance_factor(node)
+    def __len__(self):
+        return len(self.patient_ids)
 
-        if balance > 1 and self.balance_factor(node.left) >= 0:
-            return self.right_rotate(node)
-        if balance > 1 and self.balance_factor(node.left) < 0:
-            node.left = self.left_rotate(node.left)
-            return self.right_rotate(node)
-        if balance < -1 and self.balance_factor(node.right) <= 0:
-            return self.left_rotate(node)
-        if balance < -1 and self.balance_factor(node.right) > 0:
-            node.right = self.right_rotate(node.right)
-            return self.left_rotate(node)
+    def insert(self, patient):
+        patient_id = patient.patient_id
+        if not self.patient_ids or patient_id > self.patient_ids[-1]:
+            self.patient_ids.append(patient_id)
+            self.patients.append(patient)
+            return
+        index = bisect.bisect_left(self.patient_ids, patient_id)
+        if self.patient_ids[index] == patient_id:
+            raise ValueError(f"Duplicate patient ID {patient_id}")
+        self.patient_ids.insert(index, patient_id)
+        self.patients.insert(index, patient)
+
+    def _load_sorted(self, patients):
+        self.patient_ids = [patient.patient_id for patient in patients]
+        self.patients = patients
+
+    def _index_of(self, patient_id):
+        index = bisect.bisect_left(self.patient_ids, patient_id)
+        if index < len(self.patient_ids) and self.patient_ids[index] == patient_id:
+            return index
+        return None
+
+    def find_patient(self, patient_id):
+        index = self._index_of(patient_id)
+        return None if index is None else self.patients[index]
 
+    def delete_patient(self, patient_id):
+        index = self._index_of(patient_id)
+        if index is None:
+            return False
+        del self.patient_ids[index]
+        del self.patients[index]
+        return True
+
+    def range_scan(self, low=None, high=None):
+        start = 0 if low is None else bisect.bisect_left(self.patient_ids, low)
+        stop = len(self.patient_ids) if high is None else bisect.bisect_right(self.patient_ids, high)
+        for index in range(start, stop):
+            yield self.patients[index]
+
+class BTreeNode:
+    __slots__ = ("keys", "values", "children", "next")
+
+    def __init__(self, keys=None, values=None, children=None):
+        self.keys = keys if keys is not None else []
+        self.values = values      # patients, for leaves only
+        self.children = children  # child nodes, for internal nodes only
+        self.next = None          # right sibling leaf, for range scans
+
+    @property
+    def is_leaf(self):
+        return self.children is None
+
+class BTreePatientIndex(PatientIndex):
+    """B+ tree of patients with a configurable fanout.
+
+    Each node holds up to `fanout` keys (leaves) or children (internal nodes) in
+    flat lists searched with bisect, so a lookup touches about log_fanout(n) nodes
+    instead of the log2(n) pointer hops of the AVL tree. Leaves are chained for
+    range scans. Internal keys are separators: keys[i] is no greater than any ID
+    under children[i + 1].
+    """
+
+    def __init__(self, fanout=64):
+        if fanout < 4:
+            raise ValueError("B-tree fanout must be at least 4")
+        self.fanout = fanout
+        self.min_fill = fanout // 2
+        self.root = BTreeNode(values=[])
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _find_leaf(self, patient_id, path=None):
+        node = self.root
+        while not node.is_leaf:
+            child_index = bisect.bisect_right(node.keys, patient_id)
+            if path is not None:
+                path.append((node, child_index))
+            node = node.children[child_index]
         return node
 
-    def _min_value_node(self, node):
-        current = node
-        while current.left:
-            current = current.left
-        return current
+    def find_patient(self, patient_id):
+        leaf = self._find_leaf(patient_id)
+        index = bisect.bisect_left(leaf.keys, patient_id)
+        if index < len(leaf.keys) and leaf.keys[index] == patient_id:
+            return leaf.values[index]
+        return None
 
-    def display_patients(self):
-        self._display_preorder(self.root)
+    def insert(self, patient):
+        patient_id = patient.patient_id
+        path = []
+        leaf = self._find_leaf(patient_id, path)
+        index = bisect.bisect_left(leaf.keys, patient_id)
+        if index < len(leaf.keys) and leaf.keys[index] == patient_id:
+            raise ValueError(f"Duplicate patient ID {patient_id}")
+        leaf.keys.insert(index, patient_id)
+        leaf.values.insert(index, patient)
+        self.size += 1
+        if len(leaf.keys) > self.fanout:
+            self._split(leaf, path)
+
+    def _split(self, node, path):
+        while True:
+            if node.is_leaf:
+                mid = len(node.keys) // 2
+                sibling = BTreeNode(node.keys[mid:], node.values[mid:])
+                del node.keys[mid:]
+                del node.values[mid:]
+                sibling.next = node.next
+                node.next = sibling
+                separator = sibling.keys[0]
+            else:
+                mid = len(node.children) // 2
+                separator = node.keys[mid - 1]
+                sibling = BTreeNode(node.keys[mid:], children=node.children[mid:])
+                del node.keys[mid - 1:]
+                del node.children[mid:]
+
+            if not path:
+                self.root = BTreeNode([separator], children=[node, sibling])
+                return
+            parent, child_index = path.pop()
+            parent.keys.insert(child_index, separator)
+            parent.children.insert(child_index + 1, sibling)
+            if len(parent.children) <= self.fanout:
+                return
+            node = parent
 
-    def _display_preorder(self, node):
-     if node:
-        patient = node.patient                  
-        print(f"\nID: {patient.patient_id}")
-        print(f"Name: {patient.name}")
-        print(f"Age: {patient.age}")
-        print(f"Gender: {patient.gender}")
-        print(f"Severity: {patient.severity}")
-        print(f"Room: {patient.room_id}")
-        if patient.disease:
-            print(f" Disease: {patient.disease}")
-        print("-" * 30)
-        self._display_preorder(node.left)       # Then visit left subtree
-        self._display_preorder(node.right)
+    def delete_patient(self, patient_id):
+        path = []
+        leaf = self._find_leaf(patient_id, path)
+        index = bisect.bisect_left(leaf.keys, patient_id)
+        if index == len(leaf.keys) or leaf.keys[index] != patient_id:
+            return False
+        del leaf.keys[index]
+        del leaf.values[index]
+        self.size -= 1
+
+        node = leaf
+        while path and self._fill(node) < self.min_fill:
+            parent, child_index = path.pop()
+            self._fix_underflow(parent, child_index)
+            node = parent
+        if not self.root.is_leaf and len(self.root.children) == 1:
+            self.root = self.root.children[0]
+        return True
+
+    def _fill(self, node):
+        return len(node.keys) if node.is_leaf else len(node.children)
+
+    def _fix_underflow(self, parent, child_index):
+        # Borrow one entry from a sibling that can spare it, otherwise merge with one.
+        node = parent.children[child_index]
+        left = parent.children[child_index - 1] if child_index > 0 else None
+        right = parent.children[child_index + 1] if child_index + 1 < len(parent.children) else None
+
+        if left is not None and self._fill(left) > self.min_fill:
+            if node.is_leaf:
+                node.keys.insert(0, left.keys.pop())
+                node.values.insert(0, left.values.pop())
+                parent.keys[child_index - 1] = node.keys[0]
+            else:
+                node.keys.insert(0, parent.keys[child_index - 1])
+                node.children.insert(0, left.children.pop())
+                parent.keys[child_index - 1] = left.keys.pop()
+        elif right is not None and self._fill(right) > self.min_fill:
+            if node.is_leaf:
+                node.keys.append(right.keys.pop(0))
+                node.values.append(right.values.pop(0))
+                parent.keys[child_index] = right.keys[0]
+            else:
+                node.keys.append(parent.keys[child_index])
+                node.children.append(right.children.pop(0))
+                parent.keys[child_index] = right.keys.pop(0)
+        else:
+            if left is not None:
+                child_index -= 1
+                node, right = left, node
+            if node.is_leaf:
+                node.keys.extend(right.keys)
+                node.values.extend(right.values)
+                node.next = right.next
+            else:
+                node.keys.append(parent.keys[child_index])
+                node.keys.extend(right.keys)
+                node.children.extend(right.children)
+            del parent.keys[child_index]
+            del parent.children[child_index + 1]
+
+    def range_scan(self, low=None, high=None):
+        if low is None:
+            leaf = self.root
+            while not leaf.is_leaf:
+                leaf = leaf.children[0]
+            index = 0
+        else:
+            leaf = self._find_leaf(low)
+            index = bisect.bisect_left(leaf.keys, low)
+        while leaf is not None:
+            keys = leaf.keys
+            for position in range(index, len(keys)):
+                if high is not None and keys[position] > high:
+                    return
+                yield leaf.values[position]
+            leaf = leaf.next
+            index = 0
+
+    def _load_sorted(self, patients):
+        # Build bottom-up from evenly sized chunks, so every node is at least half full.
+        if len(patients) <= self.fanout:
+            self.root = BTreeNode([patient.patient_id for patient in patients], list(patients))
+            self.size = len(patients)
+            return
+        level = []
+        for chunk in self._even_chunks(patients):
+            leaf = BTreeNode([patient.patient_id for patient in chunk], chunk)
+            if level:
+                level[-1].next = leaf
+            level.append(leaf)
+        low_keys = [leaf.keys[0] for leaf in level]
+        while len(level) > 1:
+            parents = []
+            parent_low_keys = []
+            start = 0
+            for chunk in self._even_chunks(level):
+                stop = start + len(chunk)
+                parents.append(BTreeNode(low_keys[start + 1:stop], children=chunk))
+                parent_low_keys.append(low_keys[start])
+                start = stop
+            level = parents
+            low_keys = parent_low_keys
+        self.root = level[0]
+        self.size = len(patients)
+
+    def _even_chunks(self, items):
+        count = -(-len(items) // self.fanout)
+        size, extra = divmod(len(items), count)
+        start = 0
+        for chunk_index in range(count):
+            stop = start + size + (1 if chunk_index < extra else 0)
+            yield items[start:stop]
+            start = stop
+
+class CachedPatientIndex(PatientIndex):
+    """Patient index that also serves discharged patients from a bounded cache over a backing store.
+
+    Admitted patients live in `index` as usual; the priority queue holds them
+    anyway, so they are never evicted. delete_patient (a discharge) moves the
+    patient into `cold`, an LRU of at most `capacity` discharged patients kept
+    for history lookups, evicting the least recently used. A find_patient miss
+    calls loader(patient_id), which returns the patient from the backing store
+    (or None), and caches the result as cold. Eviction never probes: only cold
+    patients are in the LRU. range_scan and len cover admitted patients only.
+    """
+
+    def __init__(self, index, loader, capacity=100_000):
+        self.index = index
+        self.loader = loader
+        self.capacity = capacity
+        self.cold = OrderedDict()  # patient_id -> discharged Patient, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def insert(self, patient):
+        self.cold.pop(patient.patient_id, None)
+        self.index.insert(patient)
+
+    def bulk_insert(self, patients):
+        self.index.bulk_insert(patients)
+
+    def find_patient(self, patient_id):
+        patient = self.index.find_patient(patient_id)
+        if patient is None:
+            patient = self.cold.get(patient_id)
+            if patient is None:
+                self.misses += 1
+                patient = self.loader(patient_id)
+                if patient is not None:
+                    self._keep_cold(patient)
+                return patient
+            self.cold.move_to_end(patient_id)
+        self.hits += 1
+        return patient
+
+    def delete_patient(self, patient_id):
+        patient = self.index.find_patient(patient_id)
+        if patient is None:
+            return False
+        self.index.delete_patient(patient_id)
+        self._keep_cold(patient)
+        return True
+
+    def _keep_cold(self, patient):
+        cold = self.cold
+        cold[patient.patient_id] = patient
+        cold.move_to_end(patient.patient_id)
+        while len(cold) > self.capacity:
+            cold.popitem(last=False)
+
+    def range_scan(self, low=None, high=None):
+        return self.index.range_scan(low, high)
+
+PATIENT_INDEX_BACKENDS = {
+    "avl": AVLTree,
+    "dict": DictPatientIndex,
+    "sorted": SortedArrayPatientIndex,
+    "btree": BTreePatientIndex,
+}
+
+def make_patient_index(backend="avl", **options):
+    """Create a patient index by backend name (see PATIENT_INDEX_BACKENDS)."""
+    try:
+        index_class = PATIENT_INDEX_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown patient index backend {backend!r}; "
+                         f"choose from {', '.join(PATIENT_INDEX_BACKENDS)}") from None
+    return index_class(**options)
+
+# Room types a patient may be placed in, by severity, as tiers tried in order.
+# Critical patients take any bed rather than none; mild ones never hold an ICU bed.
+ROOM_TYPE_PREFERENCES = {
+    1: (("ICU",), ("Surgery",), ("General",)),
+    2: (("General", "Surgery"), ("ICU",)),
+    3: (("General",), ("Surgery",)),
+}
+
+# Batch assignment cost weights: corridor distance counts more for sicker patients,
+# and each step down a severity's ROOM_TYPE_PREFERENCES tiers adds a fixed penalty.
+SEVERITY_DISTANCE_WEIGHT = {1: 3, 2: 2, 3: 1}
+ROOM_TYPE_TIER_COST = 50
+
+def solve_assignment(cost):
+    """Minimum-cost assignment of every row of a rectangular cost matrix to a distinct column.
+
+    Returns the chosen column for each row; needs len(cost) <= len(cost[0]).
+    Uses scipy's linear_sum_assignment when available, else the shortest
+    augmenting path Hungarian algorithm: vectorized with NumPy when it is
+    installed, pure Python (O(n^2 m), slow past a few hundred rows) otherwise.
+    """
+    if linear_sum_assignment is not None:
+        rows, columns = linear_sum_assignment(cost)
+        return [int(column) for column in columns[np.argsort(rows)]]
+    if np is not None:
+        return _solve_assignment_numpy(cost)
+
+    row_count, column_count = len(cost), len(cost[0])
+    inf = float('inf')
+    # Potentials u (rows) and v (columns); row_of[j] is the row matched to column j,
+    # with column 0 a virtual start and rows numbered from 1.
+    u = [0.0] * (row_count + 1)
+    v = [0.0] * (column_count + 1)
+    row_of = [0] * (column_count + 1)
+    way = [0] * (column_count + 1)
+    for row in range(1, row_count + 1):
+        row_of[0] = row
+        column = 0
+        min_slack = [inf] * (column_count + 1)
+        used = [False] * (column_count + 1)
+        while True:
+            used[column] = True
+            current_row = row_of[column]
+            row_costs = cost[current_row - 1]
+            row_potential = u[current_row]
+            delta = inf
+            next_column = 0
+            for j in range(1, column_count + 1):
+                if not used[j]:
+                    slack = row_costs[j - 1] - row_potential - v[j]
+                    if slack < min_slack[j]:
+                        min_slack[j] = slack
+                        way[j] = column
+                    if min_slack[j] < delta:
+                        delta = min_slack[j]
+                        next_column = j
+            for j in range(column_count + 1):
+                if used[j]:
+                    u[row_of[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            column = next_column
+            if row_of[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            row_of[column] = row_of[previous]
+            column = previous
+
+    assignment = [0] * row_count
+    for j in range(1, column_count + 1):
+        if row_of[j]:
+            assignment[row_of[j] - 1] = j - 1
+    return assignment
+
+def assignment_solver():
+    """Name of the solver solve_assignment will use: "scipy", "numpy" or "python"."""
+    if linear_sum_assignment is not None:
+        return "scipy"
+    return "numpy" if np is not None else "python"
+
+def _solve_assignment_numpy(cost):
+    # Jonker-Volgenant style shortest augmenting paths with column potentials v
+    # (a row's potential is implied by its matched column). Each free row runs a
+    # Dijkstra over the columns, but settles every column at the current
+    # minimum distance at once and relaxes from all their rows in one NumPy
+    # operation, so ties, which the assignment costs are full of, cost one
+    # step instead of one per column. Unmatched columns keep v = 0, which keeps
+    # the result optimal for rectangular matrices.
+    cost = np.asarray(cost, dtype=float)
+    row_count, column_count = cost.shape
+    v = np.zeros(column_count)
+    row_of = np.full(column_count, -1, dtype=np.intp)
+    column_of = np.full(row_count, -1, dtype=np.intp)
+    for free_row in range(row_count):
+        distance = cost[free_row] - v
+        predecessor = np.full(column_count, free_row, dtype=np.intp)
+        unsettled = np.ones(column_count, dtype=bool)
+        end = -1
+        while end < 0:
+            shortest = distance[unsettled].min()
+            level = unsettled & (distance == shortest)
+            while True:
+                open_columns = np.flatnonzero(level & (row_of < 0))
+                if open_columns.size:
+                    end = open_columns[0]
+                    break
+                unsettled &= ~level
+                columns = np.flatnonzero(level)
+                rows = row_of[columns]
+                remaining = np.flatnonzero(unsettled)
+                offsets = shortest - (cost[rows, columns] - v[columns])
+                reduced = cost[np.ix_(rows, remaining)] - v[remaining] + offsets[:, None]
+                best = reduced.argmin(axis=0)
+                candidate = reduced[best, np.arange(remaining.size)]
+                improved = candidate < distance[remaining]
+                distance[remaining[improved]] = candidate[improved]
+                predecessor[remaining[improved]] = rows[best[improved]]
+                level = unsettled & (distance == shortest)
+                if not level.any():
+                    break
+        settled = ~unsettled
+        v[settled] += distance[settled] - shortest
+        column = end
+        while True:
+            row = predecessor[column]
+            row_of[column] = row
+            column, column_of[row] = column_of[row], column
+            if row == free_row:
+                break
+    return column_of.tolist()
+
+class VacancyIndex:
+    """Vacant rooms ordered by corridor distance from one entry point.
+
+    Distances from the entry point are computed with a single Dijkstra run and
+    kept until the corridor graph changes. Vacant rooms of each room type sit in
+    their own heap of (distance, room_id) entries: freeing a room pushes it in
+    O(log V), occupying one is O(1) because stale entries are only dropped when
+    they reach the top. nearest() is therefore amortized O(log V) per room type
+    asked for, and O(1) per type when the top is current.
+    """
+
+    def __init__(self, graph, rooms, source):
+        self.graph = graph
+        self.rooms = rooms
+        self.source = source
+        self.distances = {source: 0}
+        self.heaps = {}  # room_type -> heap of (distance, room_id)
+        self.queued = set()  # rooms with a heap entry at their current distance
+        self._relax([(0, source)])
+
+    def _eligible(self, room_id):
+        room = self.rooms.get(room_id)
+        return room is not None and room.is_vacant and room_id != "Reception"
+
+    def _queue(self, room_id):
+        if room_id not in self.queued and room_id in self.distances and self._eligible(room_id):
+            self.queued.add(room_id)
+            heap = self.heaps.setdefault(self.rooms[room_id].room_type, [])
+            heapq.heappush(heap, (self.distances[room_id], room_id))
+
+    def _relax(self, priority_queue):
+        # Dijkstra from the given frontier; only rooms whose distance improves are
+        # revisited, which makes this both the initial build and the edge update.
+        distances = self.distances
+        while priority_queue:
+            current_distance, current_room = heapq.heappop(priority_queue)
+            if current_distance > distances[current_room]:
+                continue
+            # Any older heap entry for this room is now stale and will be skipped.
+            self.queued.discard(current_room)
+            self._queue(current_room)
+            for neighbor, weight in self.graph.get_neighbors(current_room):
+                distance = current_distance + weight
+                if distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = distance
+                    heapq.heappush(priority_queue, (distance, neighbor))
+
+    def edge_added(self, from_node, to_node, weight):
+        """Update distances after a new corridor, touching only rooms that get closer."""
+        frontier = []
+        for near, far in ((from_node, to_node), (to_node, from_node)):
+            distance = self.distances.get(near, float('inf')) + weight
+            if distance < self.distances.get(far, float('inf')):
+                self.distances[far] = distance
+                frontier.append((distance, far))
+        heapq.heapify(frontier)
+        self._relax(frontier)
+
+    def room_vacated(self, room_id):
+        self._queue(room_id)
+
+    def _top(self, room_type):
+        heap = self.heaps.get(room_type)
+        while heap:
+            distance, room_id = heap[0]
+            current = distance == self.distances[room_id]
+            if current and self._eligible(room_id):
+                return heap[0]
+            heapq.heappop(heap)
+            if current:
+                self.queued.discard(room_id)
+        return None
+
+    def nearest(self, room_types=None):
+        """Return the nearest vacant room of any of room_types (all types if None)."""
+        tops = [self._top(room_type) for room_type in (room_types or list(self.heaps))]
+        tops = [top for top in tops if top]
+        return min(tops)[1] if tops else None
+
+    def rooms_by_distance(self, room_types=None):
+        """Yield vacant rooms nearest first; vacancy is checked as each room is reached."""
+        for distance, room_id in sorted((distance, room_id) for room_id, distance in self.distances.items()):
+            if self._eligible(room_id) and (room_types is None or self.rooms[room_id].room_type in room_types):
+                yield room_id
 
 class RoomManager:
     def __init__(self):
         self.rooms = {}
         self.graph = Graph()
-        self.cleaning_queue = CleaningQueue() 
+        self.cleaning_queue = CleaningQueue(lambda room_id: self.rooms[room_id].room_type)
+        self.vacancy_indexes = {}  # entry point room_id -> VacancyIndex
+        self.vacant_rooms = {}  # room_type -> {room_id: None}, an insertion-ordered set
+        self.occupancy_listeners = []  # called as listener(room_id, is_vacant) after a room changes
+        self.room_listeners = []  # called as listener(room_id) after add_room registers a room
+        self.graph.edge_listeners.append(self._corridor_added)
+        self.graph.edge_removed_listeners.append(self._corridor_removed)
+        self.mst = None  # DynamicMST of the corridor graph, see network_mst
+        self.routes = None  # Router over the corridor graph, see router
         self.initialize_rooms()
         self.initialize_corridors()
+        self.vacancy_index("Reception")
 
     def initialize_rooms(self):
-        self.rooms["Reception"] = Room("Reception", is_vacant=False)
-        self.rooms["Room 1"] = Room("Room 1", room_type="General")
-        self.rooms["Room 2"] = Room("Room 2", room_type="ICU")
-        self.rooms["Room 3"] = Room("Room 3", room_type="Surgery")
-        self.rooms["Room 4"] = Room("Room 4", room_type="General")
-        self.rooms["Power and Monitoring Hub"] = Room("Power and Monitoring Hub", is_vacant=False)
+        self.add_room(Room("Reception", is_vacant=False))
+        self.add_room(Room("Room 1", room_type="General"))
+        self.add_room(Room("Room 2", room_type="ICU"))
+        self.add_room(Room("Room 3", room_type="Surgery"))
+        self.add_room(Room("Room 4", room_type="General"))
+        self.add_room(Room("Power and Monitoring Hub", is_vacant=False))
+
+    def add_room(self, room):
+        self.rooms[room.room_id] = room
+        room.vacancy_listener = self._vacancy_changed
+        if room.is_vacant:
+            # Registering a vacant room adds capacity; it is not a room being vacated.
+            self._index_vacancy(room.room_id, True)
+        for listener in self.room_listeners:
+            listener(room.room_id)
+
+    def vacancy_index(self, start_room_id):
+        """Return the distance-ordered vacancy index for an entry point, building it on first use."""
+        index = self.vacancy_indexes.get(start_room_id)
+        if index is None:
+            index = VacancyIndex(self.graph, self.rooms, start_room_id)
+            self.vacancy_indexes[start_room_id] = index
+        return index
+
+    def _vacancy_changed(self, room_id, is_vacant):
+        self._index_vacancy(room_id, is_vacant)
+        for listener in self.occupancy_listeners:
+            listener(room_id, is_vacant)
+
+    def _index_vacancy(self, room_id, is_vacant):
+        vacant_of_type = self.vacant_rooms.setdefault(self.rooms[room_id].room_type, {})
+        if is_vacant:
+            vacant_of_type[room_id] = None
+            for index in self.vacancy_indexes.values():
+                index.room_vacated(room_id)
+        else:
+            vacant_of_type.pop(room_id, None)
+
+    def _corridor_added(self, from_room, to_room, weight):
+        for index in self.vacancy_indexes.values():
+            index.edge_added(from_room, to_room, weight)
+
+    def _corridor_removed(self, from_room, to_room, old_weight):
+        # Distances can only grow, which the vacancy indexes can't patch; rebuild them on next use.
+        self.vacancy_indexes.clear()
+
+    def network_mst(self):
+        """Minimum spanning forest of the corridor graph, built on first use and then kept up to date."""
+        if self.mst is None:
+            self.mst = DynamicMST(self.graph)
+        return self.mst
+
+    def router(self):
+        """Shortest routes over the corridor graph from any room, built on first use."""
+        if self.routes is None:
+            self.routes = Router(self.graph)
+        return self.routes
 
     def initialize_corridors(self):
         corridor_connections = [
@@ -364,30 +2169,29 @@ class RoomManager:
         for from_room, to_room, weight in corridor_connections:
             self.graph.add_edge(from_room, to_room, weight)
 
-    def find_nearest_vacant_room(self, start_room_id):
-        distances = {room_id: float('inf') for room_id in self.rooms}
-        distances[start_room_id] = 0
-        priority_queue = [(0, start_room_id)]
-        visited = set()
+    def find_nearest_vacant_room(self, start_room_id, room_types=None):
+        return self.vacancy_index(start_room_id).nearest(room_types)
 
-        while priority_queue:
-            current_distance, current_room = heapq.heappop(priority_queue)
-            if current_room in visited:
-                continue
-            visited.add(current_room)
+    def find_room_for_severity(self, start_room_id, severity):
+        """Nearest vacant room from the first ROOM_TYPE_PREFERENCES tier that has one."""
+        index = self.vacancy_index(start_room_id)
+        for room_types in ROOM_TYPE_PREFERENCES.get(severity, (None,)):
+            room_id = index.nearest(room_types)
+            if room_id:
+                return room_id
+        return None
 
-            if self.rooms[current_room].is_vacant and current_room != "Reception":
-                return current_room
+    def vacant_rooms_by_distance(self, start_room_id, room_types=None):
+        """Yield vacant room IDs in order of corridor distance from start_room_id."""
+        return self.vacancy_index(start_room_id).rooms_by_distance(room_types)
 
-            for neighbor, weight in self.graph.get_neighbors(current_room):
-                distance = current_distance + weight
-                if distance < distances[neighbor]:
-                    distances[neighbor] = distance
-                    heapq.heappush(priority_queue, (distance, neighbor))
-        return None
+    def get_vacant_rooms(self, room_type=None):
+        if room_type is not None:
+            return list(self.vacant_rooms.get(room_type, ()))
+        return [room_id for vacant_of_type in self.vacant_rooms.values() for room_id in vacant_of_type]
 
-    def get_vacant_rooms(self):
-        return [room_id for room_id, room in self.rooms.items() if room.is_vacant]
+    def has_vacancy(self):
+        return any(self.vacant_rooms.values())
 
     def list_rooms(self):
         return [str(room) for room in self.rooms.values()]
@@ -402,31 +2206,97 @@ class Staff:
         return f"{self.name} ({self.role}) - ID: {self.staff_id}"
 
 class StaffManager:
+    """Staff members indexed by staff_id and by role for O(1) lookups."""
+
     def __init__(self):
-        self.staff = []
+        self.staff = {}    # staff_id -> Staff, in registration order
+        self.roles = {}    # role -> {staff_id: Staff}
+
+    def __len__(self):
+        return len(self.staff)
+
+    def __contains__(self, staff_id):
+        return staff_id in self.staff
 
     def add_staff(self, staff):
-        self.staff.append(staff)
+        if staff.staff_id in self.staff:
+            raise ValueError(f"Staff ID {staff.staff_id} is already registered")
+        self.staff[staff.staff_id] = staff
+        self.roles.setdefault(staff.role, {})[staff.staff_id] = staff
+
+    def add_many(self, staff_members):
+        """Register several staff members; nothing is added if any ID is a duplicate."""
+        staff_members = list(staff_members)
+        seen = set()
+        for staff in staff_members:
+            if staff.staff_id in self.staff or staff.staff_id in seen:
+                raise ValueError(f"Staff ID {staff.staff_id} is already registered")
+            seen.add(staff.staff_id)
+        for staff in staff_members:
+            self.add_staff(staff)
+
+    def get(self, staff_id):
+        return self.staff.get(staff_id)
+
+    def by_role(self, role):
+        return list(self.roles.get(role, {}).values())
 
     def list_staff(self):
-        return self.staff
+        return list(self.staff.values())
     
 class CleaningQueue:
-    def __init__(self):
-        self.cleaning_queue = []
-        
+    """Rooms waiting to be cleaned, with O(1) enqueue, dequeue, membership and removal.
+
+    By default rooms are cleaned first in, first out. Setting `demand` to a
+    callable room_type -> number of waiting patients switches to priority mode:
+    the next room is the oldest queued room of the type with the most demand.
+    Each room type keeps its own FIFO, so priority mode costs O(T) for T types.
+    """
+
+    def __init__(self, room_type_of=None):
+        self.cleaning_queue = OrderedDict()  # room_id -> (seq, room_type), FIFO order
+        self.by_type = {}                    # room_type -> OrderedDict of queued room_ids
+        self.room_type_of = room_type_of or (lambda room_id: None)
+        self.demand = None
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self.cleaning_queue)
+
+    def __contains__(self, room_id):
+        return room_id in self.cleaning_queue
+
     def add_room_to_cleaning(self, room_id):
         if room_id not in self.cleaning_queue:
-            self.cleaning_queue.append(room_id)
+            room_type = self.room_type_of(room_id)
+            self.cleaning_queue[room_id] = (next(self._seq), room_type)
+            self.by_type.setdefault(room_type, OrderedDict())[room_id] = None
             
     def get_next_room_to_clean(self):
-        if self.cleaning_queue:
-            return self.cleaning_queue[0]
-        return None
+        if not self.cleaning_queue:
+            return None
+        if self.demand is None:
+            return next(iter(self.cleaning_queue))
+        best = None
+        for room_type, queued in self.by_type.items():
+            if queued:
+                room_id = next(iter(queued))
+                key = (-self.demand(room_type), self.cleaning_queue[room_id][0])
+                if best is None or key < best[0]:
+                    best = (key, room_id)
+        return best[1]
+
+    def pop_next_room(self):
+        """Remove and return the next room to clean, or None if the queue is empty."""
+        room_id = self.get_next_room_to_clean()
+        if room_id is not None:
+            self.mark_room_cleaned(room_id)
+        return room_id
         
     def mark_room_cleaned(self, room_id):
         if room_id in self.cleaning_queue:
-            self.cleaning_queue.remove(room_id)
+            _, room_type = self.cleaning_queue.pop(room_id)
+            del self.by_type[room_type][room_id]
             return True
         return False
 
@@ -438,14 +2308,419 @@ class CleaningQueue:
         for i, room_id in enumerate(self.cleaning_queue, 1):
             print(f"{i}. {room_id}")
 
+def patient_state(patient):
+    """Plain list of a patient's fields, for journals and snapshots."""
+    return [patient.patient_id, patient.name, patient.age, patient.gender, patient.severity,
+            patient.arrival_time, patient.disease, patient.room_id, patient.history, patient.treatments]
+
+def patient_from_state(state):
+    patient_id, name, age, gender, severity, arrival_time, disease, room_id, history, treatments = state
+    patient = Patient(patient_id, name, age, gender, severity, arrival_time, disease)
+    patient.room_id = room_id
+    patient.history = list(history)
+    patient.treatments = list(treatments)
+    return patient
+
+def treatment_state(treatment):
+    return [treatment.treatment_id, treatment.patient_id, treatment.staff_id,
+            treatment.treatment_details, treatment.date]
+
+def paginate(items, page=1, page_size=20):
+    """Page `page` (counting from 1) of an iterable as (items, has_more).
+
+    Only the items up to the end of the page, plus one to tell whether
+    another page follows, are consumed, so a generator is never run to the end.
+    """
+    page, page_size = int(page), int(page_size)
+    if page < 1 or page_size < 1:
+        raise ValueError("page and page_size must be at least 1")
+    start = (page - 1) * page_size
+    items = list(itertools.islice(items, start, start + page_size + 1))
+    return items[:page_size], len(items) > page_size
+
+LISTING_PAGE_SIZE = 20  # records the interactive listings print before asking to go on
+
+class CommandResult:
+    """Outcome of an EnhancedHospitalSystem command: success flag, user-facing message and payload."""
+    __slots__ = ("ok", "message", "data")
+
+    def __init__(self, ok, message, data=None):
+        self.ok = ok
+        self.message = message
+        self.data = data
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        return f"CommandResult(ok={self.ok!r}, message={self.message!r})"
+
 class EnhancedHospitalSystem:
-    def __init__(self):
-        self.avl_tree = AVLTree()
+    def __init__(self, index_backend="avl", priority_cleaning=False, clock=time.time, **index_options):
+        # Patient ID index; any PatientIndex backend, kept under its original name.
+        self.avl_tree = make_patient_index(index_backend, **index_options)
         self.room_manager = RoomManager()
         self.staff_manager = StaffManager()
-        self.treatment_log = DoublyLinkedList()
+        self.treatment_log = TreatmentLog()
         self.priority_queue = MinHeapPriorityQueue() 
+        self.waiting_queue = MinHeapPriorityQueue()  # admitted patients still without a room
         self.current_id = 0
+        self.journal = None  # optional write-ahead journal, see persistence.HospitalStore
+        self.patient_table = PatientTable() if np is not None else None  # census columns, needs NumPy
+        self.clock = clock  # seconds since the epoch; simulation.py swaps in a virtual clock
+        self.metrics = HospitalMetrics(self.room_manager, clock=clock)
+        self.asset_locations = {}  # staff ID or equipment tag -> (room_id, kind, available); not persisted
+        if priority_cleaning:
+            self.room_manager.cleaning_queue.demand = self.cleaning_demand
+
+    def timestamp(self, fmt="%Y-%m-%d %H:%M:%S"):
+        """The clock's current local time formatted with time.strftime."""
+        return time.strftime(fmt, time.localtime(self.clock()))
+
+    def cleaning_demand(self, room_type):
+        """Waiting patients whose first-choice room types include room_type."""
+        return sum(count for severity, count in self.waiting_queue.severity_counts.items()
+                   if room_type in ROOM_TYPE_PREFERENCES.get(severity, ((),))[0])
+
+    # Command API: no input() or print(). Bad arguments raise ValueError; expected
+    # outcomes such as "not found" or "no room" come back as a failed CommandResult.
+
+    def admit_patient(self, name, age, gender, severity, disease=None, start_room_id="Reception", wait=False):
+        """Admit a patient to the nearest vacant room their severity allows.
+
+        With no such room the admission fails, unless `wait` is true: the
+        patient is then admitted without a room into the waiting queue, where
+        assign_batch (or a later bulk_admit) finds them.
+        """
+        age = int(age)
+        severity = int(severity)
+        if not 1 <= severity <= 3:
+            raise ValueError("Severity must be between 1 and 3")
+        disease = (disease or "").strip() or None
+        if isinstance(wait, str):
+            wait = wait.strip().lower() in ("1", "true", "yes")
+
+        nearest_room = self.room_manager.find_room_for_severity(start_room_id, severity)
+        if not nearest_room and not wait:
+            return CommandResult(False, "No vacant rooms available for admission.")
+
+        self.current_id += 1
+        patient = Patient(self.current_id, name, age, gender, severity, self.clock(), disease)
+        patient.room_id = nearest_room
+        patient.add_history(f"Patient admitted at {self.timestamp()}")
+        self.avl_tree.insert(patient)
+        self.priority_queue.add_patient(patient)
+        if nearest_room:
+            self.room_manager.rooms[nearest_room].is_vacant = False
+        else:
+            self.waiting_queue.add_patient(patient)
+        if self.patient_table is not None:
+            self.patient_table.add(patient)
+        if self.metrics:
+            self.metrics.patient_arrived(patient)
+            if nearest_room:
+                self.metrics.patient_roomed(patient)
+        if self.journal:
+            self.journal.append({"op": "admit", "patients": [patient_state(patient)]})
+        if not nearest_room:
+            return CommandResult(True, f"No vacant room; patient {patient.patient_id} is waiting for one", patient)
+        return CommandResult(True, f"Patient added successfully with ID: {patient.patient_id}", patient)
+
+    def admitted_patient(self, patient_id):
+        """The patient if still admitted, else None.
+
+        The index may also serve discharged patients for history lookups (see
+        CachedPatientIndex); every admitted patient is in the priority queue.
+        """
+        if patient_id not in self.priority_queue:
+            return None
+        return self.avl_tree.find_patient(patient_id)
+
+    def discharge(self, patient_id):
+        patient_id = int(patient_id)
+        patient = self.admitted_patient(patient_id)
+        if not patient:
+            return CommandResult(False, "Patient not found")
+        if patient.room_id:
+            room = self.room_manager.rooms[patient.room_id]
+            room.is_vacant = True
+            room.condition = "Dirty"
+            self.room_manager.cleaning_queue.add_room_to_cleaning(patient.room_id)
+        self.avl_tree.delete_patient(patient_id)
+        self.priority_queue.remove_patient(patient_id)
+        self.waiting_queue.remove_patient(patient_id)
+        if self.patient_table is not None:
+            self.patient_table.remove(patient_id)
+        if self.metrics:
+            self.metrics.patient_discharged(patient)
+        if self.journal:
+            self.journal.append({"op": "discharge", "patient_id": patient_id})
+        if patient.room_id:
+            message = f"Patient {patient.name} discharged successfully from room {patient.room_id}"
+        else:
+            message = f"Patient {patient.name} discharged successfully"
+        return CommandResult(True, message, patient)
+
+    def record_treatment(self, treatment_id, patient_id, staff_id, treatment_details):
+        patient_id = int(patient_id)
+        patient = self.admitted_patient(patient_id)
+        if not patient:
+            return CommandResult(False, "Patient not found.")
+        if staff_id not in self.staff_manager:
+            return CommandResult(False, "Staff member not found.")
+
+        treatment = Treatment(treatment_id, patient_id, staff_id, treatment_details, self.timestamp("%Y-%m-%d"))
+        history = f"Treatment '{treatment_details}' performed on {self.timestamp()}"
+        self.apply_treatment(treatment, history)
+        if self.metrics:
+            self.metrics.treatment_recorded(patient)
+        if self.journal:
+            self.journal.append({"op": "treatment", "treatment": treatment_state(treatment), "history": history})
+        return CommandResult(True, f"Treatment {treatment_id} recorded successfully for patient {patient.name}",
+                             treatment)
+
+    def apply_treatment(self, treatment, history):
+        patient = self.avl_tree.find_patient(treatment.patient_id)
+        self.treatment_log.append(treatment)
+        patient.add_history(history)
+        patient.add_treatment(treatment.treatment_details)
+
+    def update_priority(self, patient_id, severity=None, age=None):
+        """Re-triage an admitted patient with a new severity and/or age.
+
+        Both queues are re-keyed in O(log n), so a waiting patient moves in the
+        waiting queue as well as the priority queue. The room the patient
+        already holds is kept.
+        """
+        patient_id = int(patient_id)
+        severity = None if severity in (None, "") else int(severity)
+        age = None if age in (None, "") else int(age)
+        if severity is None and age is None:
+            raise ValueError("Give a new severity, age or both")
+        if severity is not None and not 1 <= severity <= 3:
+            raise ValueError("Severity must be between 1 and 3")
+        patient = self.admitted_patient(patient_id)
+        if not patient:
+            return CommandResult(False, "Patient not found")
+        severity = patient.severity if severity is None else severity
+        age = patient.age if age is None else age
+        history = f"Priority updated to severity {severity}, age {age} on {self.timestamp()}"
+        self.apply_priority(patient_id, severity, age, history)
+        if self.journal:
+            self.journal.append({"op": "update_priority", "patient_id": patient_id, "severity": severity,
+                                 "age": age, "history": history})
+        return CommandResult(True, f"Patient {patient_id} now has severity {severity}, age {age}", patient)
+
+    def apply_priority(self, patient_id, severity, age, history):
+        self.priority_queue.update_priority(patient_id, severity, age)
+        self.waiting_queue.update_priority(patient_id, severity, age)
+        if self.patient_table is not None:
+            self.patient_table.set_priority(patient_id, severity, age)
+        self.avl_tree.find_patient(patient_id).add_history(history)
+
+    def register_staff(self, staff_id, name, role):
+        if not all([staff_id, name, role]):
+            raise ValueError("All fields must be filled")
+        staff = Staff(staff_id, name, role)
+        self.staff_manager.add_staff(staff)
+        if self.journal:
+            self.journal.append({"op": "staff", "staff": [staff_id, name, role]})
+        return CommandResult(True, f"Staff member {name} added successfully with ID: {staff_id}", staff)
+
+    def next_patient(self):
+        patient = self.priority_queue.get_next_patient()
+        if not patient:
+            return CommandResult(False, "No patients in priority queue")
+        return CommandResult(True, f"Next priority patient: {patient.patient_id}", patient)
+
+    def find_patient(self, patient_id):
+        patient = self.avl_tree.find_patient(int(patient_id))
+        if not patient:
+            return CommandResult(False, "Patient not found")
+        return CommandResult(True, f"Found patient {patient.patient_id}", patient)
+
+    def next_patients(self, count=5):
+        """The `count` highest-priority patients, best first, without sorting the queue."""
+        patients = self.priority_queue.top_k(int(count))
+        if not patients:
+            return CommandResult(False, "No patients in priority queue")
+        return CommandResult(True, f"Next {len(patients)} priority patients", patients)
+
+    def patients_page(self, order="id", severity=None, room_type=None, waiting=None, after_id=None,
+                      page=1, page_size=20):
+        """One page of admitted patients, filtered and in ID or priority order.
+
+        order "id" walks the patient index in ascending ID order; after_id
+        starts just past that ID, so a client can page with the last ID it
+        saw instead of an offset. order "priority" streams the priority queue
+        (or the waiting queue when waiting is true) best first. severity,
+        room_type and waiting (true: no room yet, false: roomed) narrow the
+        listing; filters are applied while streaming, so a page costs about
+        as much as the patients it skips and returns.
+        """
+        if severity is not None:
+            severity = int(severity)
+        if waiting is not None:
+            waiting = waiting in (True, "true", "1", 1)
+        if order == "id":
+            patients = self.avl_tree.range_scan(None if after_id is None else int(after_id) + 1)
+        elif order == "priority":
+            queue = self.waiting_queue if waiting else self.priority_queue
+            patients = queue.iter_priority_order()
+            if severity is not None:
+                # Severity leads the priority key, so nothing after a less urgent patient can match.
+                patients = itertools.takewhile(lambda patient: patient.severity <= severity, patients)
+        else:
+            raise ValueError(f"Unknown order {order!r}; use 'id' or 'priority'")
+        if severity is not None:
+            patients = (patient for patient in patients if patient.severity == severity)
+        if room_type is not None:
+            rooms = self.room_manager.rooms
+            patients = (patient for patient in patients
+                        if patient.room_id is not None and rooms[patient.room_id].room_type == room_type)
+        if waiting is not None:
+            patients = (patient for patient in patients if (patient.room_id is None) == waiting)
+        patients, has_more = paginate(patients, page, page_size)
+        data = {"patients": patients, "page": int(page), "has_more": has_more}
+        if order == "id" and has_more:
+            data["next_after_id"] = patients[-1].patient_id
+        return CommandResult(True, f"{len(patients)} patients on page {page}", data)
+
+    def treatments_page(self, patient_id=None, staff_id=None, start_date=None, end_date=None, page=1,
+                        page_size=20):
+        """One page of treatment records matching every given filter (see TreatmentLog.iter_records)."""
+        if patient_id is not None:
+            patient_id = int(patient_id)
+        records = self.treatment_log.iter_records(patient_id, staff_id, start_date, end_date)
+        records, has_more = paginate(records, page, page_size)
+        return CommandResult(True, f"{len(records)} treatment records on page {page}",
+                             {"treatments": records, "page": int(page), "has_more": has_more})
+
+    def staff_page(self, role=None, page=1, page_size=20):
+        """One page of staff members in registration order, optionally only those with `role`."""
+        if role is None:
+            staff = self.staff_manager.staff.values()
+        else:
+            staff = self.staff_manager.roles.get(role, {}).values()
+        staff, has_more = paginate(staff, page, page_size)
+        return CommandResult(True, f"{len(staff)} staff members on page {page}",
+                             {"staff": staff, "page": int(page), "has_more": has_more})
+
+    def census(self, now=None):
+        """Vectorized head counts and waits over admitted patients (needs NumPy)."""
+        table = self.patient_table
+        if table is None:
+            return CommandResult(False, "Census needs NumPy")
+        data = {
+            "admitted": len(table),
+            "waiting": len(self.waiting_queue),
+            "by_severity": table.severity_counts(),
+            "waiting_by_severity": table.severity_counts(waiting_only=True),
+            "mean_wait_seconds": table.mean_wait(self.clock() if now is None else now),
+            "waiting_age_histogram": table.age_histogram(),
+        }
+        return CommandResult(True, f"{data['admitted']} admitted, {data['waiting']} waiting for a room", data)
+
+    def operational_metrics(self, now=None):
+        """Throughput, wait / stay / turnaround quantiles and occupancy from the metrics engine."""
+        if not self.metrics:
+            return CommandResult(False, "Metrics are disabled")
+        data = self.metrics.snapshot(now)
+        return CommandResult(True, f"Metrics over the last {data['window_seconds']:.0f} s", data)
+
+    def profiling(self, enabled=None, reset=False):
+        """Turn hot-path instrumentation on or off and return what it has collected so far."""
+        if reset:
+            PROFILER.reset()
+        if enabled is not None:
+            if enabled in (True, "true", "on", "1", 1):
+                PROFILER.enable()
+            else:
+                PROFILER.disable()
+        state = "on" if PROFILER.enabled else "off"
+        return CommandResult(True, f"Profiling is {state}", PROFILER.to_json())
+
+    def route(self, from_room, to_room, method="auto"):
+        """Shortest corridor route between two rooms, with every room on the way."""
+        rooms = self.room_manager.rooms
+        for room_id in (from_room, to_room):
+            if room_id not in rooms:
+                return CommandResult(False, f"Room {room_id} not found")
+        route = self.room_manager.router().route(from_room, to_room, method)
+        if route is None:
+            return CommandResult(False, f"No corridor route from {from_room} to {to_room}")
+        return CommandResult(True, f"{' -> '.join(map(str, route.path))} ({route.distance})",
+                             {"distance": route.distance, "path": route.path})
+
+    def locate(self, asset_id, room_id=None, kind=None, available=True):
+        """Record where a staff member or piece of equipment is; room_id None stops tracking it.
+
+        kind defaults to the staff member's role, or "Equipment". Locations
+        are live positions, e.g. from a badge system, and are not journaled.
+        """
+        if room_id is None:
+            if self.asset_locations.pop(asset_id, None) is None:
+                return CommandResult(False, f"{asset_id} is not being tracked")
+            return CommandResult(True, f"Stopped tracking {asset_id}")
+        if room_id not in self.room_manager.rooms:
+            return CommandResult(False, f"Room {room_id} not found")
+        if kind is None:
+            staff = self.staff_manager.get(asset_id)
+            kind = staff.role if staff else "Equipment"
+        available = available in (True, "true", "1", 1)
+        self.asset_locations[asset_id] = (room_id, kind, available)
+        state = "available" if available else "busy"
+        return CommandResult(True, f"{asset_id} ({kind}, {state}) is in {room_id}", room_id)
+
+    def nearest_asset(self, room_id, kind=None):
+        """Nearest available tracked staff member or equipment (of `kind`, if given) and the route to room_id."""
+        if room_id not in self.room_manager.rooms:
+            return CommandResult(False, f"Room {room_id} not found")
+        assets_in = {}  # room_id -> asset IDs there
+        for asset_id, (location, asset_kind, available) in self.asset_locations.items():
+            if available and (kind is None or asset_kind == kind):
+                assets_in.setdefault(location, []).append(asset_id)
+        found = self.room_manager.router().nearest(room_id, assets_in)
+        if found is None:
+            return CommandResult(False, f"No available {kind or 'staff or equipment'} can reach {room_id}")
+        location, route = found
+        asset_id = assets_in[location][0]
+        return CommandResult(True, f"{asset_id} in {location} is nearest, {route.distance} away",
+                             {"asset_id": asset_id, "room_id": location, "distance": route.distance,
+                              "path": route.path})
+
+    def network_design(self, root="Power and Monitoring Hub"):
+        """Minimum spanning tree of the corridor graph that reaches root, e.g. for power and monitoring cabling.
+
+        The tree is kept up to date as corridors change (see DynamicMST), so
+        asking again costs only the walk over its edges.
+        """
+        mst = self.room_manager.network_mst()
+        if root not in mst.tree:
+            return CommandResult(False, f"{root} is not on the corridor graph")
+        edges = list(mst.edges(root))
+        total = sum(weight for _, _, weight in edges)
+        return CommandResult(True, f"{len(edges)} corridors, total length {total}, connect {len(edges) + 1} rooms "
+                                   f"to {root}", {"root": root, "total_weight": total, "edges": edges})
+
+    def mark_room_clean(self, room_id=None):
+        """Mark room_id (default: the next room in the cleaning queue) as cleaned."""
+        cleaning_queue = self.room_manager.cleaning_queue
+        if room_id is None:
+            room_id = cleaning_queue.get_next_room_to_clean()
+            if room_id is None:
+                return CommandResult(False, "No rooms in cleaning queue")
+        if not cleaning_queue.mark_room_cleaned(room_id):
+            return CommandResult(False, f"Room {room_id} is not waiting to be cleaned")
+        self.room_manager.rooms[room_id].condition = "Clean"
+        if self.metrics:
+            self.metrics.room_cleaned(room_id)
+        if self.journal:
+            self.journal.append({"op": "clean", "room_id": room_id})
+        return CommandResult(True, f"Room {room_id} has been marked as clean", room_id)
+
+    # Interactive shell over the command API.
+
     def display_cleaning_queue(self):
      self.room_manager.cleaning_queue.display_cleaning_queue()
 
@@ -490,24 +2765,14 @@ class EnhancedHospitalSystem:
                 print(f"Treatment #{i}: {treatment}")
                 
            
-            treatment_records = []
-            current = self.treatment_log.head
-            while current:
-                if current.data.patient_id == patient.patient_id:
-                    treatment_records.append(current.data)
-                current = current.next
+            treatment_records = self.treatment_log.records_for_patient(patient.patient_id)
                 
             if treatment_records:
                 print("\nDetailed Treatment Records:")
                 for record in treatment_records:
                     print(f"\nTreatment ID: {record.treatment_id}")
                     
-                    staff_member = None
-                    for staff in self.staff_manager.staff:
-                        if staff.staff_id == record.staff_id:
-                            staff_member = staff
-                            break
-                            
+                    staff_member = self.staff_manager.get(record.staff_id)
                     if staff_member:
                         print(f"Performed by: {staff_member.name} ({staff_member.role})")
                     print(f"Date: {record.date}")
@@ -528,12 +2793,11 @@ class EnhancedHospitalSystem:
     def find_patient_details(self):
       try:
         
-        patient_id = int(input("Enter Patient ID: "))
-        patient = self.avl_tree.find_patient(patient_id)
-        if patient:
-            self.display_detailed_patient_info(patient)
+        result = self.find_patient(input("Enter Patient ID: "))
+        if result:
+            self.display_detailed_patient_info(result.data)
         else:
-            print("Patient not found")
+            print(result.message)
             
       except ValueError:
         print("Please enter valid input")
@@ -545,26 +2809,46 @@ class EnhancedHospitalSystem:
      if next_room:
         confirm = input(f"Mark room {next_room} as cleaned? (y/n): ")
         if confirm.lower() == 'y':
-            self.room_manager.cleaning_queue.mark_room_cleaned(next_room)
-            self.room_manager.rooms[next_room].condition = "Clean"
-            print(f"Room {next_room} has been marked as clean")
+            print(self.mark_room_clean(next_room).message)
      else:
         print("No rooms in cleaning queue")
     
+    def _page_through(self, items, show):
+        """Print items with show(), pausing after every LISTING_PAGE_SIZE while more remain."""
+        for count, item in enumerate(items):
+            if count and count % LISTING_PAGE_SIZE == 0:
+                if input("Press Enter for more, or q to stop: ").strip().lower() == "q":
+                    return False
+            show(item)
+        return True
+
+    def _show_patient(self, patient):
+        print(f"\nID: {patient.patient_id}")
+        print(f"Name: {patient.name}")
+        print(f"Age: {patient.age}")
+        print(f"Gender: {patient.gender}")
+        print(f"Severity: {patient.severity}")
+        print(f"Room: {patient.room_id}")
+        if patient.disease:
+            print(f"Disease: {patient.disease}")
+        print("-" * 30)
+
     def list_patients(self):
-        """Display all patients in both AVL tree and priority queue"""
-        print("\n=== Current Patients (AVL Tree Order) ===")
-        if not self.avl_tree.root:
+        """Page through admitted patients in ID order, then in priority order"""
+        print("\n=== Current Patients (Patient ID Order) ===")
+        if not len(self.avl_tree):
             print("No patients currently in the system.")
-        else:
-            self.avl_tree.display_patients()
-            
+            return
+        if not self._page_through(self.avl_tree.range_scan(), self._show_patient):
+            return
+
         print("\n=== Current Patients (Priority Queue Order) ===")
-        self.priority_queue.display_patients()
+        self._page_through(self.priority_queue.iter_priority_order(), self._show_patient)
     
     def get_next_priority_patient(self):
-        next_patient = self.priority_queue.get_next_patient()
-        if next_patient:
+        result = self.next_patient()
+        if result:
+            next_patient = result.data
             print("\nNext priority patient for treatment:")
             print(f"ID: {next_patient.patient_id}")
             print(f"Name: {next_patient.name}")
@@ -576,7 +2860,7 @@ class EnhancedHospitalSystem:
             if next_patient.disease:
                 print(f"Disease: {next_patient.disease}")
         else:
-            print("No patients in priority queue")    
+            print(result.message)    
 
     def list_vacant_rooms(self):
         """Display all vacant rooms in the hospital"""
@@ -595,15 +2879,16 @@ class EnhancedHospitalSystem:
     def list_staff(self):
         """Display all staff members"""
         print("\n=== Hospital Staff ===")
-        staff_list = self.staff_manager.list_staff()
-        if not staff_list:
+        if not len(self.staff_manager):
             print("No staff members registered in the system.")
             return
-        for staff in staff_list:
+
+        def show(staff):
             print(f"ID: {staff.staff_id}")
             print(f"Name: {staff.name}")
             print(f"Role: {staff.role}")
             print("-" * 30)
+        self._page_through(self.staff_manager.staff.values(), show)
 
     def add_staff(self):
         """Add a new staff member to the system"""
@@ -611,14 +2896,7 @@ class EnhancedHospitalSystem:
             staff_id = input("Enter Staff ID: ")
             name = input("Enter Staff Name: ")
             role = input("Enter Staff Role: ")
-
-    
-            if not all([staff_id, name, role]):
-                raise ValueError("All fields must be filled")
-
-            new_staff = Staff(staff_id, name, role)
-            self.staff_manager.add_staff(new_staff)
-            print(f"\nStaff member {name} added successfully with ID: {staff_id}")
+            print(f"\n{self.register_staff(staff_id, name, role).message}")
 
         except ValueError as e:
             print(f"Error: {str(e)}")
@@ -633,49 +2911,213 @@ class EnhancedHospitalSystem:
             severity = int(input("Enter severity (1: Critical, 2: Moderate, 3: Mild): "))
             if not 1 <= severity <= 3:
                 raise ValueError("Severity must be between 1 and 3")
-            disease = input("Enter disease (optional): ").strip() or None
-            
-            self.current_id += 1
-            arrival_time = time.time()
-            
-            nearest_room = self.room_manager.find_nearest_vacant_room("Reception")
-            if not nearest_room:
-                print("No vacant rooms available for admission.")
-                return
+            disease = input("Enter disease (optional): ")
 
-            patient = Patient(self.current_id, name, age, gender, severity, arrival_time, disease)
-            patient.room_id = nearest_room
-            patient.add_history(f"Patient admitted at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-     
-            self.avl_tree.insert(patient)
-            self.priority_queue.add_patient(patient)
-            self.room_manager.rooms[nearest_room].is_vacant = False
-            
-            print(f"\nPatient added successfully with ID: {self.current_id}")
-            print(f"Assigned to room: {nearest_room}")
+            result = self.admit_patient(name, age, gender, severity, disease)
+            if not result:
+                print(result.message)
+                return
+            print(f"\n{result.message}")
+            print(f"Assigned to room: {result.data.room_id}")
             
         except ValueError as e:
             print(f"Error: {str(e)}")
         except Exception as e:
             print(f"An error occurred: {str(e)}")
 
+    def bulk_admit(self, patients, start_room_id="Reception"):
+        """Admit many patients at once, e.g. when replaying an intake file or restoring state.
+
+        The AVL tree is rebuilt balanced and the priority queue heapified in O(n)
+        instead of one rotation-heavy insert and sift per patient. Patients that
+        already carry a room_id keep it; the rest are matched, highest priority
+        first, to the nearest vacant room their severity allows (see
+        ROOM_TYPE_PREFERENCES), each lookup served by the vacancy index.
+        Patients left without a room stay in the waiting queue.
+        Returns (admitted_count, roomed_count).
+
+        The batch is all-or-nothing: a patient ID repeated in the batch or
+        already indexed, or a preset room_id that is unknown, occupied or
+        claimed twice, raises ValueError before anything is changed.
+        """
+        patients = list(patients)
+        self._check_bulk_admission(patients)
+        for patient in patients:
+            if patient.patient_id is None:
+                self.current_id += 1
+                patient.patient_id = self.current_id
+        if not patients:
+            return 0, 0
+
+        self.avl_tree.bulk_insert(patients)
+        self.priority_queue.add_patients(patients)
+        self.current_id = max(self.current_id, max(patient.patient_id for patient in patients))
+
+        rooms = self.room_manager.rooms
+        unassigned = []
+        for patient in patients:
+            if patient.room_id is None:
+                unassigned.append(patient)
+            else:
+                rooms[patient.room_id].is_vacant = False
+
+        roomed = len(patients) - len(unassigned)
+        # Pop patients in priority order from a heap instead of sorting the whole
+        # batch; once every room is taken the rest are never ordered at all.
+        order = [(patient.severity, patient.age, patient.arrival_time, position)
+                 for position, patient in enumerate(unassigned)]
+        heapq.heapify(order)
+        while order and self.room_manager.has_vacancy():
+            patient = unassigned[heapq.heappop(order)[3]]
+            room_id = self.room_manager.find_room_for_severity(start_room_id, patient.severity)
+            if room_id:
+                patient.room_id = room_id
+                rooms[room_id].is_vacant = False
+                roomed += 1
+        self.waiting_queue.add_patients([patient for patient in unassigned if patient.room_id is None])
+
+        admitted_at = f"Patient admitted at {self.timestamp()}"
+        for patient in patients:
+            patient.add_history(admitted_at)
+        if self.patient_table is not None:
+            self.patient_table.add_many(patients)
+        if self.metrics:
+            now = self.clock()
+            self.metrics.patients_arrived(patients, now)
+            for patient in patients:
+                if patient.room_id is not None:
+                    self.metrics.patient_roomed(patient, now)
+        if self.journal:
+            self.journal.append({"op": "admit", "patients": [patient_state(patient) for patient in patients]})
+        return len(patients), roomed
+
+    def _check_bulk_admission(self, patients):
+        # IDs handed out from current_id are always fresh, so only preset ones can clash.
+        seen = set()
+        check_index = len(self.avl_tree) > 0
+        for patient in patients:
+            patient_id = patient.patient_id
+            if patient_id is None:
+                continue
+            if patient_id in seen or (check_index and self.avl_tree.find_patient(patient_id) is not None):
+                raise ValueError(f"Duplicate patient ID {patient_id}")
+            seen.add(patient_id)
+        rooms = self.room_manager.rooms
+        claimed = set()
+        for patient in patients:
+            room_id = patient.room_id
+            if room_id is None:
+                continue
+            room = rooms.get(room_id)
+            if room is None:
+                raise ValueError(f"Patient {patient.patient_id}: unknown room {room_id!r}")
+            if not room.is_vacant or room_id in claimed:
+                raise ValueError(f"Patient {patient.patient_id}: room {room_id!r} is already occupied")
+            claimed.add(room_id)
+
+    def assign_batch(self, k=None, start_room_id="Reception"):
+        """Assign the top-k waiting patients to vacant rooms as one min-cost matching.
+
+        Each patient/room pair costs the corridor distance scaled by
+        SEVERITY_DISTANCE_WEIGHT plus ROOM_TYPE_TIER_COST per preference tier;
+        rooms outside a severity's tiers are forbidden. Every patient also has a
+        private "keep waiting" column costing more than any room for every
+        higher-ranked patient, so the matching serves patients strictly in
+        priority order where rooms allow and only then minimizes total cost.
+        Returns (assignments, stats): a list of (patient, room_id) pairs and a
+        dict of sizes, total cost, solver used and build/solve timings.
+        """
+        start = time.perf_counter()
+        queue = self.waiting_queue
+        entries = heapq.nsmallest(len(queue) if k is None else k, queue.heap)
+        patients = [entry[4] for entry in entries]
+        distances = self.room_manager.vacancy_index(start_room_id).distances
+        room_ids = list(self.room_manager.vacant_rooms_by_distance(start_room_id))
+        stats = {"patients": len(patients), "rooms": len(room_ids), "assigned": 0, "total_cost": 0.0,
+                 "solver": assignment_solver()}
+        if not patients or not room_ids:
+            stats["build_seconds"] = time.perf_counter() - start
+            stats["solve_seconds"] = 0.0
+            return [], stats
+
+        cost = self._assignment_costs(patients, room_ids, distances)
+        built = time.perf_counter()
+        columns = solve_assignment(cost)
+        solved = time.perf_counter()
+
+        rooms = self.room_manager.rooms
+        assignments = []
+        journaled = []
+        for row, (patient, column) in enumerate(zip(patients, columns)):
+            if column < len(room_ids):
+                room_id = room_ids[column]
+                patient.room_id = room_id
+                rooms[room_id].is_vacant = False
+                queue.remove_patient(patient.patient_id)
+                if self.patient_table is not None:
+                    self.patient_table.set_room(patient.patient_id, room_id)
+                if self.metrics:
+                    self.metrics.patient_roomed(patient)
+                patient.add_history(f"Assigned to room {room_id} at {self.timestamp()}")
+                assignments.append((patient, room_id))
+                journaled.append([patient.patient_id, room_id, patient.history[-1]])
+                stats["total_cost"] += float(cost[row][column])
+        if self.journal and journaled:
+            self.journal.append({"op": "assign", "rooms": journaled})
+        stats["assigned"] = len(assignments)
+        stats["build_seconds"] = built - start
+        stats["solve_seconds"] = solved - built
+        return assignments, stats
+
+    def _assignment_costs(self, patients, room_ids, distances):
+        # Columns are the rooms followed by one "keep waiting" column per patient.
+        rooms = self.room_manager.rooms
+        room_types = sorted({rooms[room_id].room_type for room_id in room_ids})
+        severities = sorted({patient.severity for patient in patients})
+        inf = float('inf')
+        tier_cost = {}
+        for severity in severities:
+            tiers = ROOM_TYPE_PREFERENCES.get(severity, (tuple(room_types),))
+            for room_type in room_types:
+                tier_cost[severity, room_type] = next(
+                    (tier * ROOM_TYPE_TIER_COST for tier, types in enumerate(tiers) if room_type in types), inf)
+        patient_count = len(patients)
+
+        if np is not None:
+            weight = np.array([SEVERITY_DISTANCE_WEIGHT.get(patient.severity, 1) for patient in patients], float)
+            distance = np.array([distances[room_id] for room_id in room_ids], float)
+            table = np.array([[tier_cost[severity, room_type] for room_type in room_types]
+                              for severity in severities])
+            severity_codes = np.array([severities.index(patient.severity) for patient in patients])
+            type_codes = np.array([room_types.index(rooms[room_id].room_type) for room_id in room_ids])
+            room_cost = np.outer(weight, distance) + table[severity_codes[:, None], type_codes[None, :]]
+            allowed = np.isfinite(room_cost)
+            step = (room_cost[allowed].max() if allowed.any() else 0.0) + 1
+            forbidden = (patient_count + 2) * step
+            room_cost[~allowed] = forbidden
+            wait_cost = np.full((patient_count, patient_count), forbidden)
+            np.fill_diagonal(wait_cost, (patient_count - np.arange(patient_count)) * step)
+            return np.hstack([room_cost, wait_cost])
+
+        room_cost = [[SEVERITY_DISTANCE_WEIGHT.get(patient.severity, 1) * distances[room_id]
+                      + tier_cost[patient.severity, rooms[room_id].room_type] for room_id in room_ids]
+                     for patient in patients]
+        step = max((value for row in room_cost for value in row if value != inf), default=0.0) + 1
+        forbidden = (patient_count + 2) * step
+        cost = []
+        for rank, row in enumerate(room_cost):
+            wait_row = [forbidden] * patient_count
+            wait_row[rank] = (patient_count - rank) * step
+            cost.append([forbidden if value == inf else value for value in row] + wait_row)
+        return cost
+
     def discharge_patient(self):
         try:
             patient_id = int(input("Enter patient ID to discharge: "))
-            patient = self.avl_tree.find_patient(patient_id)
-            
-            if patient:
-                if patient.room_id:
-                    self.room_manager.rooms[patient.room_id].is_vacant = True
-                    self.room_manager.rooms[patient.room_id].condition = "Dirty" 
-                    self.room_manager.cleaning_queue.add_room_to_cleaning(patient.room_id)
-                self.avl_tree.delete_patient(patient_id)
-                self.priority_queue.remove_patient(patient_id) 
-                print(f"Patient {patient.name} discharged successfully from room {patient.room_id}")
-                print(f"Room {patient.room_id} added to cleaning queue") 
-
-            else:
-                print("Patient not found")
+            result = self.discharge(patient_id)
+            print(result.message)
+            if result and result.data.room_id:
+                print(f"Room {result.data.room_id} added to cleaning queue") 
                 
         except ValueError:
             print("Please enter a valid patient ID")
@@ -683,45 +3125,31 @@ class EnhancedHospitalSystem:
             print(f"An error occurred: {str(e)}")
             
     def view_mst(self):
-        mst_edges = self.room_manager.graph.prim_mst("Power and Monitoring Hub")
+        result = self.network_design("Power and Monitoring Hub")
+        if not result:
+            print(result.message)
+            return
         print("\nMinimum Spanning Tree (MST) edges from Power and Monitoring Hub:")
-        for edge in mst_edges:
+        for edge in result.data["edges"]:
             print(f"{edge[0]} --({edge[2]})--> {edge[1]}")
+        print(f"Total length: {result.data['total_weight']}")
 
     def add_treatment(self):
         """Add a new treatment record to the system"""
         try:
             treatment_id = input("Enter Treatment ID: ")
             patient_id = int(input("Enter Patient ID: "))
-            
-            
-            patient = self.avl_tree.find_patient(patient_id)
-            if not patient:
+            if not self.admitted_patient(patient_id):
                 print("Patient not found.")
                 return
-                
             staff_id = input("Enter Staff ID: ")
-      
-            staff_exists = False
-            for staff in self.staff_manager.staff:
-                if staff.staff_id == staff_id:
-                    staff_exists = True
-                    break
-            if not staff_exists:
+            if staff_id not in self.staff_manager:
                 print("Staff member not found.")
                 return
-                
             treatment_details = input("Enter Treatment Details: ")
-            date = time.strftime("%Y-%m-%d")
-            
-            new_treatment = Treatment(treatment_id, patient_id, staff_id, treatment_details, date)
-            self.treatment_log.append(new_treatment)
-            
-      
-            patient.add_history(f"Treatment '{treatment_details}' performed on {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            patient.add_treatment(treatment_details)
-            
-            print(f"\nTreatment {treatment_id} recorded successfully for patient {patient.name}")
+
+            result = self.record_treatment(treatment_id, patient_id, staff_id, treatment_details)
+            print(f"\n{result.message}" if result else result.message)
             
         except ValueError as e:
             print(f"Error: {str(e)}")
@@ -730,21 +3158,26 @@ class EnhancedHospitalSystem:
 
     def show_treatment_records(self):
         print("\n=== Treatment Records ===")
-        treatments = self.treatment_log.list_data()
-        if not treatments:
+        if not len(self.treatment_log):
             print("No treatment records found.")
             return
             
-        for treatment in treatments:
+        # Stream the log a page at a time, and look each patient up only once.
+        patients = {}
+
+        def show(treatment):
             print(f"\nTreatment ID: {treatment.treatment_id}")
             print(f"Patient ID: {treatment.patient_id}")
-            patient = self.avl_tree.find_patient(treatment.patient_id)
+            if treatment.patient_id not in patients:
+                patients[treatment.patient_id] = self.avl_tree.find_patient(treatment.patient_id)
+            patient = patients[treatment.patient_id]
             if patient:
                 print(f"Patient Name: {patient.name}")
             print(f"Staff ID: {treatment.staff_id}")
             print(f"Treatment Details: {treatment.treatment_details}")
             print(f"Date: {treatment.date}")
             print("-" * 30)
+        self._page_through(self.treatment_log.iter_records(), show)
 
     def run(self):
         while True:
@@ -804,6 +3237,192 @@ class EnhancedHospitalSystem:
                 print(f"An error occurred: {str(e)}")
                 print("Please try again.")
 
+# Batch command name -> EnhancedHospitalSystem command API method.
+BATCH_COMMANDS = {
+    "admit": "admit_patient",
+    "discharge": "discharge",
+    "add_treatment": "record_treatment",
+    "update_priority": "update_priority",
+    "add_staff": "register_staff",
+    "next_patient": "next_patient",
+    "find_patient": "find_patient",
+    "clean_room": "mark_room_clean",
+    "census": "census",
+    "metrics": "operational_metrics",
+    "profile": "profiling",
+    "next_patients": "next_patients",
+    "patients": "patients_page",
+    "treatments": "treatments_page",
+    "staff": "staff_page",
+    "network": "network_design",
+    "route": "route",
+    "locate": "locate",
+    "nearest_asset": "nearest_asset",
+}
+
+# Hot paths timed while PROFILER is enabled. The AVL tree and heap loops count their
+# own comparisons and add them to PROFILER.counters when PROFILER.enabled is set.
+PROFILER = Profiler()
+PROFILER.register(RoomManager, "find_nearest_vacant_room")
+PROFILER.register(RoomManager, "find_room_for_severity")
+PROFILER.register(AVLTree, "insert")
+PROFILER.register(AVLTree, "find_patient")
+PROFILER.register(AVLTree, "delete_patient")
+PROFILER.register(AVLTree, "right_rotate", timed=False, counter=rotation)
+PROFILER.register(AVLTree, "left_rotate", timed=False, counter=rotation)
+for index_class in (DictPatientIndex, SortedArrayPatientIndex, BTreePatientIndex, CachedPatientIndex):
+    for method_name in ("insert", "find_patient", "delete_patient"):
+        PROFILER.register(index_class, method_name)
+PROFILER.register(MinHeapPriorityQueue, "_up_heap", "MinHeapPriorityQueue.sift_up")
+PROFILER.register(MinHeapPriorityQueue, "_down_heap", "MinHeapPriorityQueue.sift_down")
+PROFILER.register(TreatmentLog, "append")
+PROFILER.register(Room, "is_vacant", "Room.is_vacant (set)")
+
+def read_commands(stream, file_format="jsonl"):
+    """Yield commands from a JSONL or CSV stream, for run_batch.
+
+    JSONL lines are objects such as {"op": "admit", "name": "Ann", "age": 40,
+    "gender": "F", "severity": 1}; they are yielded as text and parsed by
+    parse_command, so a malformed line fails only its own command. CSV files
+    need a header row with an "op" column and yield dicts; empty cells are
+    left out so optional arguments keep their defaults.
+    """
+    if file_format == "csv":
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if value not in ("", None)}
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+def parse_command(command):
+    """Split a command dict, or one JSONL line, into (op, arguments). Raises ValueError if malformed."""
+    if isinstance(command, str):
+        command = json.loads(command)
+    if not isinstance(command, dict):
+        raise ValueError(f"Command must be a JSON object, not {type(command).__name__}")
+    arguments = dict(command)
+    return arguments.pop("op", None), arguments
+
+class BatchReport:
+    """Throughput and per-command latency collected by run_batch."""
+
+    def __init__(self):
+        self.latencies = {}      # command -> [seconds]
+        self.failures = Counter()
+        self.errors = []         # (command number, message) for commands that raised
+        self.elapsed = 0.0
+
+    def record(self, command, seconds, ok):
+        self.latencies.setdefault(command, []).append(seconds)
+        if not ok:
+            self.failures[command] += 1
+
+    @property
+    def total(self):
+        return sum(len(latencies) for latencies in self.latencies.values())
+
+    def display(self):
+        total = self.total
+        throughput = total / self.elapsed if self.elapsed else 0.0
+        print(f"{total} commands in {self.elapsed:.3f} s ({throughput:,.0f} commands/s)")
+        print(f"{'command':<16}{'count':>9}{'failed':>9}{'mean us':>11}{'p50 us':>11}{'p99 us':>11}{'max us':>11}")
+        for command, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            count = len(latencies)
+            p50 = latencies[(count - 1) // 2]
+            p99 = latencies[min(count - 1, int(count * 0.99))]
+            print(f"{command:<16}{count:>9}{self.failures[command]:>9}{sum(latencies) / count * 1e6:>11.1f}"
+                  f"{p50 * 1e6:>11.1f}{p99 * 1e6:>11.1f}{latencies[-1] * 1e6:>11.1f}")
+        for number, message in self.errors[:10]:
+            print(f"  command {number}: {message}")
+        if len(self.errors) > 10:
+            print(f"  ... and {len(self.errors) - 10} more errors")
+
+def run_batch(system, commands):
+    """Execute commands (dicts or JSONL lines) against the command API as fast as possible.
+
+    A command that is malformed or raises is counted as failed and listed in
+    report.errors; the batch carries on.
+    """
+    report = BatchReport()
+    clock = time.perf_counter
+    started = clock()
+    for number, command in enumerate(commands, 1):
+        name = None
+        start = clock()
+        try:
+            name, arguments = parse_command(command)
+            method = BATCH_COMMANDS.get(name)
+            if method is None:
+                raise ValueError(f"Unknown command {name!r}")
+            ok = getattr(system, method)(**arguments).ok
+        except (ValueError, TypeError) as e:
+            ok = False
+            report.errors.append((number, str(e)))
+        except Exception as e:
+            # Never let one bad command abort the batch and lose the report.
+            ok = False
+            report.errors.append((number, f"An error occurred: {e}"))
+        report.record(str(name), clock() - start, ok)
+    report.elapsed = clock() - started
+    return report
+
 if __name__ == "__main__":
-    hospital_system = EnhancedHospitalSystem()
-    hospital_system.run()
+    parser = argparse.ArgumentParser(description="Enhanced Hospital Management System")
+    parser.add_argument("--index", choices=sorted(PATIENT_INDEX_BACKENDS), default="avl",
+                        help="patient ID index backend")
+    parser.add_argument("--fanout", type=int, default=64, help="node fanout for the btree backend")
+    parser.add_argument("--priority-cleaning", action="store_true",
+                        help="clean rooms of the type with the most waiting patients first")
+    parser.add_argument("--batch", metavar="PATH",
+                        help="run commands from a JSONL or CSV file ('-' for stdin) instead of the menu")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="batch file format (default: from the file extension, else jsonl)")
+    parser.add_argument("--data-dir", metavar="PATH",
+                        help="keep state in a journal and snapshots under PATH and restore it on start")
+    parser.add_argument("--sqlite", metavar="PATH",
+                        help="keep state and full history in a SQLite database and restore it on start")
+    parser.add_argument("--cache-size", type=int, metavar="N",
+                        help="with --sqlite, keep at most N discharged patients in memory for lookups")
+    parser.add_argument("--profile", action="store_true",
+                        help="time the hot paths and print a report on exit")
+    parser.add_argument("--profile-json", metavar="PATH",
+                        help="time the hot paths and write the histograms as JSON to PATH on exit")
+    args = parser.parse_args()
+    if args.profile or args.profile_json:
+        PROFILER.enable()
+    if args.data_dir and args.sqlite:
+        parser.error("--data-dir and --sqlite are mutually exclusive")
+    index_options = {"fanout": args.fanout} if args.index == "btree" else {}
+    hospital_system = EnhancedHospitalSystem(args.index, args.priority_cleaning, **index_options)
+    store = None
+    if args.data_dir:
+        from persistence import HospitalStore
+        # The interactive menu makes every command durable before showing its result.
+        store = HospitalStore(args.data_dir, group_size=256 if args.batch else 1)
+        store.open(hospital_system)
+    elif args.sqlite:
+        from sqlite_store import SQLiteStore
+        store = SQLiteStore(args.sqlite, batch_size=1_000 if args.batch else 1, cache_size=args.cache_size)
+        store.open(hospital_system)
+    try:
+        if args.batch:
+            file_format = args.format or ("csv" if args.batch.endswith(".csv") else "jsonl")
+            if args.batch == "-":
+                report = run_batch(hospital_system, read_commands(sys.stdin, file_format))
+            else:
+                with open(args.batch, newline="") as stream:
+                    report = run_batch(hospital_system, read_commands(stream, file_format))
+            report.display()
+        else:
+            hospital_system.run()
+    finally:
+        if store:
+            store.close()
+        if args.profile:
+            print(PROFILER.report())
+        if args.profile_json:
+            with open(args.profile_json, "w") as stream:
+                stream.write(PROFILER.dumps())
@@ -0,0 +1,291 @@
+"""Streaming operational metrics for EnhancedHospitalSystem.
+
+HospitalMetrics is fed one call per event (arrival matched to a room,
+discharge, treatment, room cleaned, room occupied or vacated) and keeps, per
+severity and per room type:
+
+- sliding-window event counters for throughput (admissions, discharges,
+  treatments, cleanings over the last window),
+- quantile sketches for the wait between arrival and getting a room, for
+  length of stay and for room turnaround (dirty to clean),
+- an occupancy time series, from which current and time-weighted occupancy
+  over the window are read.
+
+Every update is O(1) (amortized for the window counters); readouts cost
+O(buckets) and never walk patients or rooms. Metrics cover the running
+process only: restoring a snapshot or journal replays state, not history.
+"""
+import math
+import time
+from collections import Counter, deque
+
+
+class SlidingWindowCounter:
+    """Event count over the last `window` seconds, kept in `buckets` time slices."""
+
+    def __init__(self, window=3600.0, buckets=60):
+        self.window = window
+        self.buckets = buckets
+        self.width = window / buckets
+        self.slices = deque()  # [slice number, count], oldest first
+        self.total = 0
+
+    def _expire(self, now):
+        oldest = math.floor(now / self.width) - self.buckets + 1
+        slices = self.slices
+        while slices and slices[0][0] < oldest:
+            self.total -= slices.popleft()[1]
+
+    def add(self, now, count=1):
+        number = math.floor(now / self.width)
+        slices = self.slices
+        if slices and slices[-1][0] == number:
+            slices[-1][1] += count
+        else:
+            slices.append([number, count])
+        self.total += count
+        self._expire(now)
+
+    def count(self, now):
+        self._expire(now)
+        return self.total
+
+    def rate(self, now):
+        """Events per second over the window."""
+        return self.count(now) / self.window
+
+
+class QuantileSketch:
+    """Log-bucketed histogram with bounded relative error (a DDSketch).
+
+    Values are counted in buckets whose bounds grow by a factor of
+    (1 + accuracy) / (1 - accuracy), so any quantile is returned within
+    `accuracy` relative error. Adding is O(1); a quantile costs O(B log B) for
+    the B buckets in use, a few hundred even for values spanning seconds to weeks.
+    """
+
+    def __init__(self, accuracy=0.01, minimum=1e-3):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.minimum = minimum  # values at or below this count as zero
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value <= self.minimum:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), or None when empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self, quantiles=(0.5, 0.95, 0.99)):
+        result = {"count": self.count, "mean": self.mean()}
+        for q in quantiles:
+            result[f"p{round(q * 100)}"] = self.quantile(q)
+        return result
+
+
+class OccupancySeries:
+    """Occupied-room count over time for one room type.
+
+    Each change stores the running integral of occupied rooms over time, so
+    the time-weighted average over the window is a difference of two
+    integrals, O(1) amortized after dropping changes older than the window.
+    """
+
+    def __init__(self, window=3600.0, now=None):
+        self.window = window
+        self.occupied = 0
+        start = time.time() if now is None else now
+        self.changes = deque([(start, 0, 0.0)])  # (time, occupied from then on, integral up to time)
+
+    def _trim(self, start):
+        # Keep one change at or before the window start to know the level there.
+        changes = self.changes
+        while len(changes) > 1 and changes[1][0] <= start:
+            changes.popleft()
+
+    def change(self, now, delta):
+        changed_at, occupied, integral = self.changes[-1]
+        self.occupied += delta
+        self.changes.append((now, self.occupied, integral + occupied * (now - changed_at)))
+        self._trim(now - self.window)
+
+    def average(self, now):
+        """Time-weighted mean occupied rooms over the last window."""
+        start = now - self.window
+        self._trim(start)
+        first_at, first_occupied, first_integral = self.changes[0]
+        last_at, last_occupied, last_integral = self.changes[-1]
+        begin = max(start, first_at)
+        covered = now - begin
+        if covered <= 0:
+            return float(self.occupied)
+        at_begin = first_integral + first_occupied * (begin - first_at)
+        at_now = last_integral + last_occupied * (now - last_at)
+        return (at_now - at_begin) / covered
+
+
+class HospitalMetrics:
+    """Per-severity and per-room-type streaming aggregates for one hospital."""
+
+    def __init__(self, room_manager, window=3600.0, buckets=60, clock=time.time):
+        self.room_manager = room_manager
+        self.window = window
+        self.buckets = buckets
+        self.clock = clock
+        self.counters = {}       # (event, key) -> SlidingWindowCounter
+        self.totals = {}         # (event, key) -> count since start
+        self.waits = {}          # severity -> QuantileSketch, arrival to room
+        self.stays = {}          # severity -> QuantileSketch, room to discharge
+        self.turnarounds = {}    # room_type -> QuantileSketch, dirty to clean
+        self.occupancy = {}      # room_type -> OccupancySeries
+        self.occupied_rooms = set()  # rooms counted in occupancy
+        self.roomed_at = {}      # patient_id -> (time roomed, severity)
+        self.dirty_since = {}    # room_id -> time the room needed cleaning
+        now = clock()
+        for room_type in room_manager.vacant_rooms:
+            self._series(room_type, now)
+        room_manager.occupancy_listeners.append(self.room_changed)
+        room_manager.room_listeners.append(self.room_added)
+
+    def _count(self, event, key, now, count=1):
+        counter = self.counters.get((event, key))
+        if counter is None:
+            counter = self.counters[event, key] = SlidingWindowCounter(self.window, self.buckets)
+        counter.add(now, count)
+        self.totals[event, key] = self.totals.get((event, key), 0) + count
+
+    @staticmethod
+    def _sketch(sketches, key):
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = QuantileSketch()
+        return sketch
+
+    # Events
+
+    def patient_arrived(self, patient, now=None):
+        self._count("arrivals", patient.severity, self.clock() if now is None else now)
+
+    def patients_arrived(self, patients, now=None):
+        """Count a batch of arrivals with one counter update per severity."""
+        now = self.clock() if now is None else now
+        for severity, count in Counter(patient.severity for patient in patients).items():
+            self._count("arrivals", severity, now, count)
+
+    def patient_roomed(self, patient, now=None):
+        """A patient got a room: record the wait since arrival."""
+        now = self.clock() if now is None else now
+        self._sketch(self.waits, patient.severity).add(max(0.0, now - patient.arrival_time))
+        self.roomed_at[patient.patient_id] = (now, patient.severity)
+        self._count("admissions", patient.severity, now)
+
+    def patient_discharged(self, patient, now=None):
+        now = self.clock() if now is None else now
+        roomed = self.roomed_at.pop(patient.patient_id, None)
+        if roomed is not None:
+            self._sketch(self.stays, roomed[1]).add(now - roomed[0])
+        if patient.room_id is not None:
+            self.dirty_since.setdefault(patient.room_id, now)
+        self._count("discharges", patient.severity, now)
+
+    def treatment_recorded(self, patient, now=None):
+        self._count("treatments", patient.severity, self.clock() if now is None else now)
+
+    def room_cleaned(self, room_id, now=None):
+        now = self.clock() if now is None else now
+        room_type = self.room_manager.rooms[room_id].room_type
+        dirty_since = self.dirty_since.pop(room_id, None)
+        if dirty_since is not None:
+            self._sketch(self.turnarounds, room_type).add(now - dirty_since)
+        self._count("cleanings", room_type, now)
+
+    def _series(self, room_type, now):
+        series = self.occupancy.get(room_type)
+        if series is None:
+            series = self.occupancy[room_type] = OccupancySeries(self.window, now)
+        return series
+
+    def room_changed(self, room_id, is_vacant, now=None):
+        """RoomManager occupancy listener: a room was occupied or vacated.
+
+        Only rooms counted as occupied are uncounted when vacated, so rooms
+        that were occupied before the metrics attached (Reception, or a room
+        restored without its listener) can never drive a count below zero.
+        """
+        now = self.clock() if now is None else now
+        if is_vacant:
+            if room_id not in self.occupied_rooms:
+                return
+            self.occupied_rooms.discard(room_id)
+        else:
+            if room_id in self.occupied_rooms:
+                return
+            self.occupied_rooms.add(room_id)
+        self._series(self.room_manager.rooms[room_id].room_type, now).change(now, -1 if is_vacant else 1)
+
+    def room_added(self, room_id, now=None):
+        """RoomManager room listener: a new room adds capacity, and occupancy if it arrives occupied."""
+        now = self.clock() if now is None else now
+        self._series(self.room_manager.rooms[room_id].room_type, now)
+        if not self.room_manager.rooms[room_id].is_vacant:
+            self.room_changed(room_id, False, now)
+
+    # Readouts
+
+    def throughput(self, event, now=None):
+        """{key: events in the last window} for one event type."""
+        now = self.clock() if now is None else now
+        return {key: counter.count(now) for (name, key), counter in sorted(self.counters.items(), key=str)
+                if name == event}
+
+    def room_occupancy(self, now=None):
+        """{room_type: {"occupied", "rooms", "current", "window_average"}}."""
+        now = self.clock() if now is None else now
+        vacant_rooms = self.room_manager.vacant_rooms
+        result = {}
+        for room_type, series in sorted(self.occupancy.items()):
+            rooms = series.occupied + len(vacant_rooms.get(room_type, ()))
+            result[room_type] = {
+                "occupied": series.occupied,
+                "rooms": rooms,
+                "current": series.occupied / rooms if rooms else None,
+                "window_average": series.average(now) / rooms if rooms else None,
+            }
+        return result
+
+    def snapshot(self, now=None):
+        """Every aggregate as plain values, for reports and the metrics command."""
+        now = self.clock() if now is None else now
+        return {
+            "window_seconds": self.window,
+            "throughput": {event: self.throughput(event, now)
+                           for event in ("arrivals", "admissions", "discharges", "treatments", "cleanings")},
+            "wait_seconds": {severity: sketch.summary() for severity, sketch in sorted(self.waits.items())},
+            "stay_seconds": {severity: sketch.summary() for severity, sketch in sorted(self.stays.items())},
+            "turnaround_seconds": {room_type: sketch.summary()
+                                   for room_type, sketch in sorted(self.turnarounds.items())},
+            "occupancy": self.room_occupancy(now),
+        }
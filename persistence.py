@@ -0,0 +1,418 @@
+"""Write-ahead journal and snapshots for EnhancedHospitalSystem.
+
+Every successful state-changing command appends one record describing its
+effect to an append-only journal of JSON lines, each tagged with a log
+sequence number (lsn). Records are buffered and written with a single write
+and fsync per group (group commit), so throughput is bounded by the disk's
+fsync rate per group, not per command. A group is committed when it is full,
+or by a background thread once its oldest record is commit_interval old, so a
+quiet journal never holds a record for longer than that. Records still in the
+buffer when the process dies are lost; call commit() (or use group_size=1)
+where every command must be durable before it is acknowledged.
+
+Every snapshot_every records the store writes a compact binary snapshot of the
+whole system, starts a fresh journal segment and deletes the files the
+snapshot replaces. Restart loads the newest snapshot through the O(n) bulk
+paths (PatientIndex.bulk_insert, MinHeapPriorityQueue.add_patients,
+StaffManager.add_many, TreatmentLog.extend) and replays only the journal
+records written after it.
+
+Directory layout:
+
+    snapshot-000000001234.bin   state as of lsn 1234
+    journal-000000001235.log    records from lsn 1235 on
+
+Snapshots are pickles of plain values (dicts, lists, tuples, strings and
+numbers) tagged with SNAPSHOT_VERSION. They are read back with an unpickler
+that refuses every class and function reference, so a tampered snapshot can
+fail to load but cannot run code. The directory is still trusted input:
+anyone who can write to it can rewrite the hospital's state, so it should be
+writable only by the service's own user.
+"""
+import gc
+import json
+import math
+import os
+import pickle
+import threading
+import time
+
+from main import EnhancedHospitalSystem, Room, Staff, Treatment, patient_from_state, patient_state
+
+SNAPSHOT_VERSION = 2  # 2 added room types and corridors
+
+
+def _fsync_directory(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _numbered_files(directory, prefix, suffix):
+    """Return (number, path) pairs for prefix-NNN.suffix files, in number order."""
+    found = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix):
+            number = name[len(prefix):-len(suffix)]
+            if number.isdigit():
+                found.append((int(number), os.path.join(directory, name)))
+    return sorted(found)
+
+
+class Journal:
+    """One append-only journal segment with group commit.
+
+    commit_interval=float("inf") turns timed commits off: a group is then
+    committed only when full or by commit().
+    """
+
+    def __init__(self, path, next_lsn, group_size=256, commit_interval=0.01, fsync=True):
+        self.path = path
+        self.file = open(path, "ab")
+        self.lsn = next_lsn - 1
+        self.group_size = group_size
+        self.commit_interval = commit_interval
+        self.fsync = fsync
+        self.buffer = []
+        self.first_buffered = None
+        self.commits = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.flusher = None
+        if commit_interval and math.isfinite(commit_interval):
+            self.flusher = threading.Thread(target=self._flush_when_due, name=f"journal flush {path}",
+                                            daemon=True)
+            self.flusher.start()
+
+    def append(self, record):
+        """Buffer one record and return its lsn; commits when the group is full or old enough."""
+        with self.condition:
+            self.lsn += 1
+            record["lsn"] = self.lsn
+            self.buffer.append(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+            now = time.monotonic()
+            if self.first_buffered is None:
+                self.first_buffered = now
+                self.condition.notify()
+            if len(self.buffer) >= self.group_size or now - self.first_buffered >= self.commit_interval:
+                self._commit()
+            return self.lsn
+
+    def commit(self):
+        """Write and fsync every buffered record."""
+        with self.condition:
+            self._commit()
+
+    def _commit(self):
+        if not self.buffer:
+            return
+        self.file.write(b"".join(self.buffer))
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+        self.buffer.clear()
+        self.first_buffered = None
+        self.commits += 1
+
+    def _flush_when_due(self):
+        # Commits a partly filled group that no further append would. If a commit
+        # fails here the thread ends (its traceback is printed); the records stay
+        # buffered and the next append or commit() retries and raises to its caller.
+        with self.condition:
+            while not self.closed:
+                if self.first_buffered is None:
+                    self.condition.wait()
+                    continue
+                delay = self.first_buffered + self.commit_interval - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                else:
+                    self._commit()
+
+    def close(self):
+        with self.condition:
+            self._commit()
+            self.closed = True
+            self.condition.notify()
+        if self.flusher is not None:
+            self.flusher.join()
+        self.file.close()
+
+
+def read_journal(path, truncate_torn_tail=False):
+    """Yield the records in one journal segment.
+
+    A crash can leave the last line half-written. With truncate_torn_tail the
+    file is cut back to the last whole record; otherwise an unreadable line
+    raises ValueError.
+    """
+    with open(path, "rb+" if truncate_torn_tail else "rb") as stream:
+        good_offset = 0
+        for line in stream:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("incomplete record")
+                record = json.loads(line)
+            except ValueError:
+                if not truncate_torn_tail:
+                    raise ValueError(f"Corrupt journal record in {path} at byte {good_offset}")
+                stream.truncate(good_offset)
+                return
+            good_offset += len(line)
+            yield record
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    """Unpickler for snapshot_state output: builtin containers and scalars only."""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Snapshots hold plain values only, not {module}.{name}")
+
+
+def restore_patients(system, patients):
+    """Put already-admitted patients back into the index, queues and rooms.
+
+    Unlike bulk_admit this never searches for rooms or adds history: each
+    patient is restored exactly as recorded. Small batches against a large
+    index use per-patient inserts; big ones use the O(n) bulk paths.
+    """
+    if not patients:
+        return
+    if len(patients) * 8 < len(system.avl_tree):
+        for patient in patients:
+            system.avl_tree.insert(patient)
+            system.priority_queue.add_patient(patient)
+    else:
+        system.avl_tree.bulk_insert(patients)
+        system.priority_queue.add_patients(patients)
+    rooms = system.room_manager.rooms
+    for patient in patients:
+        if patient.room_id is None:
+            system.waiting_queue.add_patient(patient)
+        else:
+            rooms[patient.room_id].is_vacant = False
+    if system.patient_table is not None:
+        system.patient_table.add_many(patients)
+    system.current_id = max(system.current_id, max(patient.patient_id for patient in patients))
+
+
+def replay(system, record):
+    """Apply one journal record to a system whose journal is detached."""
+    op = record["op"]
+    if op == "admit":
+        restore_patients(system, [patient_from_state(state) for state in record["patients"]])
+    elif op == "discharge":
+        system.discharge(record["patient_id"])
+    elif op == "treatment":
+        system.apply_treatment(Treatment(*record["treatment"]), record["history"])
+    elif op == "update_priority":
+        system.apply_priority(record["patient_id"], record["severity"], record["age"], record["history"])
+    elif op == "staff":
+        system.staff_manager.add_staff(Staff(*record["staff"]))
+    elif op == "clean":
+        system.mark_room_clean(record["room_id"])
+    elif op == "assign":
+        rooms = system.room_manager.rooms
+        for patient_id, room_id, history in record["rooms"]:
+            patient = system.avl_tree.find_patient(patient_id)
+            patient.room_id = room_id
+            rooms[room_id].is_vacant = False
+            system.waiting_queue.remove_patient(patient_id)
+            if system.patient_table is not None:
+                system.patient_table.set_room(patient_id, room_id)
+            patient.add_history(history)
+    else:
+        raise ValueError(f"Unknown journal record {op!r}")
+
+
+def snapshot_state(system):
+    """Capture the whole system as plain, column-oriented values."""
+    treatments = list(system.treatment_log)
+    queued = sorted(system.priority_queue.heap, key=lambda entry: entry[3])
+    waiting = sorted(system.waiting_queue.heap, key=lambda entry: entry[3])
+    return {
+        "version": SNAPSHOT_VERSION,
+        "current_id": system.current_id,
+        "patients": [patient_state(patient) for patient in system.avl_tree.range_scan()],
+        "queued": [entry[4].patient_id for entry in queued],
+        "waiting": [entry[4].patient_id for entry in waiting],
+        "rooms": [(room.room_id, room.room_type, room.is_vacant, room.condition)
+                  for room in system.room_manager.rooms.values()],
+        "corridors": list(system.room_manager.graph.edges()),
+        "cleaning": list(system.room_manager.cleaning_queue.cleaning_queue),
+        "staff": [(staff.staff_id, staff.name, staff.role) for staff in system.staff_manager.list_staff()],
+        "treatments": [[treatment.treatment_id for treatment in treatments],
+                       [treatment.patient_id for treatment in treatments],
+                       [treatment.staff_id for treatment in treatments],
+                       [treatment.treatment_details for treatment in treatments],
+                       [treatment.date for treatment in treatments]],
+    }
+
+
+def load_state(system, state):
+    """Rebuild a freshly constructed system from snapshot_state output.
+
+    Rooms and corridors come first, so that rooms added after construction
+    (add_room, workload.make_campus) exist before patients are put in them.
+    """
+    if state.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {state.get('version')!r}")
+    room_manager = system.room_manager
+    rooms = room_manager.rooms
+    for room_id, room_type, is_vacant, condition in state["rooms"]:
+        room = rooms.get(room_id)
+        if room is None:
+            room = Room(room_id, is_vacant, room_type)
+            room_manager.add_room(room)
+        else:
+            room.is_vacant = is_vacant
+        room.condition = condition
+    graph = room_manager.graph
+    corridors = {(from_room, to_room): weight for from_room, to_room, weight in state["corridors"]}
+    for from_room, to_room, _ in list(graph.edges()):
+        if (from_room, to_room) not in corridors and (to_room, from_room) not in corridors:
+            graph.remove_edge(from_room, to_room)
+    for (from_room, to_room), weight in corridors.items():
+        graph.add_edge(from_room, to_room, weight)
+
+    patients = [patient_from_state(fields) for fields in state["patients"]]
+    by_id = {patient.patient_id: patient for patient in patients}
+    system.avl_tree.bulk_insert(patients)
+    system.priority_queue.add_patients([by_id[patient_id] for patient_id in state["queued"]])
+    system.waiting_queue.add_patients([by_id[patient_id] for patient_id in state["waiting"]])
+    if system.patient_table is not None:
+        system.patient_table.add_many(patients)
+    for room_id in state["cleaning"]:
+        room_manager.cleaning_queue.add_room_to_cleaning(room_id)
+    system.staff_manager.add_many(Staff(*fields) for fields in state["staff"])
+    system.treatment_log.extend(map(Treatment, *state["treatments"]))
+    system.current_id = state["current_id"]
+
+
+class HospitalStore:
+    """Durable home for one EnhancedHospitalSystem in a directory.
+
+    open() restores the system and attaches the journal; every command after
+    that is journaled automatically. Call close() on shutdown so buffered
+    records reach the disk.
+    """
+
+    def __init__(self, directory, group_size=256, commit_interval=0.01, snapshot_every=100_000, fsync=True):
+        self.directory = directory
+        self.group_size = group_size
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.system = None
+        self.journal = None
+        self.snapshot_lsn = 0
+        self.replayed = 0
+
+    def open(self, system=None, **system_options):
+        """Load the latest snapshot, replay the journal tail and return the system.
+
+        Restores into `system` if given (it must be freshly constructed),
+        else into a new EnhancedHospitalSystem(**system_options).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if system is None:
+            system = EnhancedHospitalSystem(**system_options)
+        # Restoring allocates millions of objects and none of them are garbage;
+        # with the cyclic collector running it rescans the growing heap over and
+        # over and dominates restart time.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        # Replayed commands are history, not live events for the metrics engine.
+        metrics, system.metrics = system.metrics, None
+        try:
+            lsn, segments = self._recover(system)
+        finally:
+            system.metrics = metrics
+            if gc_was_enabled:
+                gc.enable()
+
+        self.system = system
+        if segments and segments[-1][0] > self.snapshot_lsn:
+            # Keep appending to the (already truncated) last segment.
+            self.journal = Journal(segments[-1][1], lsn + 1, self.group_size, self.commit_interval, self.fsync)
+        else:
+            self._start_segment(lsn + 1)
+        system.journal = self
+        return system
+
+    def _recover(self, system):
+        snapshots = _numbered_files(self.directory, "snapshot-", ".bin")
+        lsn = 0
+        if snapshots:
+            lsn, path = snapshots[-1]
+            with open(path, "rb") as stream:
+                load_state(system, _PlainUnpickler(stream).load())
+        self.snapshot_lsn = lsn
+
+        segments = _numbered_files(self.directory, "journal-", ".log")
+        self.replayed = 0
+        for position, (_, path) in enumerate(segments):
+            last_segment = position == len(segments) - 1
+            for record in read_journal(path, truncate_torn_tail=last_segment):
+                if record["lsn"] <= lsn:
+                    continue
+                if record["lsn"] != lsn + 1:
+                    raise ValueError(f"Journal gap: expected lsn {lsn + 1}, found {record['lsn']}")
+                replay(system, record)
+                lsn = record["lsn"]
+                self.replayed += 1
+        return lsn, segments
+
+    def _start_segment(self, next_lsn):
+        path = os.path.join(self.directory, f"journal-{next_lsn:012d}.log")
+        self.journal = Journal(path, next_lsn, self.group_size, self.commit_interval, self.fsync)
+        if self.fsync:
+            _fsync_directory(self.directory)
+
+    def __bool__(self):
+        return self.journal is not None
+
+    @property
+    def lsn(self):
+        return self.journal.lsn
+
+    def append(self, record):
+        lsn = self.journal.append(record)
+        if self.snapshot_every and lsn - self.snapshot_lsn >= self.snapshot_every:
+            self.snapshot()
+        return lsn
+
+    def commit(self):
+        self.journal.commit()
+
+    def snapshot(self):
+        """Write a snapshot of the current state and drop the files it supersedes."""
+        self.journal.commit()
+        lsn = self.journal.lsn
+        path = os.path.join(self.directory, f"snapshot-{lsn:012d}.bin")
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as stream:
+            pickle.dump(snapshot_state(self.system), stream, protocol=pickle.HIGHEST_PROTOCOL)
+            stream.flush()
+            if self.fsync:
+                os.fsync(stream.fileno())
+        os.replace(temporary, path)
+        self.journal.close()
+        self._start_segment(lsn + 1)
+        self.snapshot_lsn = lsn
+        for number, old_path in _numbered_files(self.directory, "snapshot-", ".bin"):
+            if number < lsn:
+                os.remove(old_path)
+        for number, old_path in _numbered_files(self.directory, "journal-", ".log"):
+            if number <= lsn:
+                os.remove(old_path)
+        return path
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if self.system is not None:
+            self.system.journal = None
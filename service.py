@@ -0,0 +1,219 @@
+"""Asyncio service front-end for EnhancedHospitalSystem.
+
+Many triage terminals can share one hospital over TCP or a Unix socket using a
+line-delimited JSON protocol. Each request is one JSON object per line:
+
+    {"id": 7, "op": "admit", "name": "Ann", "age": 40, "gender": "F", "severity": 1}
+
+and gets back one line with the same id:
+
+    {"id": 7, "ok": true, "message": "Patient added successfully with ID: 1", "data": {...}}
+
+The ops are the batch commands from main.BATCH_COMMANDS; the ones in
+READ_ONLY_COMMANDS below never change state.
+
+Every state-changing op is queued to a single writer task, so the heap, patient
+index and RoomManager are only ever mutated in one place, one command at a
+time. Read-only ops are answered directly by each connection's handler. A
+command runs synchronously on the event loop and never yields partway through,
+so a read always sees the state between two whole mutations, never a
+half-applied one.
+
+Reads run on the live structures, not on snapshots.SnapshotPublisher views.
+Because of the point above they are already consistent without copies, and
+one event loop under the GIL would not run them any more in parallel from a
+snapshot. Snapshots also hold only patients, rooms and the cleaning queue,
+not the treatments, staff, census, metrics or routing these ops answer.
+Dashboards reading from other threads in the same process should attach a
+SnapshotPublisher and read its current view.
+
+With --data-dir or --sqlite the writer persists mutations through
+persistence.HospitalStore or sqlite_store.SQLiteStore and group-commits: it
+runs every mutation already queued, commits once, and only then answers them
+all, so an acknowledged mutation is durable. If that commit fails, the group's
+changes are applied in memory but not stored: every one of them, and every
+mutation after it, is answered with ok false, and the service shuts down
+rather than build on state the store has lost.
+
+Run ``python service.py --help`` for options.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from main import BATCH_COMMANDS, EnhancedHospitalSystem, Patient, Staff, Treatment
+from persistence import HospitalStore
+from sqlite_store import SQLiteStore
+
+READ_ONLY_COMMANDS = {"next_patient", "find_patient", "census", "metrics", "next_patients", "patients", "treatments",
+                      "staff", "network", "route", "nearest_asset"}
+
+
+def to_json_data(data):
+    """Copy a command result payload into plain JSON values."""
+    if isinstance(data, Patient):
+        return {"patient_id": data.patient_id, "name": data.name, "age": data.age, "gender": data.gender,
+                "severity": data.severity, "room_id": data.room_id, "disease": data.disease}
+    if isinstance(data, Treatment):
+        return {"treatment_id": data.treatment_id, "patient_id": data.patient_id, "staff_id": data.staff_id,
+                "treatment_details": data.treatment_details, "date": data.date}
+    if isinstance(data, Staff):
+        return {"staff_id": data.staff_id, "name": data.name, "role": data.role}
+    if isinstance(data, list):
+        return [to_json_data(item) for item in data]
+    if isinstance(data, dict):
+        return {key: to_json_data(value) for key, value in data.items()}
+    return data
+
+
+class HospitalService:
+    def __init__(self, system, store=None):
+        self.system = system
+        self.store = store
+        self.mutations = asyncio.Queue()
+        self.connections = 0
+        self.commands = 0
+        self.failure = None  # why the writer stopped, once a commit has failed
+
+    def execute(self, name, arguments):
+        """Run one command against the system and build its response dict."""
+        try:
+            method = BATCH_COMMANDS.get(name)
+            if method is None:
+                raise ValueError(f"Unknown command {name!r}")
+            result = getattr(self.system, method)(**arguments)
+        except (ValueError, TypeError) as e:
+            return {"ok": False, "message": str(e), "data": None}
+        except Exception as e:
+            # Never let one bad command take down the writer task.
+            return {"ok": False, "message": f"An error occurred: {e}", "data": None}
+        self.commands += 1
+        return {"ok": result.ok, "message": result.message, "data": to_json_data(result.data)}
+
+    def _refusal(self):
+        return {"ok": False, "message": self.failure, "data": None}
+
+    async def writer(self):
+        # The only task that calls state-changing commands. Returns if a commit fails.
+        while True:
+            group = [await self.mutations.get()]
+            while not self.mutations.empty():
+                group.append(self.mutations.get_nowait())
+            responses = [(reply, self.execute(name, arguments))
+                         for name, arguments, reply in group if not reply.cancelled()]
+            if self.store:
+                try:
+                    self.store.commit()
+                except Exception as e:
+                    self.failure = f"Changes not saved ({e}); the service is shutting down"
+                    responses = [(reply, self._refusal()) for reply, _ in responses]
+            for reply, response in responses:
+                if not reply.cancelled():
+                    reply.set_result(response)
+            if self.failure:
+                while not self.mutations.empty():
+                    _, _, reply = self.mutations.get_nowait()
+                    if not reply.cancelled():
+                        reply.set_result(self._refusal())
+                return
+
+    async def handle_client(self, reader, writer):
+        self.connections += 1
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be a JSON object")
+                except ValueError as e:
+                    response = {"id": None, "ok": False, "message": f"Invalid request: {e}", "data": None}
+                else:
+                    request_id = request.pop("id", None)
+                    name = request.pop("op", None)
+                    if name in READ_ONLY_COMMANDS:
+                        response = self.execute(name, request)
+                    elif self.failure:
+                        response = self._refusal()
+                    else:
+                        reply = loop.create_future()
+                        await self.mutations.put((name, request, reply))
+                        response = await reply
+                    response = {"id": request_id, **response}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_path=None, backlog=4096):
+        writer_task = asyncio.create_task(self.writer())
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            server = await asyncio.start_unix_server(self.handle_client, unix_path, backlog=backlog)
+            print(f"listening on unix:{unix_path}", flush=True)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port, backlog=backlog)
+            bound_host, bound_port = server.sockets[0].getsockname()[:2]
+            print(f"listening on {bound_host}:{bound_port}", flush=True)
+        try:
+            async with server:
+                serving = asyncio.create_task(server.serve_forever())
+                # Serve until cancelled, or until the writer stops because a commit failed.
+                await asyncio.wait((serving, writer_task), return_when=asyncio.FIRST_COMPLETED)
+                serving.cancel()
+                if writer_task.done():
+                    writer_task.result()  # re-raise anything unexpected that ended the writer
+        finally:
+            writer_task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve EnhancedHospitalSystem over line-delimited JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (0 picks a free one)")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--index", default="avl", help="patient index backend")
+    parser.add_argument("--preload", type=int, default=0, metavar="N",
+                        help="bulk-admit N synthetic patients before serving")
+    parser.add_argument("--data-dir", metavar="PATH",
+                        help="journal and snapshot state under PATH and restore it on start")
+    parser.add_argument("--sqlite", metavar="PATH", help="keep state and full history in a SQLite database")
+    parser.add_argument("--cache-size", type=int, metavar="N",
+                        help="with --sqlite, keep at most N discharged patients in memory for lookups")
+    args = parser.parse_args()
+
+    store = None
+    if args.data_dir:
+        store = HospitalStore(args.data_dir)
+        system = store.open(index_backend=args.index)
+    elif args.sqlite:
+        store = SQLiteStore(args.sqlite, cache_size=args.cache_size)
+        system = store.open(index_backend=args.index)
+    else:
+        system = EnhancedHospitalSystem(args.index)
+    if args.preload:
+        system.bulk_admit(Patient(None, f"Patient {number}", 20 + number % 70, "MF"[number % 2],
+                                  1 + number % 3, number) for number in range(args.preload))
+    service = HospitalService(system, store)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store:
+            store.close()
+    if service.failure:
+        sys.exit(service.failure)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Sharded multi-campus deployment: one worker process per campus.
+
+Each campus is a shard. Its worker process owns an EnhancedHospitalSystem
+with its own RoomManager (the campus's wards and corridors), priority queue,
+waiting queue and patient index, and runs the batch commands it is sent over
+a pipe. ShardedHospital is the router and offers the same command API.
+
+- Each shard hands out patient IDs from its own block of ID_BLOCK numbers,
+  so IDs are unique across the region and a lookup, discharge or treatment
+  goes straight to the owning shard (patient_id // ID_BLOCK).
+- Admissions go to the patient's home campus. When it has no room for the
+  severity, the router tries the other campuses nearest first over the coarse
+  inter-campus graph (travel minutes), skipping any that reported no vacancy
+  of a type the severity can use.
+- Every reply carries the shard's top-priority key and its vacant rooms per
+  type. The router caches these, so next_patient is a merge of one cached key
+  per shard plus one find on the winning shard. The cross-campus search
+  skips full campuses without asking them.
+- execute_many sends each shard all of its commands in one message, so the
+  shards work in parallel and a pipe round trip is paid once per shard, not
+  once per command.
+
+Staff are registered on every campus, so any clinician can treat any patient.
+"""
+import heapq
+import itertools
+import multiprocessing
+import random
+
+from main import BATCH_COMMANDS, ROOM_TYPE_PREFERENCES, CommandResult, EnhancedHospitalSystem, Graph
+from service import to_json_data
+from workload import make_campus
+
+ID_BLOCK = 10**12  # patient IDs per shard: shard n admits n * ID_BLOCK + 1, + 2, ...
+
+
+def make_region(campus_count, wards_per_campus, seed=7, links=2, max_minutes=60):
+    """Campus specs plus a random connected inter-campus Graph weighted in travel minutes."""
+    rng = random.Random(seed)
+    campuses = [{"name": f"Campus {number}", "wards": wards_per_campus, "seed": seed + number}
+                for number in range(campus_count)]
+    graph = Graph()
+    names = [campus["name"] for campus in campuses]
+    graph.add_node(names[0])
+    for number in range(1, campus_count):
+        for neighbor in rng.sample(names[:number], min(links, number)):
+            graph.add_edge(names[number], neighbor, rng.randint(5, max_minutes))
+    return campuses, graph
+
+
+def campus_distances(graph, start):
+    """Travel minutes from start to every reachable campus (Dijkstra)."""
+    distances = {start: 0}
+    heap = [(0, start)]
+    while heap:
+        distance, campus = heapq.heappop(heap)
+        if distance > distances[campus]:
+            continue
+        for neighbor, minutes in graph.get_neighbors(campus):
+            candidate = distance + minutes
+            if candidate < distances.get(neighbor, float("inf")):
+                distances[neighbor] = candidate
+                heapq.heappush(heap, (candidate, neighbor))
+    return distances
+
+
+def _shard_state(system):
+    """Top priority key and vacant rooms per type, piggybacked on every reply."""
+    heap = system.priority_queue.heap
+    top = None
+    if heap:
+        entry = heap[0]
+        top = [entry[0], entry[1], entry[2], entry[4].patient_id]
+    return {"top": top,
+            "vacant": {room_type: len(rooms) for room_type, rooms in system.room_manager.vacant_rooms.items()}}
+
+
+def _serve_shard(connection, shard, campus, index_backend):
+    """Worker process loop: run each batch of (op, arguments) and reply with results and shard state."""
+    system = EnhancedHospitalSystem(index_backend)
+    system.current_id = shard * ID_BLOCK
+    make_campus(campus["wards"], campus["seed"], room_manager=system.room_manager,
+                type_mix=campus.get("type_mix"))
+    connection.send(_shard_state(system))
+    while True:
+        commands = connection.recv()
+        if commands is None:
+            break
+        results = []
+        for name, arguments in commands:
+            try:
+                result = getattr(system, BATCH_COMMANDS[name])(**arguments)
+                results.append((result.ok, result.message, to_json_data(result.data)))
+            except (KeyError, ValueError, TypeError) as e:
+                results.append((False, str(e), None))
+            except Exception as e:
+                # Never let one bad command take down the shard.
+                results.append((False, f"An error occurred: {e}", None))
+        connection.send((results, _shard_state(system)))
+    connection.close()
+
+
+class ShardedHospital:
+    """Router over one worker process per campus, with the EnhancedHospitalSystem command API."""
+
+    def __init__(self, campuses, campus_graph=None, index_backend="avl"):
+        self.names = [campus["name"] for campus in campuses]
+        self.shard_of = {name: number for number, name in enumerate(self.names)}
+        self.campus_graph = campus_graph or Graph()
+        self.distances = {}  # campus -> {campus: minutes}, computed on first use
+        self.connections = []
+        self.processes = []
+        for shard, campus in enumerate(campuses):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve_shard, args=(child, shard, campus, index_backend),
+                                              daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.states = [connection.recv() for connection in self.connections]
+        self._home = itertools.cycle(self.names)
+
+    def close(self):
+        for connection, process in zip(self.connections, self.processes):
+            connection.send(None)
+            process.join()
+            connection.close()
+        self.connections = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Shard calls
+
+    def shard_for(self, patient_id):
+        shard = int(patient_id) // ID_BLOCK
+        if not 0 <= shard < len(self.names):
+            raise ValueError(f"Patient ID {patient_id} belongs to no campus")
+        return shard
+
+    def _send(self, shard, commands):
+        self.connections[shard].send(commands)
+
+    def _receive(self, shard):
+        results, self.states[shard] = self.connections[shard].recv()
+        return [self._result(shard, *result) for result in results]
+
+    def _call(self, shard, op, arguments):
+        self._send(shard, [(op, arguments)])
+        return self._receive(shard)[0]
+
+    def _result(self, shard, ok, message, data):
+        if isinstance(data, dict) and "patient_id" in data:
+            data["campus"] = self.names[shard]
+        return CommandResult(ok, message, data)
+
+    def _has_room_for(self, shard, severity):
+        vacant = self.states[shard]["vacant"]
+        return any(vacant.get(room_type, 0) for tier in ROOM_TYPE_PREFERENCES.get(severity, ())
+                   for room_type in tier)
+
+    # Command API
+
+    def admit_patient(self, name, age, gender, severity, disease=None, campus=None):
+        """Admit at `campus` (default: round robin), else at the nearest campus with a suitable room."""
+        home = campus or next(self._home)
+        shard = self.shard_of[home]
+        arguments = {"name": name, "age": age, "gender": gender, "severity": severity, "disease": disease}
+        result = self._call(shard, "admit", arguments)
+        if result.ok:
+            return result
+        return self._admit_elsewhere(home, arguments) or result
+
+    def _admit_elsewhere(self, home, arguments):
+        distances = self.distances.get(home)
+        if distances is None:
+            distances = self.distances[home] = campus_distances(self.campus_graph, home)
+        for minutes, campus in sorted((minutes, campus) for campus, minutes in distances.items() if campus != home):
+            shard = self.shard_of[campus]
+            if not self._has_room_for(shard, int(arguments["severity"])):
+                continue
+            result = self._call(shard, "admit", arguments)
+            if result.ok:
+                result.message += f" at {campus} ({minutes} min from {home})"
+                result.data["transfer_minutes"] = minutes
+                return result
+        return None
+
+    def discharge(self, patient_id):
+        return self._call(self.shard_for(patient_id), "discharge", {"patient_id": patient_id})
+
+    def record_treatment(self, treatment_id, patient_id, staff_id, treatment_details):
+        return self._call(self.shard_for(patient_id), "add_treatment",
+                          {"treatment_id": treatment_id, "patient_id": patient_id, "staff_id": staff_id,
+                           "treatment_details": treatment_details})
+
+    def update_priority(self, patient_id, severity=None, age=None):
+        return self._call(self.shard_for(patient_id), "update_priority",
+                          {"patient_id": patient_id, "severity": severity, "age": age})
+
+    def register_staff(self, staff_id, name, role):
+        for shard in range(len(self.names)):
+            self._send(shard, [("add_staff", {"staff_id": staff_id, "name": name, "role": role})])
+        results = [self._receive(shard)[0] for shard in range(len(self.names))]
+        return next((result for result in results if not result.ok), results[0])
+
+    def find_patient(self, patient_id):
+        return self._call(self.shard_for(patient_id), "find_patient", {"patient_id": patient_id})
+
+    def next_patient(self):
+        """Highest-priority patient in the region, from the cached top of each shard."""
+        best = None
+        for shard, state in enumerate(self.states):
+            top = state["top"]
+            if top is not None:
+                if best is None or top < best[0]:
+                    best = (top, shard)
+        if best is None:
+            return CommandResult(False, "No patients in priority queue")
+        result = self._call(best[1], "next_patient", {})
+        result.message = f"Next priority patient: {result.data['patient_id']} at {result.data['campus']}"
+        return result
+
+    def mark_room_clean(self, campus, room_id=None):
+        return self._call(self.shard_of[campus], "clean_room", {"room_id": room_id})
+
+    def census(self):
+        """Head counts summed over every campus (needs NumPy in the workers)."""
+        for shard in range(len(self.names)):
+            self._send(shard, [("census", {})])
+        results = [self._receive(shard)[0] for shard in range(len(self.names))]
+        if not all(results):
+            return next(result for result in results if not result.ok)
+        data = {"admitted": 0, "waiting": 0, "by_severity": {}, "waiting_by_severity": {}, "by_campus": {}}
+        for name, result in zip(self.names, results):
+            data["admitted"] += result.data["admitted"]
+            data["waiting"] += result.data["waiting"]
+            for key in ("by_severity", "waiting_by_severity"):
+                for severity, count in result.data[key].items():
+                    data[key][severity] = data[key].get(severity, 0) + count
+            data["by_campus"][name] = {"admitted": result.data["admitted"], "waiting": result.data["waiting"]}
+        return CommandResult(True, f"{data['admitted']} admitted, {data['waiting']} waiting for a room "
+                                   f"across {len(self.names)} campuses", data)
+
+    def vacancy(self):
+        """Cached vacant rooms per type for every campus, as of each shard's last reply."""
+        return {name: dict(state["vacant"]) for name, state in zip(self.names, self.states)}
+
+    def execute_many(self, commands):
+        """Run batch command dicts across the shards, one message per shard; returns results in order.
+
+        Commands with a patient_id go to the shard that admitted it; every
+        other command names its "campus". Admissions that find no room there
+        are retried across campuses afterwards. Commands for the same shard
+        run in order.
+        """
+        per_shard = [[] for _ in self.names]
+        slots = [[] for _ in self.names]
+        for position, command in enumerate(commands):
+            arguments = dict(command)
+            name = arguments.pop("op")
+            if name == "admit":
+                shard = self.shard_of[arguments.pop("campus")]
+            elif "patient_id" in arguments:
+                shard = self.shard_for(arguments["patient_id"])
+            else:
+                shard = self.shard_of[arguments.pop("campus")]
+            per_shard[shard].append((name, arguments))
+            slots[shard].append(position)
+        for shard, batch in enumerate(per_shard):
+            if batch:
+                self._send(shard, batch)
+        results = [None] * len(commands)
+        for shard, batch in enumerate(per_shard):
+            if batch:
+                for position, result in zip(slots[shard], self._receive(shard)):
+                    results[position] = result
+        for position, command in enumerate(commands):
+            if command["op"] == "admit" and not results[position].ok:
+                arguments = {key: value for key, value in command.items() if key not in ("op", "campus")}
+                results[position] = self._admit_elsewhere(command["campus"], arguments) or results[position]
+        return results
@@ -0,0 +1,425 @@
+"""Discrete-event simulation on EnhancedHospitalSystem, for capacity planning.
+
+A Simulation runs one hospital against a virtual clock (system.clock), so
+arrival times, history entries, treatment dates and the metrics engine all
+see simulated time. Events are kept in a heap and processed in time order:
+
+- arrivals per severity, a Poisson process whose hourly rate follows an
+  optional 24-hour or 168-hour (hour of the week, from Monday 00:00) profile;
+  each arrival goes through bulk_admit and waits in the waiting queue when no
+  room fits its severity,
+- treatments during a stay (Poisson, per severity) through record_treatment,
+- discharge after a log-normal length of stay per severity,
+- cleaning: discharged rooms join the CleaningQueue and a fixed crew cleans
+  them in queue order, each taking a normally distributed time per room
+  type. A room stays out of the vacancy index until it is clean, then
+  assign_batch rooms the waiting patients.
+
+Nothing sleeps, so weeks of activity run in seconds. run_replicas runs
+independent replicas of a scenario (one seed each) across a process pool
+and summarize averages their reports.
+
+    python simulation.py --days 28 --beds ICU=14 General=36 Surgery=8 --replicas 8
+    python simulation.py --sweep ICU 10 16 --replicas 8    # how many ICU beds?
+"""
+import argparse
+import heapq
+import itertools
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from main import EnhancedHospitalSystem, Patient
+from metrics import QuantileSketch
+from workload import STAFF_ROLES, TREATMENT_DETAILS, make_campus
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+
+class Scenario:
+    """Capacity, demand and service-time parameters for one simulated hospital.
+
+    Rates are per hour and times in hours unless the name says otherwise.
+    Beds are totals per room type and include the four rooms every
+    RoomManager starts with (two General, one ICU, one Surgery).
+    """
+
+    def __init__(self, name="baseline", days=28.0, warmup_days=2.0,
+                 beds=None, arrival_rates=None, rate_profile=None,
+                 length_of_stay=None, treatments_per_day=None,
+                 cleaning_minutes=None, cleaners=2, staff_count=20,
+                 start="2026-01-05 00:00:00"):
+        self.name = name
+        self.days = days
+        self.warmup_days = warmup_days  # excluded from every statistic
+        self.beds = beds or {"General": 36, "ICU": 14, "Surgery": 8}
+        self.arrival_rates = arrival_rates or {1: 0.15, 2: 0.6, 3: 1.2}
+        # Hourly multipliers on arrival_rates: 24 values (hour of day) or 168 (hour of week).
+        self.rate_profile = rate_profile
+        # severity -> (median hours, log-normal sigma)
+        self.length_of_stay = length_of_stay or {1: (60.0, 0.6), 2: (30.0, 0.7), 3: (10.0, 0.8)}
+        self.treatments_per_day = treatments_per_day or {1: 8.0, 2: 4.0, 3: 2.0}
+        # room type -> (mean minutes, standard deviation)
+        self.cleaning_minutes = cleaning_minutes or {"General": (30.0, 10.0), "ICU": (60.0, 15.0),
+                                                     "Surgery": (75.0, 20.0)}
+        self.cleaners = cleaners
+        self.staff_count = staff_count
+        self.start = start  # local time the simulation starts; the default is a Monday
+
+    def replace(self, **changes):
+        scenario = Scenario.__new__(Scenario)
+        scenario.__dict__.update(self.__dict__, **changes)
+        return scenario
+
+
+# Evening-heavy emergency arrivals: hour-of-day multipliers averaging 1.0.
+EVENING_PEAK = [0.6, 0.5, 0.4, 0.4, 0.4, 0.5, 0.7, 0.9, 1.1, 1.2, 1.2, 1.2,
+                1.2, 1.2, 1.2, 1.2, 1.3, 1.4, 1.5, 1.5, 1.4, 1.2, 1.0, 0.8]
+
+
+class TimeWeighted:
+    """Time-weighted mean and maximum of a level that changes at event times."""
+
+    __slots__ = ("level", "since", "area", "maximum")
+
+    def __init__(self, start):
+        self.level = 0
+        self.since = start
+        self.area = 0.0
+        self.maximum = 0
+
+    def set(self, now, level):
+        self.area += self.level * (now - self.since)
+        self.since = now
+        self.level = level
+        if level > self.maximum:
+            self.maximum = level
+
+    def mean(self, now, start):
+        area = self.area + self.level * (now - self.since)
+        return area / (now - start) if now > start else float(self.level)
+
+
+class Simulation:
+    def __init__(self, scenario, seed=0):
+        self.scenario = scenario
+        self.rng = random.Random(seed)
+        self.start = time.mktime(time.strptime(scenario.start, "%Y-%m-%d %H:%M:%S"))
+        self.now = self.start
+        self.end = self.start + scenario.days * DAY
+        self.stats_from = self.start + scenario.warmup_days * DAY
+        self.system = EnhancedHospitalSystem(clock=lambda: self.now)
+        room_manager = self.system.room_manager
+        existing = {}
+        for room in room_manager.rooms.values():
+            if room.is_vacant:
+                existing[room.room_type] = existing.get(room.room_type, 0) + 1
+        wards = [room_type for room_type, count in scenario.beds.items()
+                 for _ in range(max(0, count - existing.get(room_type, 0)))]
+        make_campus(0, seed, room_manager=room_manager, room_types=wards)
+        self.rooms = room_manager.rooms
+        self.beds = {}
+        for room in self.rooms.values():
+            if room.is_vacant:
+                self.beds[room.room_type] = self.beds.get(room.room_type, 0) + 1
+        for number in range(1, scenario.staff_count + 1):
+            self.system.register_staff(f"S{number}", f"Staff {number}", self.rng.choice(STAFF_ROLES))
+
+        self.events = []  # (time, seq, handler, argument)
+        self._seq = itertools.count()
+        self.discharge_at = {}   # patient_id -> scheduled discharge time
+        self.cleaning = set()    # rooms being cleaned right now
+        self.idle_cleaners = scenario.cleaners
+        self.treatments = 0
+        self.processed = 0
+        self.arrivals = {severity: 0 for severity in scenario.arrival_rates}
+        self.roomed = 0
+        self.waits = {severity: QuantileSketch() for severity in scenario.arrival_rates}  # minutes
+        self.waiting = TimeWeighted(self.start)
+        self.cleaning_queue = TimeWeighted(self.start)
+        self.occupied = {room_type: TimeWeighted(self.start) for room_type in self.beds}
+        self.held = {room_type: TimeWeighted(self.start) for room_type in self.beds}  # dirty or being cleaned
+        self.stats_reset = False
+
+    def schedule(self, at, handler, argument=None):
+        heapq.heappush(self.events, (at, next(self._seq), handler, argument))
+
+    def _rate_multiplier(self, at):
+        profile = self.scenario.rate_profile
+        if not profile:
+            return 1.0
+        return profile[int((at - self.start) // HOUR) % len(profile)]
+
+    def _next_arrival(self, severity):
+        # Thinning: draw at the peak rate, keep each candidate with probability rate(t) / peak.
+        rate = self.scenario.arrival_rates[severity] / HOUR
+        peak = max(self.scenario.rate_profile or (1.0,))
+        at = self.now
+        while True:
+            at += self.rng.expovariate(rate * peak)
+            if self.rng.random() * peak <= self._rate_multiplier(at):
+                return at
+
+    def _change(self, series, delta):
+        series.set(self.now, series.level + delta)
+
+    def _reset_statistics(self):
+        # End of warm-up: keep the current levels, forget everything measured so far.
+        for series in itertools.chain([self.waiting, self.cleaning_queue], self.occupied.values(),
+                                      self.held.values()):
+            level = series.level
+            series.__init__(self.now)
+            series.set(self.now, level)
+        self.arrivals = dict.fromkeys(self.arrivals, 0)
+        self.roomed = 0
+        self.waits = {severity: QuantileSketch() for severity in self.waits}
+        self.stats_reset = True
+
+    # Event handlers
+
+    def arrival(self, severity):
+        self.arrivals[severity] += 1
+        patient = Patient(None, f"Patient {sum(self.arrivals.values())}", self.rng.randint(1, 95),
+                          self.rng.choice("MF"), severity, self.now)
+        self.system.bulk_admit([patient])
+        if patient.room_id is None:
+            self.waiting.set(self.now, len(self.system.waiting_queue))
+        else:
+            self._roomed(patient)
+        self.schedule(self._next_arrival(severity), self.arrival, severity)
+
+    def _roomed(self, patient):
+        self.roomed += 1
+        self.waits[patient.severity].add((self.now - patient.arrival_time) / 60)
+        self._change(self.occupied[self.rooms[patient.room_id].room_type], 1)
+        median, sigma = self.scenario.length_of_stay[patient.severity]
+        leave = self.now + self.rng.lognormvariate(math.log(median), sigma) * HOUR
+        self.discharge_at[patient.patient_id] = leave
+        self.schedule(leave, self.discharge, patient.patient_id)
+        self._schedule_treatment(patient.patient_id, patient.severity)
+
+    def _schedule_treatment(self, patient_id, severity):
+        at = self.now + self.rng.expovariate(self.scenario.treatments_per_day[severity] / DAY)
+        if at < self.discharge_at[patient_id]:
+            self.schedule(at, self.treatment, (patient_id, severity))
+
+    def treatment(self, argument):
+        patient_id, severity = argument
+        if patient_id not in self.discharge_at:
+            return
+        self.treatments += 1
+        self.system.record_treatment(f"T{self.treatments}", patient_id,
+                                     f"S{self.rng.randint(1, self.scenario.staff_count)}",
+                                     self.rng.choice(TREATMENT_DETAILS))
+        self._schedule_treatment(patient_id, severity)
+
+    def discharge(self, patient_id):
+        del self.discharge_at[patient_id]
+        patient = self.system.discharge(patient_id).data
+        room = self.rooms[patient.room_id]
+        # A dirty room cannot take the next patient: hold it until it is cleaned.
+        room.is_vacant = False
+        self._change(self.occupied[room.room_type], -1)
+        self._change(self.held[room.room_type], 1)
+        self.cleaning_queue.set(self.now, len(self.system.room_manager.cleaning_queue))
+        self._start_cleaning()
+
+    def _start_cleaning(self):
+        queue = self.system.room_manager.cleaning_queue.cleaning_queue
+        while self.idle_cleaners and len(self.cleaning) < len(queue):
+            room_id = next(room_id for room_id in queue if room_id not in self.cleaning)
+            self.cleaning.add(room_id)
+            self.idle_cleaners -= 1
+            mean, deviation = self.scenario.cleaning_minutes[self.rooms[room_id].room_type]
+            self.schedule(self.now + max(1.0, self.rng.gauss(mean, deviation)) * 60, self.cleaned, room_id)
+
+    def cleaned(self, room_id):
+        self.cleaning.discard(room_id)
+        self.idle_cleaners += 1
+        self.system.mark_room_clean(room_id)
+        room = self.rooms[room_id]
+        room.is_vacant = True
+        self._change(self.held[room.room_type], -1)
+        self.cleaning_queue.set(self.now, len(self.system.room_manager.cleaning_queue))
+        self._start_cleaning()
+        if self.system.waiting_queue:
+            # A few candidates per room, so a room the top patients cannot use still goes to someone.
+            assignments, _ = self.system.assign_batch(k=4)
+            for patient, _ in assignments:
+                self._roomed(patient)
+            self.waiting.set(self.now, len(self.system.waiting_queue))
+
+    # Driver
+
+    def run(self):
+        """Process every event before the end of the scenario and return the report."""
+        started = time.perf_counter()
+        for severity in self.scenario.arrival_rates:
+            self.schedule(self._next_arrival(severity), self.arrival, severity)
+        events = self.events
+        while events and events[0][0] < self.end:
+            at, _, handler, argument = heapq.heappop(events)
+            if not self.stats_reset and at >= self.stats_from:
+                self.now = self.stats_from
+                self._reset_statistics()
+            self.now = at
+            handler(argument)
+            self.processed += 1
+        self.now = self.end
+        if not self.stats_reset:
+            self._reset_statistics()
+        return self.report(time.perf_counter() - started)
+
+    def report(self, wall_seconds):
+        now, start = self.now, self.stats_from
+        beds = {}
+        for room_type, count in sorted(self.beds.items()):
+            occupied = self.occupied[room_type]
+            held = self.held[room_type]
+            beds[room_type] = {
+                "beds": count,
+                "utilization": occupied.mean(now, start) / count,
+                "cleaning_share": held.mean(now, start) / count,
+                "peak_occupied": occupied.maximum,
+            }
+        return {
+            "scenario": self.scenario.name,
+            "days": (now - start) / DAY,
+            "arrivals": self.arrivals,
+            "roomed": self.roomed,
+            "still_waiting": len(self.system.waiting_queue),
+            "wait_minutes": {severity: sketch.summary() for severity, sketch in self.waits.items()},
+            "waiting_queue": {"mean": self.waiting.mean(now, start), "max": self.waiting.maximum},
+            "cleaning_queue": {"mean": self.cleaning_queue.mean(now, start), "max": self.cleaning_queue.maximum},
+            "beds": beds,
+            "events": self.processed,
+            "wall_seconds": wall_seconds,
+        }
+
+
+def simulate(scenario, seed=0):
+    """Run one replica; module-level so a process pool can pickle it."""
+    return Simulation(scenario, seed).run()
+
+
+def run_replicas(scenario, replicas=8, workers=None, first_seed=0):
+    """Run independent replicas of a scenario in parallel; returns their reports in seed order."""
+    seeds = range(first_seed, first_seed + replicas)
+    if workers == 1 or replicas == 1:
+        return [simulate(scenario, seed) for seed in seeds]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(simulate, itertools.repeat(scenario), seeds))
+
+
+def _mean_interval(values):
+    """Mean and half-width of a normal-approximation 95% confidence interval."""
+    values = [value for value in values if value is not None]
+    if not values:
+        return None, None
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return mean, None
+    variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+    return mean, 1.96 * math.sqrt(variance / len(values))
+
+
+def summarize(reports):
+    """Across-replica mean and 95% interval of the headline numbers."""
+    first = reports[0]
+    summary = {
+        "scenario": first["scenario"],
+        "replicas": len(reports),
+        "waiting_queue_mean": _mean_interval([report["waiting_queue"]["mean"] for report in reports]),
+        "waiting_queue_max": _mean_interval([report["waiting_queue"]["max"] for report in reports]),
+        "cleaning_queue_mean": _mean_interval([report["cleaning_queue"]["mean"] for report in reports]),
+        "wait_minutes": {},
+        "beds": {},
+    }
+    for severity in first["wait_minutes"]:
+        summary["wait_minutes"][severity] = {
+            quantile: _mean_interval([report["wait_minutes"][severity][quantile] for report in reports])
+            for quantile in ("mean", "p50", "p95")
+        }
+    for room_type, beds in first["beds"].items():
+        summary["beds"][room_type] = {
+            "beds": beds["beds"],
+            "utilization": _mean_interval([report["beds"][room_type]["utilization"] for report in reports]),
+            "cleaning_share": _mean_interval([report["beds"][room_type]["cleaning_share"] for report in reports]),
+        }
+    return summary
+
+
+def _format(interval, scale=1.0, digits=1):
+    mean, half_width = interval
+    if mean is None:
+        return "-"
+    if half_width is None:
+        return f"{mean * scale:.{digits}f}"
+    return f"{mean * scale:.{digits}f} ± {half_width * scale:.{digits}f}"
+
+
+def print_summary(summary):
+    print(f"Scenario {summary['scenario']}, {summary['replicas']} replicas (mean ± 95% interval)")
+    print(f"  waiting queue: mean {_format(summary['waiting_queue_mean'])}, "
+          f"max {_format(summary['waiting_queue_max'])}; cleaning queue mean {_format(summary['cleaning_queue_mean'])}")
+    for severity, wait in summary["wait_minutes"].items():
+        print(f"  severity {severity} wait (min): mean {_format(wait['mean'])}, p50 {_format(wait['p50'])}, "
+              f"p95 {_format(wait['p95'])}")
+    for room_type, beds in summary["beds"].items():
+        print(f"  {room_type:<8} {beds['beds']:>4} beds: utilization {_format(beds['utilization'], 100)}%, "
+              f"held for cleaning {_format(beds['cleaning_share'], 100)}%")
+
+
+def _pairs(values, key_type):
+    result = {}
+    for value in values:
+        key, _, number = value.partition("=")
+        result[key_type(key)] = float(number)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discrete-event capacity simulation")
+    parser.add_argument("--days", type=float, default=28.0)
+    parser.add_argument("--warmup-days", type=float, default=2.0)
+    parser.add_argument("--beds", nargs="+", metavar="TYPE=N", help="beds per room type, e.g. ICU=6 General=30")
+    parser.add_argument("--arrivals", nargs="+", metavar="SEVERITY=RATE", help="arrivals per hour, e.g. 1=0.15")
+    parser.add_argument("--evening-peak", action="store_true", help="apply the EVENING_PEAK hour-of-day profile")
+    parser.add_argument("--cleaners", type=int, default=2)
+    parser.add_argument("--replicas", type=int, default=8)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--sweep", nargs=3, metavar=("TYPE", "MIN", "MAX"),
+                        help="repeat for every bed count of TYPE from MIN to MAX")
+    parser.add_argument("--json", metavar="PATH", help="write every summary as JSON to PATH")
+    args = parser.parse_args()
+
+    scenario = Scenario(days=args.days, warmup_days=args.warmup_days, cleaners=args.cleaners,
+                        rate_profile=EVENING_PEAK if args.evening_peak else None)
+    if args.beds:
+        scenario.beds = {room_type: int(count) for room_type, count in _pairs(args.beds, str).items()}
+    if args.arrivals:
+        scenario.arrival_rates = _pairs(args.arrivals, int)
+    scenarios = [scenario]
+    if args.sweep:
+        room_type, low, high = args.sweep[0], int(args.sweep[1]), int(args.sweep[2])
+        scenarios = [scenario.replace(name=f"{room_type}={count}", beds={**scenario.beds, room_type: count})
+                     for count in range(low, high + 1)]
+
+    summaries = []
+    started = time.perf_counter()
+    for scenario in scenarios:
+        reports = run_replicas(scenario, args.replicas, args.workers)
+        summaries.append(summarize(reports))
+        print_summary(summaries[-1])
+    simulated_days = sum(scenario.days for scenario in scenarios) * args.replicas
+    print(f"{simulated_days:.0f} simulated days in {time.perf_counter() - started:.1f} s")
+    if args.json:
+        with open(args.json, "w") as stream:
+            json.dump(summaries, stream, indent=2)
+
+
+if __name__ == "__main__":
+    main()
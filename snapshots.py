@@ -0,0 +1,312 @@
+"""Immutable, versioned snapshots of hospital state for lock-free dashboard reads.
+
+A SnapshotPublisher plugs into the EnhancedHospitalSystem.journal hook (the
+same one persistence.HospitalStore and sqlite_store.SQLiteStore use). Every
+effect record a command appends is applied to the current HospitalSnapshot
+and the result is published as the next version by swapping one attribute.
+Readers on other threads take `publisher.current` and use it for as long as
+they like without locks: nothing reachable from a published snapshot is
+ever modified again.
+
+Patients (by ID and by priority), rooms and vacant rooms are PersistentMaps,
+AVL trees that copy only the O(log n) nodes on the path to a change and
+share every other node with the previous version, so publishing an
+admission or a discharge costs O(log n) however large the hospital is. The
+cleaning queue is a tuple copied per change; it holds only dirty rooms.
+
+Attach the publisher after any store, so the store keeps receiving every
+record first. State changed without a command (and so without a record),
+e.g. setting Room.is_vacant directly, is not seen until refresh().
+"""
+from collections import namedtuple
+
+PatientView = namedtuple("PatientView", "patient_id name age gender severity arrival_time disease room_id")
+RoomView = namedtuple("RoomView", "room_id room_type is_vacant condition")
+
+
+class _Node:
+    __slots__ = ("key", "value", "left", "right", "height", "size")
+
+    def __init__(self, key, value, left, right):
+        self.key = key
+        self.value = value
+        self.left = left
+        self.right = right
+        if left is None:
+            if right is None:
+                self.height = self.size = 1
+            else:
+                self.height = right.height + 1
+                self.size = right.size + 1
+        elif right is None:
+            self.height = left.height + 1
+            self.size = left.size + 1
+        else:
+            self.height = (left.height if left.height > right.height else right.height) + 1
+            self.size = left.size + right.size + 1
+
+
+def _balanced(key, value, left, right):
+    # New node over left and right, rotated (by building new nodes) when their heights differ by two.
+    left_height = left.height if left else 0
+    right_height = right.height if right else 0
+    if left_height > right_height + 1:
+        inner = left.right
+        if (left.left.height if left.left else 0) >= (inner.height if inner else 0):
+            return _Node(left.key, left.value, left.left, _Node(key, value, inner, right))
+        return _Node(inner.key, inner.value, _Node(left.key, left.value, left.left, inner.left),
+                     _Node(key, value, inner.right, right))
+    if right_height > left_height + 1:
+        inner = right.left
+        if (right.right.height if right.right else 0) >= (inner.height if inner else 0):
+            return _Node(right.key, right.value, _Node(key, value, left, inner), right.right)
+        return _Node(inner.key, inner.value, _Node(key, value, left, inner.left),
+                     _Node(right.key, right.value, inner.right, right.right))
+    return _Node(key, value, left, right)
+
+
+def _insert(node, key, value):
+    if node is None:
+        return _Node(key, value, None, None)
+    if key < node.key:
+        return _balanced(node.key, node.value, _insert(node.left, key, value), node.right)
+    if node.key < key:
+        return _balanced(node.key, node.value, node.left, _insert(node.right, key, value))
+    return _Node(key, value, node.left, node.right)
+
+
+def _pop_min(node):
+    """(min key, its value, node without it)."""
+    if node.left is None:
+        return node.key, node.value, node.right
+    key, value, left = _pop_min(node.left)
+    return key, value, _balanced(node.key, node.value, left, node.right)
+
+
+def _delete(node, key):
+    if node is None:
+        return None
+    if key < node.key:
+        return _balanced(node.key, node.value, _delete(node.left, key), node.right)
+    if node.key < key:
+        return _balanced(node.key, node.value, node.left, _delete(node.right, key))
+    if node.left is None:
+        return node.right
+    if node.right is None:
+        return node.left
+    successor_key, successor_value, right = _pop_min(node.right)
+    return _balanced(successor_key, successor_value, node.left, right)
+
+
+def _build(items, low, high):
+    if low > high:
+        return None
+    mid = (low + high) // 2
+    key, value = items[mid]
+    return _Node(key, value, _build(items, low, mid - 1), _build(items, mid + 1, high))
+
+
+class PersistentMap:
+    """Immutable sorted map; set and discard return a new map sharing all unchanged nodes."""
+
+    __slots__ = ("root",)
+
+    def __init__(self, root=None):
+        self.root = root
+
+    @classmethod
+    def from_sorted(cls, items):
+        """Map over (key, value) pairs already in ascending key order, built balanced in O(n)."""
+        items = list(items)
+        return cls(_build(items, 0, len(items) - 1))
+
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        node = self.root
+        while node:
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                return node.value
+        return default
+
+    def set(self, key, value):
+        return PersistentMap(_insert(self.root, key, value))
+
+    def discard(self, key):
+        if key not in self:
+            return self
+        return PersistentMap(_delete(self.root, key))
+
+    def values(self, offset=0):
+        """Yield values in key order, starting at position `offset` (found in O(log n) by subtree sizes)."""
+        stack = []
+        node = self.root
+        while node:
+            left_size = node.left.size if node.left else 0
+            if offset < left_size:
+                stack.append(node)
+                node = node.left
+            elif offset == left_size:
+                stack.append(node)
+                break
+            else:
+                offset -= left_size + 1
+                node = node.right
+        while stack:
+            node = stack.pop()
+            yield node.value
+            node = node.right
+            while node:
+                stack.append(node)
+                node = node.left
+
+
+def _priority_key(view):
+    return (view.severity, view.age, view.arrival_time, view.patient_id)
+
+
+def _patient_view(patient):
+    return PatientView(patient.patient_id, patient.name, patient.age, patient.gender, patient.severity,
+                       patient.arrival_time, patient.disease, patient.room_id)
+
+
+def _room_view(room):
+    return RoomView(room.room_id, room.room_type, room.is_vacant, room.condition)
+
+
+class HospitalSnapshot:
+    """One published version of hospital state. Never modified after publication."""
+
+    __slots__ = ("version", "taken_at", "patients", "queue", "rooms", "vacant", "vacant_counts", "cleaning")
+
+    def __init__(self, version, taken_at, patients, queue, rooms, vacant, vacant_counts, cleaning):
+        self.version = version
+        self.taken_at = taken_at
+        self.patients = patients            # patient_id -> PatientView
+        self.queue = queue                  # (severity, age, arrival_time, patient_id) -> PatientView
+        self.rooms = rooms                  # room_id -> RoomView
+        self.vacant = vacant                # room_id -> RoomView, vacant rooms only
+        self.vacant_counts = vacant_counts  # room_type -> vacant rooms
+        self.cleaning = cleaning            # room_ids in cleaning-queue order
+
+    @classmethod
+    def capture(cls, system, version=0):
+        """Full copy of system's state in O(n log n) (O(n) for the ID map)."""
+        patient_views = [_patient_view(patient) for patient in system.avl_tree.range_scan()]
+        room_views = sorted((_room_view(room) for room in system.room_manager.rooms.values()),
+                            key=lambda view: view.room_id)
+        vacant_counts = {}
+        for view in room_views:
+            if view.is_vacant:
+                vacant_counts[view.room_type] = vacant_counts.get(view.room_type, 0) + 1
+        return cls(version, system.clock(),
+                   PersistentMap.from_sorted((view.patient_id, view) for view in patient_views),
+                   PersistentMap.from_sorted(sorted((_priority_key(view), view) for view in patient_views)),
+                   PersistentMap.from_sorted((view.room_id, view) for view in room_views),
+                   PersistentMap.from_sorted((view.room_id, view) for view in room_views if view.is_vacant),
+                   vacant_counts, tuple(system.room_manager.cleaning_queue.cleaning_queue))
+
+    def patient(self, patient_id):
+        return self.patients.get(patient_id)
+
+    def patients_page(self, offset=0, limit=20):
+        """Patients in ID order from position `offset`."""
+        return _take(self.patients.values(offset), limit)
+
+    def priority_page(self, offset=0, limit=20):
+        """Patients in priority order from position `offset`, e.g. the next 20 to treat."""
+        return _take(self.queue.values(offset), limit)
+
+    def vacant_rooms(self, room_type=None):
+        return [view for view in self.vacant.values() if room_type is None or view.room_type == room_type]
+
+
+def _take(values, limit):
+    page = []
+    for value in values:
+        if len(page) == limit:
+            break
+        page.append(value)
+    return page
+
+
+class SnapshotPublisher:
+    """Keeps `current` up to date with a system by applying its journal records copy-on-write."""
+
+    def __init__(self, system):
+        self.system = system
+        self.downstream = system.journal
+        self.current = HospitalSnapshot.capture(system)
+        system.journal = self
+
+    def __bool__(self):
+        return True
+
+    def detach(self):
+        if self.system.journal is self:
+            self.system.journal = self.downstream
+
+    def refresh(self):
+        """Publish a full recapture, e.g. after changing state without a command."""
+        self.current = HospitalSnapshot.capture(self.system, self.current.version + 1)
+
+    def append(self, record):
+        result = self.downstream.append(record) if self.downstream else None
+        snapshot = self.current
+        patients, queue = snapshot.patients, snapshot.queue
+        live_patients = self.system.avl_tree
+        room_ids = set()
+        op = record["op"]
+        if op in ("admit", "assign", "update_priority"):
+            if op == "admit":
+                patient_ids = [state[0] for state in record["patients"]]
+            elif op == "assign":
+                patient_ids = [patient_id for patient_id, _, _ in record["rooms"]]
+            else:
+                patient_ids = [record["patient_id"]]
+            for patient_id in patient_ids:
+                old = patients.get(patient_id)
+                if old is not None:
+                    queue = queue.discard(_priority_key(old))
+                view = _patient_view(live_patients.find_patient(patient_id))
+                patients = patients.set(patient_id, view)
+                queue = queue.set(_priority_key(view), view)
+                room_ids.add(view.room_id)
+        elif op == "discharge":
+            old = patients.get(record["patient_id"])
+            if old is not None:
+                patients = patients.discard(old.patient_id)
+                queue = queue.discard(_priority_key(old))
+                room_ids.add(old.room_id)
+        elif op == "clean":
+            room_ids.add(record["room_id"])
+        else:
+            return result  # treatments and staff don't change what the snapshot shows
+        room_ids.discard(None)
+        rooms, vacant, vacant_counts = snapshot.rooms, snapshot.vacant, snapshot.vacant_counts
+        live_rooms = self.system.room_manager.rooms
+        for room_id in room_ids:
+            old, view = rooms.get(room_id), _room_view(live_rooms[room_id])
+            if old == view:
+                continue
+            rooms = rooms.set(room_id, view)
+            change = view.is_vacant - (old is not None and old.is_vacant)
+            if change:
+                if vacant_counts is snapshot.vacant_counts:
+                    vacant_counts = dict(vacant_counts)
+                vacant_counts[view.room_type] = vacant_counts.get(view.room_type, 0) + change
+            vacant = vacant.set(room_id, view) if view.is_vacant else vacant.discard(room_id)
+        cleaning = snapshot.cleaning
+        if op in ("discharge", "clean"):
+            cleaning = tuple(self.system.room_manager.cleaning_queue.cleaning_queue)
+        self.current = HospitalSnapshot(snapshot.version + 1, self.system.clock(), patients, queue, rooms, vacant,
+                                        vacant_counts, cleaning)
+        return result
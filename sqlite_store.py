@@ -0,0 +1,271 @@
+"""SQLite persistence for EnhancedHospitalSystem, with queryable history.
+
+SQLiteStore plugs into the same EnhancedHospitalSystem.journal hook as
+persistence.HospitalStore: every successful state-changing command hands it
+one effect record, which it applies to the database. Unlike the journal, the
+database keeps discharged patients, every history entry and every treatment,
+indexed the same way as the in-memory lookups (patient_id, staff_id, room_id,
+date), so it can answer ad-hoc SQL long after patients have left.
+
+Writes are grouped into one transaction per batch_size records, and every
+statement is a fixed SQL string, so sqlite3's statement cache prepares each
+one once per connection.
+
+The in-memory structures stay the hot path. open() loads the active patients
+into the priority queues, the rooms into RoomManager and the staff and
+treatment log, and with cache_size set the patient index becomes a
+CachedPatientIndex: find_patient also serves discharged patients, keeping the
+cache_size most recently used in memory and faulting older ones back in from
+the database on a miss. Admitted patients are always in memory.
+"""
+import sqlite3
+
+from main import CachedPatientIndex, EnhancedHospitalSystem, Patient, Room, Staff, Treatment
+from persistence import restore_patients
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    gender TEXT,
+    severity INTEGER NOT NULL,
+    arrival_time REAL NOT NULL,
+    disease TEXT,
+    room_id TEXT,
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS patients_room ON patients (room_id) WHERE active;
+CREATE INDEX IF NOT EXISTS patients_active ON patients (active, patient_id);
+CREATE TABLE IF NOT EXISTS patient_history (
+    entry_id INTEGER PRIMARY KEY,
+    patient_id INTEGER NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS patient_history_patient ON patient_history (patient_id, entry_id);
+CREATE TABLE IF NOT EXISTS rooms (
+    room_id TEXT PRIMARY KEY,
+    room_type TEXT NOT NULL,
+    is_vacant INTEGER NOT NULL,
+    condition TEXT NOT NULL,
+    cleaning_seq INTEGER
+);
+CREATE TABLE IF NOT EXISTS corridors (
+    from_room TEXT NOT NULL,
+    to_room TEXT NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (from_room, to_room)
+);
+CREATE TABLE IF NOT EXISTS staff (
+    staff_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    role TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS staff_role ON staff (role);
+CREATE TABLE IF NOT EXISTS treatments (
+    log_position INTEGER PRIMARY KEY,
+    treatment_id TEXT NOT NULL,
+    patient_id INTEGER NOT NULL,
+    staff_id TEXT NOT NULL,
+    treatment_details TEXT NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS treatments_patient ON treatments (patient_id, log_position);
+CREATE INDEX IF NOT EXISTS treatments_staff ON treatments (staff_id, log_position);
+CREATE INDEX IF NOT EXISTS treatments_date ON treatments (date, log_position);
+"""
+
+INSERT_PATIENT = ("INSERT INTO patients (patient_id, name, age, gender, severity, arrival_time, disease, room_id)"
+                  " VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+INSERT_HISTORY = "INSERT INTO patient_history (patient_id, entry) VALUES (?, ?)"
+INSERT_TREATMENT = ("INSERT INTO treatments (treatment_id, patient_id, staff_id, treatment_details, date)"
+                    " VALUES (?, ?, ?, ?, ?)")
+INSERT_STAFF = "INSERT INTO staff (staff_id, name, role) VALUES (?, ?, ?)"
+INSERT_ROOM = "INSERT OR IGNORE INTO rooms (room_id, room_type, is_vacant, condition) VALUES (?, ?, ?, ?)"
+INSERT_CORRIDOR = "INSERT OR IGNORE INTO corridors (from_room, to_room, weight) VALUES (?, ?, ?)"
+OCCUPY_ROOM = "UPDATE rooms SET is_vacant = 0 WHERE room_id = ?"
+VACATE_ROOM = ("UPDATE rooms SET is_vacant = 1, condition = 'Dirty', cleaning_seq = COALESCE(cleaning_seq, ?)"
+               " WHERE room_id = (SELECT room_id FROM patients WHERE patient_id = ?)")
+CLEAN_ROOM = "UPDATE rooms SET condition = 'Clean', cleaning_seq = NULL WHERE room_id = ?"
+DISCHARGE_PATIENT = "UPDATE patients SET active = 0 WHERE patient_id = ?"
+ASSIGN_ROOM = "UPDATE patients SET room_id = ? WHERE patient_id = ?"
+UPDATE_PRIORITY = "UPDATE patients SET severity = ?, age = ? WHERE patient_id = ?"
+SET_CURRENT_ID = ("INSERT INTO meta (key, value) VALUES ('current_id', ?)"
+                  " ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)")
+SELECT_PATIENT = ("SELECT patient_id, name, age, gender, severity, arrival_time, disease, room_id"
+                  " FROM patients WHERE patient_id = ?")
+SELECT_ACTIVE_PATIENTS = ("SELECT patient_id, name, age, gender, severity, arrival_time, disease, room_id"
+                          " FROM patients WHERE active ORDER BY patient_id")
+SELECT_HISTORY = "SELECT entry FROM patient_history WHERE patient_id = ? ORDER BY entry_id"
+SELECT_TREATMENT_DETAILS = "SELECT treatment_details FROM treatments WHERE patient_id = ? ORDER BY log_position"
+
+
+def _patient_from_row(row):
+    patient_id, name, age, gender, severity, arrival_time, disease, room_id = row
+    patient = Patient(patient_id, name, age, gender, severity, arrival_time, disease)
+    patient.room_id = room_id
+    return patient
+
+
+class SQLiteStore:
+    """Durable, queryable home for one EnhancedHospitalSystem in a SQLite file.
+
+    Records are committed batch_size at a time and there is no timer: until
+    the batch fills, up to batch_size - 1 applied commands sit in the open
+    transaction and are lost if the process dies. Nothing commits a quiet
+    store, so callers that acknowledge commands must call commit() before
+    answering (service.HospitalService does, once per group), or use
+    batch_size=1. close() commits whatever is pending.
+    """
+
+    def __init__(self, path, batch_size=1_000, cache_size=None, statement_cache=128, synchronous="FULL"):
+        self.path = path
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.connection = sqlite3.connect(path, cached_statements=statement_cache)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute(f"PRAGMA synchronous = {synchronous}")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.system = None
+        self.pending = 0
+        self.transactions = 0
+        row = self.connection.execute("SELECT MAX(cleaning_seq) FROM rooms").fetchone()
+        self.cleaning_seq = (row[0] or 0) + 1
+
+    def __bool__(self):
+        return self.connection is not None
+
+    def open(self, system=None, **system_options):
+        """Load the database into a fresh system, attach the store and return the system.
+
+        Stored rooms and corridors the system does not have yet are added to
+        it, rooms with their stored type, and ones only the system has are
+        added to the database.
+        """
+        if system is None:
+            system = EnhancedHospitalSystem(**system_options)
+        connection = self.connection
+        room_manager = system.room_manager
+        rooms = room_manager.rooms
+        stored_rooms = connection.execute(
+            "SELECT room_id, room_type, is_vacant, condition, cleaning_seq FROM rooms"
+            " ORDER BY cleaning_seq IS NULL, cleaning_seq").fetchall()
+        for room_id, room_type, is_vacant, condition, cleaning_seq in stored_rooms:
+            room = rooms.get(room_id)
+            if room is None:
+                room = Room(room_id, bool(is_vacant), room_type)
+                room_manager.add_room(room)
+            else:
+                room.is_vacant = bool(is_vacant)
+            room.condition = condition
+            if cleaning_seq is not None:
+                room_manager.cleaning_queue.add_room_to_cleaning(room_id)
+        connection.executemany(INSERT_ROOM, [(room.room_id, room.room_type, room.is_vacant, room.condition)
+                                             for room in rooms.values()])
+        graph = room_manager.graph
+        for from_room, to_room, weight in connection.execute("SELECT from_room, to_room, weight FROM corridors"):
+            graph.add_edge(from_room, to_room, weight)
+        # Each corridor is stored once, under its room IDs in sorted order.
+        connection.executemany(INSERT_CORRIDOR, [(*sorted((from_room, to_room)), weight)
+                                                 for from_room, to_room, weight in graph.edges()])
+        system.staff_manager.add_many(Staff(*row) for row in
+                                      connection.execute("SELECT staff_id, name, role FROM staff"))
+
+        patients = [_patient_from_row(row) for row in connection.execute(SELECT_ACTIVE_PATIENTS)]
+        by_id = {patient.patient_id: patient for patient in patients}
+        for patient_id, entry in connection.execute(
+                "SELECT h.patient_id, h.entry FROM patient_history h JOIN patients p USING (patient_id)"
+                " WHERE p.active ORDER BY h.entry_id"):
+            by_id[patient_id].history.append(entry)
+        treatments = [Treatment(*row) for row in connection.execute(
+            "SELECT treatment_id, patient_id, staff_id, treatment_details, date FROM treatments"
+            " ORDER BY log_position")]
+        for treatment in treatments:
+            patient = by_id.get(treatment.patient_id)
+            if patient is not None:
+                patient.treatments.append(treatment.treatment_details)
+        system.treatment_log.extend(treatments)
+
+        if self.cache_size is not None:
+            system.avl_tree = CachedPatientIndex(system.avl_tree, self.load_patient, self.cache_size)
+        restore_patients(system, patients)
+        for room_id, _, is_vacant, _, _ in stored_rooms:
+            # restore_patients occupies the rooms patients hold; keep the stored flags authoritative.
+            rooms[room_id].is_vacant = bool(is_vacant)
+        row = connection.execute("SELECT value FROM meta WHERE key = 'current_id'").fetchone()
+        system.current_id = max(system.current_id, row[0] if row else 0)
+        connection.commit()
+        self.system = system
+        system.journal = self
+        return system
+
+    def load_patient(self, patient_id):
+        """Fault one patient, admitted or discharged, back in from the database, or return None."""
+        row = self.connection.execute(SELECT_PATIENT, (patient_id,)).fetchone()
+        if row is None:
+            return None
+        patient = _patient_from_row(row)
+        patient.history = [entry for (entry,) in self.connection.execute(SELECT_HISTORY, (patient_id,))]
+        patient.treatments = [details for (details,) in self.connection.execute(SELECT_TREATMENT_DETAILS,
+                                                                                  (patient_id,))]
+        return patient
+
+    def append(self, record):
+        """Apply one journal record; commits once batch_size records are pending."""
+        connection = self.connection
+        op = record["op"]
+        if op == "admit":
+            states = record["patients"]
+            connection.executemany(INSERT_PATIENT, [state[:8] for state in states])
+            connection.executemany(INSERT_HISTORY, [(state[0], entry) for state in states for entry in state[8]])
+            connection.executemany(OCCUPY_ROOM, [(state[7],) for state in states if state[7] is not None])
+            connection.execute(SET_CURRENT_ID, (max(state[0] for state in states),))
+        elif op == "discharge":
+            connection.execute(VACATE_ROOM, (self.cleaning_seq, record["patient_id"]))
+            connection.execute(DISCHARGE_PATIENT, (record["patient_id"],))
+            self.cleaning_seq += 1
+        elif op == "treatment":
+            treatment = record["treatment"]
+            connection.execute(INSERT_TREATMENT, treatment)
+            connection.execute(INSERT_HISTORY, (treatment[1], record["history"]))
+        elif op == "update_priority":
+            connection.execute(UPDATE_PRIORITY, (record["severity"], record["age"], record["patient_id"]))
+            connection.execute(INSERT_HISTORY, (record["patient_id"], record["history"]))
+        elif op == "staff":
+            connection.execute(INSERT_STAFF, record["staff"])
+        elif op == "clean":
+            connection.execute(CLEAN_ROOM, (record["room_id"],))
+        elif op == "assign":
+            assigned = record["rooms"]
+            connection.executemany(ASSIGN_ROOM, [(room_id, patient_id) for patient_id, room_id, _ in assigned])
+            connection.executemany(OCCUPY_ROOM, [(room_id,) for _, room_id, _ in assigned])
+            connection.executemany(INSERT_HISTORY, [(patient_id, entry) for patient_id, _, entry in assigned])
+        else:
+            raise ValueError(f"Unknown journal record {op!r}")
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        """Commit the open transaction."""
+        if self.pending:
+            self.connection.commit()
+            self.pending = 0
+            self.transactions += 1
+
+    def query(self, sql, parameters=()):
+        """Run a read-only query against the stored history, including uncommitted writes."""
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def close(self):
+        if self.connection is not None:
+            self.commit()
+            self.connection.close()
+            self.connection = None
+        if self.system is not None:
+            self.system.journal = None
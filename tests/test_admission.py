@@ -0,0 +1,37 @@
+import pytest
+
+from main import EnhancedHospitalSystem, Patient
+from persistence import snapshot_state
+from workload import make_patients
+
+
+def patient(patient_id, room_id=None):
+    admitted = Patient(patient_id, f"P{patient_id}", 40, "F", 2, 0.0)
+    admitted.room_id = room_id
+    return admitted
+
+
+@pytest.mark.parametrize("batch, message", [
+    ([patient(100), patient(100)], "Duplicate patient ID 100"),
+    ([patient(101), patient(1)], "Duplicate patient ID 1"),
+    ([patient(102, "Room 1"), patient(103, "Room 1")], "already occupied"),
+    ([patient(104, "Reception")], "already occupied"),
+    ([patient(None), patient(106, "Room 99")], "unknown room"),
+])
+def test_bulk_admit_rejects_the_whole_batch_before_changing_anything(batch, message):
+    hospital = EnhancedHospitalSystem()
+    hospital.bulk_admit(make_patients(2))
+    before = snapshot_state(hospital)
+    batch_ids = [admitted.patient_id for admitted in batch]
+    with pytest.raises(ValueError, match=message):
+        hospital.bulk_admit(batch)
+    assert snapshot_state(hospital) == before
+    assert [admitted.patient_id for admitted in batch] == batch_ids
+
+
+def test_bulk_admit_keeps_preset_rooms():
+    hospital = EnhancedHospitalSystem()
+    admitted, roomed = hospital.bulk_admit([patient(None, "Room 2"), patient(None)])
+    assert (admitted, roomed) == (2, 2)
+    assert hospital.find_patient(1).data.room_id == "Room 2"
+    assert not hospital.room_manager.rooms["Room 2"].is_vacant
@@ -0,0 +1,98 @@
+import itertools
+import random
+import time
+
+import pytest
+
+import main
+from main import EnhancedHospitalSystem, solve_assignment
+from workload import make_campus
+
+
+def brute_force(cost):
+    columns = range(len(cost[0]))
+    return min(sum(cost[row][column] for row, column in enumerate(choice))
+               for choice in itertools.permutations(columns, len(cost)))
+
+
+def total(cost, columns):
+    return sum(cost[row][column] for row, column in enumerate(columns))
+
+
+@pytest.fixture(params=["scipy", "numpy", "python"])
+def solver(request, monkeypatch):
+    if request.param == "scipy" and main.linear_sum_assignment is None:
+        pytest.skip("SciPy is not installed")
+    if request.param == "numpy" and main.np is None:
+        pytest.skip("NumPy is not installed")
+    if request.param != "scipy":
+        monkeypatch.setattr(main, "linear_sum_assignment", None)
+    if request.param == "python":
+        monkeypatch.setattr(main, "np", None)
+    assert main.assignment_solver() == request.param
+    return solve_assignment
+
+
+def test_matches_brute_force_on_small_matrices(solver):
+    rng = random.Random(3)
+    for _ in range(300):
+        rows = rng.randint(1, 5)
+        columns = rng.randint(rows, 6)
+        cost = [[rng.choice([rng.randint(0, 20), rng.random() * 50]) for _ in range(columns)]
+                for _ in range(rows)]
+        chosen = solver(cost)
+        assert len(set(chosen)) == rows
+        assert all(0 <= column < columns for column in chosen)
+        assert total(cost, chosen) == pytest.approx(brute_force(cost))
+
+
+def test_ties_and_large_penalties(solver):
+    cost = [[5, 5, 5], [5, 5, 5]]
+    assert total(cost, solver(cost)) == 10
+    big = 10**9
+    cost = [[big, 1, big], [1, big, big], [big, big, 1]]
+    assert solver(cost) == [1, 0, 2]
+
+
+def full_hospital(room_count, waiting_count):
+    """A campus whose wards are all taken, with waiting_count patients admitted one at a time to wait."""
+    hospital = EnhancedHospitalSystem()
+    make_campus(room_count, room_manager=hospital.room_manager, seed=3)
+    wards = [room for room in hospital.room_manager.rooms.values() if room.is_vacant]
+    for room in wards:
+        room.is_vacant = False
+    rng = random.Random(8)
+    for number in range(waiting_count):
+        result = hospital.admit_patient(f"P{number}", rng.randint(1, 95), "MF"[number % 2], rng.randint(1, 3),
+                                        wait=True)
+        assert result.ok and result.data.room_id is None
+    return hospital, wards
+
+
+def test_single_admissions_wait_and_assign_batch_rooms_them():
+    hospital, wards = full_hospital(30, 12)
+    assert not hospital.admit_patient("Late", 40, "F", 2)
+    assert len(hospital.waiting_queue) == 12
+    for room in wards[:5]:
+        room.is_vacant = True
+    assignments, stats = hospital.assign_batch(12)
+    assert stats["assigned"] == len(assignments) > 0
+    assert len(hospital.waiting_queue) == 12 - len(assignments)
+    for patient, room_id in assignments:
+        assert patient.room_id == room_id
+        assert not hospital.room_manager.rooms[room_id].is_vacant
+        assert patient.patient_id not in hospital.waiting_queue
+
+
+def test_numpy_fallback_handles_a_500_batch_in_well_under_a_second(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(main, "linear_sum_assignment", None)
+    hospital, wards = full_hospital(500, 500)
+    for room in wards:
+        room.is_vacant = True
+    started = time.perf_counter()
+    assignments, stats = hospital.assign_batch(500)
+    elapsed = time.perf_counter() - started
+    assert stats["solver"] == "numpy"
+    assert elapsed < 1.0
+    assert stats["assigned"] == len(assignments) > 0
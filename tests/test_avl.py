@@ -0,0 +1,86 @@
+import bisect
+import random
+
+import pytest
+
+from main import AVLTree, Patient
+
+
+def patient(patient_id):
+    return Patient(patient_id, f"P{patient_id}", 40, "F", 2, float(patient_id))
+
+
+def check_balanced(node, low=None, high=None):
+    """Height of the subtree, after checking order, stored heights and the AVL balance."""
+    if node is None:
+        return 0
+    patient_id = node.patient.patient_id
+    assert (low is None or patient_id > low) and (high is None or patient_id < high)
+    left = check_balanced(node.left, low, patient_id)
+    right = check_balanced(node.right, patient_id, high)
+    assert abs(left - right) <= 1
+    assert node.height == max(left, right) + 1
+    return node.height
+
+
+def check(tree, reference):
+    check_balanced(tree.root)
+    assert len(tree) == len(reference)
+    assert [p.patient_id for p in tree.range_scan()] == reference
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_random_inserts_and_deletes_match_a_sorted_list(seed):
+    rng = random.Random(seed)
+    tree, reference = AVLTree(), []
+    for step in range(3000):
+        patient_id = rng.randrange(600)
+        position = bisect.bisect_left(reference, patient_id)
+        present = position < len(reference) and reference[position] == patient_id
+        if rng.random() < 0.55:
+            if present:
+                with pytest.raises(ValueError):
+                    tree.insert(patient(patient_id))
+            else:
+                reference.insert(position, patient_id)
+                tree.insert(patient(patient_id))
+        else:
+            assert tree.delete_patient(patient_id) == present
+            if present:
+                del reference[position]
+        if step % 100 == 0:
+            check(tree, reference)
+    check(tree, reference)
+    for patient_id in range(600):
+        found = tree.find_patient(patient_id)
+        assert (found.patient_id if found else None) == (patient_id if patient_id in reference else None)
+
+
+def test_range_scans_match_a_sorted_list():
+    rng = random.Random(5)
+    ids = rng.sample(range(3000), 800)
+    tree = AVLTree()
+    tree.bulk_insert([patient(patient_id) for patient_id in ids[:400]])
+    for patient_id in ids[400:]:
+        tree.insert(patient(patient_id))
+    for patient_id in ids[::4]:
+        assert tree.delete_patient(patient_id)
+    reference = sorted(set(ids) - set(ids[::4]))
+    check(tree, reference)
+    for _ in range(300):
+        low, high = sorted(rng.randrange(-10, 3010) for _ in range(2))
+        expected = reference[bisect.bisect_left(reference, low):bisect.bisect_right(reference, high)]
+        assert [p.patient_id for p in tree.range_scan(low, high)] == expected
+    assert [p.patient_id for p in tree.range_scan(high=50)] == [i for i in reference if i <= 50]
+    assert [p.patient_id for p in tree.range_scan(low=2950)] == [i for i in reference if i >= 2950]
+
+
+def test_sorted_inserts_stay_balanced():
+    tree = AVLTree()
+    for patient_id in range(1024):
+        tree.insert(patient(patient_id))
+    check(tree, list(range(1024)))
+    assert tree.root.height <= 11
+    for patient_id in range(0, 1024, 2):
+        assert tree.delete_patient(patient_id)
+    check(tree, list(range(1, 1024, 2)))
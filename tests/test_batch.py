@@ -0,0 +1,46 @@
+import io
+
+from main import EnhancedHospitalSystem, read_commands, run_batch
+
+COMMANDS = """\
+{"op": "admit", "name": "Ann", "age": 40, "gender": "F", "severity": 1}
+{"op": "admit", "name": "Bob"
+[1, 2]
+{"op": "teleport"}
+{"op": "admit", "name": "Cy", "age": "old", "gender": "M", "severity": 2}
+
+{"op": "find_patient", "patient_id": 1}
+"""
+
+
+def test_bad_lines_fail_alone_and_the_batch_carries_on():
+    hospital = EnhancedHospitalSystem()
+    report = run_batch(hospital, read_commands(io.StringIO(COMMANDS)))
+    assert report.total == 6
+    errors = dict(report.errors)
+    assert sorted(errors) == [2, 3, 4, 5]
+    assert errors[3] == "Command must be a JSON object, not list"
+    assert errors[4] == "Unknown command 'teleport'"
+    assert report.failures["find_patient"] == 0
+    assert len(report.latencies["find_patient"]) == 1
+    assert hospital.find_patient(1).ok
+
+
+def test_command_that_raises_unexpectedly_is_reported(monkeypatch):
+    hospital = EnhancedHospitalSystem()
+
+    def broken():
+        raise RuntimeError("disk on fire")
+    monkeypatch.setattr(hospital, "census", broken)
+    report = run_batch(hospital, [{"op": "census"}, {"op": "next_patient"}])
+    assert report.errors == [(1, "An error occurred: disk on fire")]
+    assert report.failures["census"] == 1
+    assert report.total == 2
+
+
+def test_csv_rows_keep_working():
+    rows = "op,name,age,gender,severity\nadmit,Ann,40,F,1\n"
+    hospital = EnhancedHospitalSystem()
+    report = run_batch(hospital, read_commands(io.StringIO(rows), "csv"))
+    assert not report.errors
+    assert len(hospital.priority_queue) == 1
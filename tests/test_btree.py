@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from main import BTreePatientIndex, Patient
+
+
+def patient(patient_id):
+    return Patient(patient_id, f"P{patient_id}", 40, "F", 2, float(patient_id))
+
+
+def check(index, reference):
+    assert len(index) == len(reference)
+    assert [p.patient_id for p in index.range_scan()] == sorted(reference)
+
+
+@pytest.mark.parametrize("fanout", [4, 5, 8, 64])
+def test_random_inserts_and_deletes_match_a_dict(fanout):
+    rng = random.Random(fanout)
+    index, reference = BTreePatientIndex(fanout=fanout), {}
+    for step in range(3000):
+        patient_id = rng.randrange(500)
+        if rng.random() < 0.55:
+            if patient_id in reference:
+                with pytest.raises(ValueError):
+                    index.insert(patient(patient_id))
+            else:
+                reference[patient_id] = patient(patient_id)
+                index.insert(reference[patient_id])
+        else:
+            assert index.delete_patient(patient_id) == (reference.pop(patient_id, None) is not None)
+        if step % 100 == 0:
+            check(index, reference)
+    check(index, reference)
+    for patient_id in range(500):
+        assert index.find_patient(patient_id) is reference.get(patient_id)
+
+
+@pytest.mark.parametrize("fanout", [4, 7])
+def test_range_scans_match_a_dict(fanout):
+    rng = random.Random(fanout)
+    ids = rng.sample(range(2000), 600)
+    index = BTreePatientIndex(fanout=fanout)
+    index.bulk_insert([patient(patient_id) for patient_id in ids[:300]])
+    for patient_id in ids[300:]:
+        index.insert(patient(patient_id))
+    for patient_id in ids[::3]:
+        index.delete_patient(patient_id)
+    remaining = sorted(set(ids) - set(ids[::3]))
+    for _ in range(200):
+        low, high = sorted(rng.randrange(-10, 2010) for _ in range(2))
+        expected = [patient_id for patient_id in remaining if low <= patient_id <= high]
+        assert [p.patient_id for p in index.range_scan(low, high)] == expected
+    assert [p.patient_id for p in index.range_scan(high=100)] == [i for i in remaining if i <= 100]
+    assert [p.patient_id for p in index.range_scan(low=1900)] == [i for i in remaining if i >= 1900]
+
+
+def test_delete_everything_leaves_an_empty_tree():
+    index = BTreePatientIndex(fanout=4)
+    for patient_id in range(200):
+        index.insert(patient(patient_id))
+    for patient_id in random.Random(1).sample(range(200), 200):
+        assert index.delete_patient(patient_id)
+    check(index, {})
+    index.insert(patient(7))
+    check(index, {7: None})
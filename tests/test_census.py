@@ -0,0 +1,120 @@
+import random
+from collections import Counter
+
+import pytest
+
+import main
+from main import EnhancedHospitalSystem, Patient, PatientTable
+from workload import make_campus
+
+pytestmark = pytest.mark.skipif(main.np is None, reason="NumPy is not installed")
+
+BINS = (0, 18, 40, 65, 80, 200)
+
+
+def random_patient(rng, patient_id):
+    patient = Patient(patient_id, f"P{patient_id}", rng.randint(0, 99), rng.choice("MF"), rng.randint(1, 3),
+                      rng.uniform(0, 1000), rng.choice([None, "Flu", "Fracture"]))
+    patient.room_id = rng.choice([None, "Room 1", "Room 2", "Ward 7"])
+    return patient
+
+
+def expected_census(patients, now):
+    waiting = [patient for patient in patients if patient.room_id is None]
+    histogram = [sum(1 for patient in waiting if low <= patient.age < high) for low, high in zip(BINS, BINS[1:])]
+    return {
+        "by_severity": dict(Counter(patient.severity for patient in patients)),
+        "waiting_by_severity": dict(Counter(patient.severity for patient in waiting)),
+        "mean_wait": now - sum(patient.arrival_time for patient in waiting) / len(waiting) if waiting else None,
+        "age_histogram": histogram,
+        "rooms": dict(Counter(patient.room_id for patient in patients)),
+        "diseases": dict(Counter(patient.disease for patient in patients)),
+    }
+
+
+def table_census(table, now):
+    return {
+        "by_severity": table.severity_counts(),
+        "waiting_by_severity": table.severity_counts(waiting_only=True),
+        "mean_wait": table.mean_wait(now),
+        "age_histogram": table.age_histogram(BINS)[1],
+        "rooms": table.counts_by("room"),
+        "diseases": table.counts_by("disease"),
+    }
+
+
+def check(table, reference, now=2000.0):
+    assert len(table) == len(reference)
+    expected, actual = expected_census(list(reference.values()), now), table_census(table, now)
+    expected_wait, actual_wait = expected.pop("mean_wait"), actual.pop("mean_wait")
+    assert actual == expected
+    assert (actual_wait is None) == (expected_wait is None)
+    if expected_wait is not None:
+        assert actual_wait == pytest.approx(expected_wait)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_patient_table_matches_the_patients(seed):
+    rng = random.Random(seed)
+    table, reference = PatientTable(capacity=4), {}
+    next_id = 1
+    for step in range(1500):
+        action = rng.random()
+        if action < 0.3:
+            patient = random_patient(rng, next_id)
+            next_id += 1
+            table.add(patient)
+            reference[patient.patient_id] = patient
+        elif action < 0.4:
+            batch = [random_patient(rng, next_id + offset) for offset in range(rng.randint(1, 20))]
+            next_id += len(batch)
+            table.add_many(batch)
+            reference.update((patient.patient_id, patient) for patient in batch)
+        elif action < 0.65 and reference:
+            patient_id = rng.choice(list(reference))
+            table.remove(patient_id)
+            del reference[patient_id]
+        elif action < 0.8 and reference:
+            patient = reference[rng.choice(list(reference))]
+            patient.room_id = rng.choice([None, "Room 3", "Ward 9"])
+            table.set_room(patient.patient_id, patient.room_id)
+        elif reference:
+            patient = reference[rng.choice(list(reference))]
+            patient.severity, patient.age = rng.randint(1, 3), rng.randint(0, 99)
+            table.set_priority(patient.patient_id, patient.severity, patient.age)
+        if step % 100 == 0:
+            check(table, reference)
+    check(table, reference)
+    with pytest.raises(ValueError):
+        table.add(next(iter(reference.values())))
+
+
+def test_census_matches_the_admitted_patients():
+    rng = random.Random(8)
+    hospital = EnhancedHospitalSystem(clock=lambda: 10_000.0)
+    make_campus(25, room_manager=hospital.room_manager)
+    admitted = []
+    for step in range(400):
+        action = rng.random()
+        if action < 0.45:
+            result = hospital.admit_patient(f"P{step}", rng.randint(0, 99), "F", rng.randint(1, 3), wait=True)
+            admitted.append(result.data.patient_id)
+        elif action < 0.7 and admitted:
+            hospital.discharge(admitted.pop(rng.randrange(len(admitted))))
+            hospital.mark_room_clean()
+        elif action < 0.85 and admitted:
+            hospital.update_priority(rng.choice(admitted), severity=rng.randint(1, 3))
+        else:
+            hospital.assign_batch(k=5)
+    patients = [hospital.avl_tree.find_patient(patient_id) for patient_id in admitted]
+    data = hospital.census(now=10_000.0).data
+    expected = expected_census(patients, 10_000.0)
+    assert data["admitted"] == len(patients)
+    assert data["waiting"] == sum(1 for patient in patients if patient.room_id is None)
+    assert data["by_severity"] == expected["by_severity"]
+    assert data["waiting_by_severity"] == expected["waiting_by_severity"]
+    assert data["waiting_age_histogram"][1] == expected["age_histogram"]
+    if expected["mean_wait"] is None:
+        assert data["mean_wait_seconds"] is None
+    else:
+        assert data["mean_wait_seconds"] == pytest.approx(expected["mean_wait"])
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from main import CleaningQueue
+
+ROOM_TYPES = ("General", "ICU", "Surgery")
+
+
+def expected_next(queued, demand):
+    """Reference pick: the room with the most demand for its type, oldest first (FIFO without demand)."""
+    if not queued:
+        return None
+    if demand is None:
+        return queued[0][1]
+    return min(queued, key=lambda item: (-demand(item[2]), item[0]))[1]
+
+
+@pytest.mark.parametrize("priority", [False, True])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_random_operations_match_a_plain_list(priority, seed):
+    rng = random.Random(seed)
+    room_types = {f"Room {number}": rng.choice(ROOM_TYPES) for number in range(40)}
+    waiting = dict.fromkeys(ROOM_TYPES, 0)
+    queue = CleaningQueue(room_types.__getitem__)
+    if priority:
+        queue.demand = waiting.__getitem__
+    queued = []  # (seq, room_id, room_type) in enqueue order
+    seq = 0
+    for _ in range(3000):
+        action = rng.random()
+        room_id = rng.choice(list(room_types))
+        if action < 0.4:
+            queue.add_room_to_cleaning(room_id)
+            if all(item[1] != room_id for item in queued):
+                queued.append((seq, room_id, room_types[room_id]))
+                seq += 1
+        elif action < 0.6:
+            expected = expected_next(queued, queue.demand)
+            assert queue.pop_next_room() == expected
+            queued = [item for item in queued if item[1] != expected]
+        elif action < 0.75:
+            present = any(item[1] == room_id for item in queued)
+            assert queue.mark_room_cleaned(room_id) == present
+            queued = [item for item in queued if item[1] != room_id]
+        else:
+            waiting[rng.choice(ROOM_TYPES)] = rng.randrange(5)
+        assert len(queue) == len(queued)
+        assert queue.get_next_room_to_clean() == expected_next(queued, queue.demand)
+    assert list(queue.cleaning_queue) == [item[1] for item in queued]
@@ -0,0 +1,61 @@
+import pytest
+
+from main import PROFILER, AVLTree, MinHeapPriorityQueue, Patient
+
+
+def patient(patient_id, severity=2):
+    return Patient(patient_id, f"P{patient_id}", 40, "F", severity, patient_id)
+
+
+@pytest.fixture
+def profiler():
+    PROFILER.reset()
+    PROFILER.enable()
+    yield PROFILER
+    PROFILER.disable()
+    PROFILER.reset()
+
+
+def balanced_tree():
+    tree = AVLTree()
+    tree.bulk_insert([patient(patient_id) for patient_id in range(1, 8)])  # root 4, then 2 / 6
+    return tree
+
+
+def test_avl_counts_the_comparisons_each_walk_makes(profiler):
+    tree = balanced_tree()
+    assert tree.find_patient(4).patient_id == 4
+    assert profiler.counters == {"avl.comparisons": 1}
+    assert tree.find_patient(1).patient_id == 1
+    assert tree.find_patient(8) is None
+    assert profiler.counters["avl.comparisons"] == 1 + 3 + 3
+
+    profiler.reset()
+    assert tree.delete_patient(4)
+    assert profiler.counters["avl.comparisons"] == 1
+    assert profiler.counters["avl.successor_steps"] == 2  # 6, then its left child 5
+    assert profiler.counters["avl.rebalance_checks"] >= 1
+
+    profiler.reset()
+    tree.insert(patient(8))
+    assert profiler.counters["avl.comparisons"] == 4  # 5, 6, 7, then the side for the new leaf
+
+
+def test_heap_counts_sift_comparisons(profiler):
+    queue = MinHeapPriorityQueue()
+    queue.add_patient(patient(1, severity=3))
+    assert profiler.counters.get("heap.comparisons", 0) == 0
+    queue.add_patient(patient(2, severity=1))
+    assert profiler.counters["heap.comparisons"] == 1
+    queue.add_patient(patient(3, severity=2))
+    assert profiler.counters["heap.comparisons"] == 2
+    assert queue.pop_patient().patient_id == 2
+    assert profiler.counters["heap.comparisons"] == 3  # no sibling to compare; one climb comparison
+
+
+def test_counters_stay_empty_while_disabled():
+    PROFILER.reset()
+    tree = balanced_tree()
+    tree.find_patient(1)
+    tree.delete_patient(4)
+    assert PROFILER.counters == {}
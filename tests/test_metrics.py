@@ -0,0 +1,84 @@
+from main import EnhancedHospitalSystem, Room
+from persistence import HospitalStore
+from workload import make_campus
+
+
+def occupied(system, room_type):
+    return system.metrics.room_occupancy()[room_type]["occupied"]
+
+
+def test_rooms_added_after_metrics_are_vacant_capacity():
+    system = EnhancedHospitalSystem()
+    for number in range(3):
+        system.room_manager.add_room(Room(f"ICU {number}", room_type="ICU"))
+    icu = system.metrics.room_occupancy()["ICU"]
+    assert icu["occupied"] == 0
+    assert icu["rooms"] == 4
+    assert icu["current"] == 0
+
+
+def test_room_of_a_new_type_is_reported():
+    system = EnhancedHospitalSystem()
+    system.room_manager.add_room(Room("Ward X", room_type="Maternity"))
+    assert system.metrics.room_occupancy()["Maternity"] == {
+        "occupied": 0, "rooms": 1, "current": 0.0, "window_average": 0.0}
+
+
+def test_occupancy_counts_only_real_changes_on_a_campus():
+    system = EnhancedHospitalSystem()
+    make_campus(40, room_manager=system.room_manager)
+    rooms = system.room_manager.rooms
+    general = [room for room in rooms.values() if room.room_type == "General" and room.is_vacant]
+    for room in general[:5]:
+        room.is_vacant = False
+    assert occupied(system, "General") == 5
+    general[0].is_vacant = True
+    assert occupied(system, "General") == 4
+    report = system.metrics.room_occupancy()
+    for room_type, row in report.items():
+        capacity = sum(1 for room in rooms.values() if room.room_type == room_type and room.room_id not in
+                       ("Reception", "Power and Monitoring Hub"))
+        assert row["rooms"] == capacity
+        assert 0 <= row["occupied"] <= row["rooms"]
+
+
+def test_admissions_on_a_campus_match_occupied_rooms():
+    system = EnhancedHospitalSystem()
+    make_campus(30, room_manager=system.room_manager, type_mix={"General": 1})
+    admitted = [system.admit_patient(f"P{number}", 40, "F", 3).data for number in range(12)]
+    assert all(system.room_manager.rooms[patient.room_id].room_type == "General" for patient in admitted)
+    assert occupied(system, "General") == 12
+    system.discharge(admitted[0].patient_id)
+    assert occupied(system, "General") == 11
+    assert system.metrics.room_occupancy()["General"]["rooms"] == 32
+
+
+def test_room_added_occupied_is_counted_and_never_goes_negative():
+    system = EnhancedHospitalSystem()
+    room = Room("ICU 9", is_vacant=False, room_type="ICU")
+    system.room_manager.add_room(room)
+    assert occupied(system, "ICU") == 1
+    room.is_vacant = True
+    assert occupied(system, "ICU") == 0
+    system.room_manager.rooms["Reception"].is_vacant = True  # occupied before the metrics attached
+    assert all(row["occupied"] >= 0 for row in system.metrics.room_occupancy().values())
+    room.is_vacant = False
+    assert occupied(system, "ICU") == 1
+
+
+def test_restored_campus_discharges_keep_occupancy_consistent(tmp_path):
+    campus = EnhancedHospitalSystem()
+    make_campus(20, room_manager=campus.room_manager, type_mix={"General": 1})
+    store = HospitalStore(str(tmp_path), fsync=False)
+    hospital = store.open(campus)
+    admitted = [hospital.admit_patient(f"P{number}", 40, "F", 3).data.patient_id for number in range(6)]
+    store.snapshot()
+    store.close()
+
+    store = HospitalStore(str(tmp_path), fsync=False)
+    restored = store.open()
+    assert occupied(restored, "General") == 6
+    for patient_id in admitted:
+        assert restored.discharge(patient_id)
+    assert occupied(restored, "General") == 0
+    store.close()
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from main import DynamicMST, Graph
+from workload import make_facility_graph
+
+
+def forest_weight(graph):
+    return sum(weight for _, _, weight in graph.kruskal_mst())
+
+
+def check(mst, graph):
+    edges = list(mst.edges())
+    assert len(edges) == mst.edge_count == len(graph.kruskal_mst())
+    assert sum(weight for _, _, weight in edges) == mst.total_weight == forest_weight(graph)
+    for from_node, to_node, weight in edges:
+        assert graph.weight(from_node, to_node) == weight
+
+
+def test_dynamic_mst_matches_kruskal_after_edge_changes():
+    rng = random.Random(5)
+    graph = make_facility_graph(60, 150, seed=5, max_weight=30)
+    mst = DynamicMST(graph)
+    check(mst, graph)
+    for step in range(600):
+        edges = list(graph.edges())
+        action = rng.random()
+        if action < 0.35 and edges:
+            from_node, to_node, _ = rng.choice(edges)
+            graph.remove_edge(from_node, to_node)
+        elif action < 0.7 and edges:
+            from_node, to_node, _ = rng.choice(edges)
+            graph.add_edge(from_node, to_node, rng.randint(1, 30))  # reweigh, up or down
+        else:
+            from_node, to_node = rng.sample(range(60), 2)
+            graph.add_edge(from_node, to_node, rng.randint(1, 30))
+        if step % 20 == 0:
+            check(mst, graph)
+    check(mst, graph)
+
+
+def test_new_rooms_and_disconnected_parts():
+    graph = Graph()
+    graph.add_edge("A", "B", 4)
+    graph.add_edge("C", "D", 2)
+    mst = DynamicMST(graph)
+    check(mst, graph)
+    graph.add_edge("B", "C", 9)
+    graph.add_edge("E", "A", 1)
+    graph.add_edge("A", "C", 3)
+    check(mst, graph)
+    assert mst.total_weight == 4 + 2 + 1 + 3
+    graph.remove_edge("A", "C")
+    check(mst, graph)
+    assert mst.total_weight == 4 + 2 + 1 + 9
+
+
+def test_csr_kruskal_matches_the_graph():
+    pytest.importorskip("numpy")
+    graph = make_facility_graph(200, 700, seed=2)
+    csr_forest = graph.to_csr().kruskal_mst()
+    assert sum(weight for _, _, weight in csr_forest) == forest_weight(graph)
+    assert len(csr_forest) == 199
@@ -0,0 +1,95 @@
+import itertools
+import random
+
+import pytest
+
+from main import EnhancedHospitalSystem, paginate
+from workload import make_campus
+
+
+@pytest.fixture(scope="module")
+def hospital():
+    rng = random.Random(3)
+    hospital = EnhancedHospitalSystem()
+    make_campus(30, room_manager=hospital.room_manager)
+    for number in range(8):
+        hospital.register_staff(f"S{number}", f"Staff {number}", rng.choice(["Doctor", "Nurse"]))
+    admitted = []
+    for number in range(250):
+        result = hospital.admit_patient(f"P{number}", rng.randint(1, 90), "F", rng.randint(1, 3), wait=True)
+        admitted.append(result.data.patient_id)
+        if rng.random() < 0.3:
+            hospital.discharge(admitted.pop(rng.randrange(len(admitted))))
+    for number in range(300):
+        hospital.record_treatment(f"T{number}", rng.choice(admitted), f"S{rng.randrange(8)}", "Checkup")
+    return hospital
+
+
+def all_pages(command, key, page_size, **filters):
+    items = []
+    for page in itertools.count(1):
+        data = command(page=page, page_size=page_size, **filters).data
+        assert len(data[key]) <= page_size
+        items.extend(data[key])
+        if not data["has_more"]:
+            return items
+        assert len(data[key]) == page_size
+
+
+def priority_order(queue):
+    return [entry[4] for entry in sorted(queue.heap, key=lambda entry: entry[:4])]
+
+
+def matches(hospital, patient, severity, room_type, waiting):
+    rooms = hospital.room_manager.rooms
+    return ((severity is None or patient.severity == severity)
+            and (room_type is None or (patient.room_id is not None and rooms[patient.room_id].room_type == room_type))
+            and (waiting is None or (patient.room_id is None) == waiting))
+
+
+@pytest.mark.parametrize("severity", [None, 2])
+@pytest.mark.parametrize("room_type", [None, "General"])
+@pytest.mark.parametrize("waiting", [None, True, False])
+@pytest.mark.parametrize("page_size", [1, 7, 50])
+def test_patient_pages_cover_every_match_once(hospital, severity, room_type, waiting, page_size):
+    filters = {"severity": severity, "room_type": room_type, "waiting": waiting}
+    by_id = list(hospital.avl_tree.range_scan())
+    expected = [patient for patient in by_id if matches(hospital, patient, **filters)]
+    assert all_pages(hospital.patients_page, "patients", page_size, order="id", **filters) == expected
+
+    queue = hospital.waiting_queue if waiting else hospital.priority_queue
+    expected = [patient for patient in priority_order(queue) if matches(hospital, patient, **filters)]
+    assert all_pages(hospital.patients_page, "patients", page_size, order="priority", **filters) == expected
+
+
+def test_keyset_paging_by_id_matches_offsets(hospital):
+    expected = list(hospital.avl_tree.range_scan())
+    seen, after_id = [], None
+    while True:
+        data = hospital.patients_page(after_id=after_id, page_size=9).data
+        seen.extend(data["patients"])
+        if not data["has_more"]:
+            break
+        after_id = data["next_after_id"]
+    assert seen == expected
+
+
+@pytest.mark.parametrize("filters", [{}, {"patient_id": 5}, {"staff_id": "S3"},
+                                     {"staff_id": "S1", "start_date": "2000-01-01", "end_date": "2100-01-01"}])
+def test_treatment_and_staff_pages_cover_every_match_once(hospital, filters):
+    expected = list(hospital.treatment_log.iter_records(**filters))
+    assert all_pages(hospital.treatments_page, "treatments", 11, **filters) == expected
+    for role in (None, "Doctor", "Nurse", "Porter"):
+        staff = hospital.staff_manager.list_staff()
+        expected = [member for member in staff if role is None or member.role == role]
+        assert all_pages(hospital.staff_page, "staff", 3, role=role) == expected
+
+
+def test_paginate_stops_one_past_the_page():
+    consumed = []
+    items, has_more = paginate((consumed.append(number) or number for number in range(100)), page=3, page_size=5)
+    assert items == [10, 11, 12, 13, 14] and has_more
+    assert len(consumed) == 16
+    assert paginate(range(10), page=2, page_size=5) == ([5, 6, 7, 8, 9], False)
+    with pytest.raises(ValueError):
+        paginate(range(10), page=0)
@@ -0,0 +1,137 @@
+import os
+import pickle
+import time
+
+import pytest
+
+from main import EnhancedHospitalSystem
+from persistence import HospitalStore, Journal, read_journal, snapshot_state
+from workload import make_campus
+
+
+def state(system):
+    captured = snapshot_state(system)
+    captured.pop("version")
+    captured["corridors"] = sorted(tuple(sorted(map(str, edge[:2]))) + (edge[2],) for edge in captured["corridors"])
+    return captured
+
+
+def busy_hospital(store):
+    hospital = store.open()
+    hospital.register_staff("S1", "Staff 1", "Doctor")
+    for number in range(8):
+        hospital.admit_patient(f"P{number}", 20 + number, "MF"[number % 2], 1 + number % 3)
+    for number in range(1, 4):
+        hospital.record_treatment(f"T{number}", number, "S1", "Checkup")
+    hospital.discharge(2)
+    hospital.mark_room_clean()
+    hospital.update_priority(3, severity=1)
+    return hospital
+
+
+def segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith("journal-"))
+
+
+def test_restart_restores_the_same_state(tmp_path):
+    store = HospitalStore(str(tmp_path), fsync=False)
+    expected = state(busy_hospital(store))
+    store.close()
+    assert state(HospitalStore(str(tmp_path), fsync=False).open()) == expected
+
+
+def test_restart_from_snapshot_and_journal_tail(tmp_path):
+    store = HospitalStore(str(tmp_path), snapshot_every=5, fsync=False)
+    expected = state(busy_hospital(store))
+    store.close()
+    assert any(name.startswith("snapshot-") for name in os.listdir(tmp_path))
+    restored = HospitalStore(str(tmp_path), fsync=False)
+    assert state(restored.open()) == expected
+    assert restored.replayed < restored.lsn
+
+
+def test_snapshot_restores_campus_rooms_and_corridors(tmp_path):
+    campus = EnhancedHospitalSystem()
+    make_campus(40, room_manager=campus.room_manager)
+    store = HospitalStore(str(tmp_path), fsync=False)
+    hospital = store.open(campus)
+    for number in range(30):
+        hospital.admit_patient(f"P{number}", 30, "F", 1 + number % 3)
+    hospital.discharge(5)
+    hospital.mark_room_clean()
+    hospital.room_manager.graph.remove_edge("Room 1", "Room 2")
+    store.snapshot()
+    expected = state(hospital)
+    store.close()
+
+    restored = HospitalStore(str(tmp_path), fsync=False)
+    system = restored.open()  # the default layout, without the campus wards
+    assert restored.replayed == 0
+    assert state(system) == expected
+    assert system.admit_patient("Late", 50, "M", 1).ok
+
+
+def test_snapshot_with_class_references_is_refused(tmp_path):
+    store = HospitalStore(str(tmp_path), fsync=False)
+    busy_hospital(store)
+    path = store.snapshot()
+    store.close()
+    with open(path, "wb") as stream:
+        pickle.dump({"version": 2, "patients": [EnhancedHospitalSystem]}, stream)
+    with pytest.raises(pickle.UnpicklingError):
+        HospitalStore(str(tmp_path), fsync=False).open()
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    store = HospitalStore(str(tmp_path), fsync=False)
+    expected = state(busy_hospital(store))
+    store.close()
+    path = os.path.join(tmp_path, segments(tmp_path)[-1])
+    size = os.path.getsize(path)
+    with open(path, "ab") as stream:
+        stream.write(b'{"op":"discharge","patient_id":1,"ls')
+    assert state(HospitalStore(str(tmp_path), fsync=False).open()) == expected
+    assert os.path.getsize(path) == size
+
+
+def test_gap_in_the_journal_raises(tmp_path):
+    store = HospitalStore(str(tmp_path), fsync=False)
+    busy_hospital(store)
+    store.close()
+    path = os.path.join(tmp_path, segments(tmp_path)[-1])
+    with open(path, "rb") as stream:
+        lines = stream.readlines()
+    with open(path, "wb") as stream:
+        stream.writelines(lines[:3] + lines[4:])
+    with pytest.raises(ValueError, match="Journal gap"):
+        HospitalStore(str(tmp_path), fsync=False).open()
+
+
+def test_corrupt_record_before_the_tail_raises(tmp_path):
+    path = os.path.join(tmp_path, "journal.log")
+    with open(path, "wb") as stream:
+        stream.write(b'{"op":"clean","lsn":1}\nnot json\n{"op":"clean","lsn":3}\n')
+    with pytest.raises(ValueError, match="Corrupt journal record"):
+        list(read_journal(path))
+
+
+def test_quiet_journal_commits_on_a_timer(tmp_path):
+    path = os.path.join(tmp_path, "journal.log")
+    journal = Journal(path, 1, group_size=256, commit_interval=0.02, fsync=False)
+    journal.append({"op": "clean", "room_id": "Room 1"})
+    deadline = time.monotonic() + 2
+    while journal.commits == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [record["lsn"] for record in read_journal(path)] == [1]
+    journal.close()
+    assert not journal.flusher.is_alive()
+
+
+def test_timed_commits_can_be_turned_off(tmp_path):
+    path = os.path.join(tmp_path, "journal.log")
+    journal = Journal(path, 1, group_size=256, commit_interval=float("inf"), fsync=False)
+    journal.append({"op": "clean", "room_id": "Room 1"})
+    time.sleep(0.05)
+    assert list(read_journal(path)) == []
+    journal.close()
+    assert len(list(read_journal(path))) == 1
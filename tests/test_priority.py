@@ -0,0 +1,63 @@
+import pytest
+
+from main import EnhancedHospitalSystem
+from persistence import HospitalStore
+from snapshots import SnapshotPublisher
+from sqlite_store import SQLiteStore
+from workload import make_patients
+
+
+def waiting_hospital(hospital):
+    # Four rooms, eight patients: the rest wait in both queues.
+    hospital.bulk_admit(make_patients(8, severity_mix={3: 1}))
+    return next(entry[4] for entry in hospital.waiting_queue.heap)
+
+
+def test_update_priority_rekeys_both_queues_and_counts(tmp_path):
+    store = HospitalStore(str(tmp_path))
+    hospital = store.open()
+    patient = waiting_hospital(hospital)
+    publisher = SnapshotPublisher(hospital)
+
+    result = hospital.update_priority(patient.patient_id, severity=1)
+    assert result.ok
+    assert hospital.priority_queue.get_next_patient() is patient
+    assert hospital.waiting_queue.get_next_patient() is patient
+    assert hospital.waiting_queue.entries[patient.patient_id][0] == 1
+    assert hospital.waiting_queue.severity_counts[1] == 1
+    assert hospital.priority_queue.severity_counts[1] == 1
+    assert hospital.patient_table.severity_counts(waiting_only=True)[1] == 1
+    assert publisher.current.priority_page(0, 1)[0].patient_id == patient.patient_id
+    assert publisher.current.patient(patient.patient_id).severity == 1
+    store.close()
+
+    restored = HospitalStore(str(tmp_path)).open()
+    again = restored.find_patient(patient.patient_id).data
+    assert again.severity == 1
+    assert again.history[-1].startswith("Priority updated to severity 1")
+    assert restored.waiting_queue.get_next_patient().patient_id == patient.patient_id
+
+
+def test_update_priority_in_sqlite(tmp_path):
+    store = SQLiteStore(str(tmp_path / "hospital.db"))
+    hospital = store.open()
+    patient = waiting_hospital(hospital)
+    hospital.update_priority(patient.patient_id, severity=2, age=70)
+    store.close()
+
+    restored = SQLiteStore(str(tmp_path / "hospital.db")).open()
+    again = restored.find_patient(patient.patient_id).data
+    assert (again.severity, again.age) == (2, 70)
+    assert restored.waiting_queue.severity_counts[2] == 1
+
+
+def test_update_priority_rejects_bad_input():
+    hospital = EnhancedHospitalSystem()
+    patient = hospital.admit_patient("Ann", 40, "F", 3).data
+    assert not hospital.update_priority(999, severity=1)
+    hospital.discharge(patient.patient_id)
+    assert not hospital.update_priority(patient.patient_id, severity=1)
+    with pytest.raises(ValueError):
+        hospital.update_priority(patient.patient_id)
+    with pytest.raises(ValueError):
+        hospital.update_priority(patient.patient_id, severity=4)
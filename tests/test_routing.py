@@ -0,0 +1,97 @@
+import heapq
+import random
+
+import pytest
+
+from main import Graph, Router
+from workload import make_facility_graph
+
+
+def reference_distances(graph, source):
+    distances = {source: 0}
+    heap = [(0, source)]
+    while heap:
+        distance, node = heapq.heappop(heap)
+        if distance > distances[node]:
+            continue
+        for neighbor, weight in graph.get_neighbors(node):
+            if distance + weight < distances.get(neighbor, float("inf")):
+                distances[neighbor] = distance + weight
+                heapq.heappush(heap, (distance + weight, neighbor))
+    return distances
+
+
+def check_route(graph, route, source, target, distance):
+    assert route.distance == distance
+    assert route.path[0] == source and route.path[-1] == target
+    assert sum(graph.weight(a, b) for a, b in zip(route.path, route.path[1:])) == distance
+
+
+@pytest.mark.parametrize("method", ["auto", "astar", "bidirectional", "dijkstra"])
+def test_routes_match_plain_dijkstra(method):
+    rng = random.Random(9)
+    graph = make_facility_graph(300, 900, seed=9)
+    router = Router(graph, landmarks=4, hot_after=2)
+    sources = rng.sample(range(300), 6)
+    for source in sources:
+        expected = reference_distances(graph, source)
+        for target in rng.sample(range(300), 20) + [source]:
+            check_route(graph, router.route(source, target, method), source, target, expected[target])
+
+
+def test_cached_trees_are_dropped_when_corridors_change():
+    rng = random.Random(4)
+    graph = make_facility_graph(120, 300, seed=4)
+    router = Router(graph, hot_after=1)
+    for _ in range(40):
+        source, target = rng.sample(range(120), 2)
+        router.route(source, target)
+        from_node, to_node, _ = rng.choice(list(graph.edges()))
+        if rng.random() < 0.5:
+            graph.add_edge(from_node, to_node, rng.randint(1, 100))
+        else:
+            graph.remove_edge(from_node, to_node)
+        expected = reference_distances(graph, source)
+        route = router.route(source, target)
+        if target in expected:
+            check_route(graph, route, source, target, expected[target])
+        else:
+            assert route is None
+
+
+def test_nearest_source_matches_plain_dijkstra():
+    rng = random.Random(6)
+    graph = make_facility_graph(250, 600, seed=6)
+    router = Router(graph)
+    for _ in range(30):
+        target = rng.randrange(250)
+        sources = rng.sample(range(250), 15)
+        expected = reference_distances(graph, target)
+        source, route = router.nearest(target, sources)
+        assert route.distance == min(expected[candidate] for candidate in sources)
+        check_route(graph, Router(graph).route(source, target), source, target, route.distance)
+        assert route.path[0] == source and route.path[-1] == target
+
+
+def test_unreachable_and_unknown_nodes():
+    graph = Graph()
+    graph.add_edge("A", "B", 1)
+    graph.add_edge("C", "D", 1)
+    router = Router(graph)
+    assert router.route("A", "D") is None
+    assert router.route("A", "D", "astar") is None
+    assert router.nearest("A", ["C", "D"]) is None
+    with pytest.raises(ValueError):
+        router.route("A", "Z")
+
+
+def test_nodes_added_after_the_landmarks_are_routed():
+    graph = make_facility_graph(60, 150, seed=2)
+    router = Router(graph, landmarks=3)
+    check_route(graph, router.route(0, 59, "astar"), 0, 59, reference_distances(graph, 0)[59])
+    graph.add_node(1000)
+    assert router.route(0, 1000, "astar") is None
+    assert router.route(1000, 0, "astar") is None
+    graph.add_edge(1000, 59, 5)
+    route = router.route(0, 1000, "astar")
+    check_route(graph, route, 0, 1000, reference_distances(graph, 0)[59] + 5)
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from main import EnhancedHospitalSystem
+from service import HospitalService
+
+
+class FailingStore:
+    def __init__(self):
+        self.commits = 0
+
+    def __bool__(self):
+        return True
+
+    def commit(self):
+        self.commits += 1
+        raise OSError("No space left on device")
+
+
+def admit(name):
+    return "admit", {"name": name, "age": 40, "gender": "F", "severity": 1}
+
+
+async def exchange(service, lines):
+    """Send request lines through handle_client and collect the response lines."""
+    reader = asyncio.StreamReader()
+    for line in lines:
+        reader.feed_data(json.dumps(line).encode() + b"\n")
+    reader.feed_eof()
+
+    class Writer:
+        def __init__(self):
+            self.lines = []
+
+        def write(self, data):
+            self.lines.append(json.loads(data))
+
+        async def drain(self):
+            pass
+
+        def close(self):
+            pass
+    writer = Writer()
+    await service.handle_client(reader, writer)
+    return writer.lines
+
+
+def test_failed_commit_refuses_the_group_and_later_mutations():
+    async def scenario():
+        service = HospitalService(EnhancedHospitalSystem(), FailingStore())
+        loop = asyncio.get_running_loop()
+        replies = [loop.create_future() for _ in range(2)]
+        for number, reply in enumerate(replies):
+            service.mutations.put_nowait((*admit(f"P{number}"), reply))
+        writer = asyncio.create_task(service.writer())
+        responses = await asyncio.gather(*replies)
+        await asyncio.wait_for(writer, 1)
+        later = await exchange(service, [{"id": 1, "op": "discharge", "patient_id": 1},
+                                         {"id": 2, "op": "find_patient", "patient_id": 1}])
+        return service, responses, later
+
+    service, responses, later = asyncio.run(scenario())
+    assert service.store.commits == 1
+    assert [response["ok"] for response in responses] == [False, False]
+    assert "No space left on device" in responses[0]["message"]
+    assert later[0] == {"id": 1, **service._refusal()}
+    assert later[1]["ok"]  # reads are still answered until the server stops
+
+
+def test_serve_stops_when_the_writer_does():
+    async def scenario():
+        service = HospitalService(EnhancedHospitalSystem(), FailingStore())
+        serving = asyncio.create_task(service.serve(port=0))
+        await asyncio.sleep(0.05)
+        reply = asyncio.get_running_loop().create_future()
+        service.mutations.put_nowait((*admit("Ann"), reply))
+        response = await reply
+        await asyncio.wait_for(serving, 1)
+        return response
+
+    assert not asyncio.run(scenario())["ok"]
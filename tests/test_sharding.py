@@ -0,0 +1,63 @@
+import pytest
+
+from main import Graph
+from sharding import ID_BLOCK, ShardedHospital
+
+# Every campus has the default Rooms 1-4 plus one ICU ward, so severity 3 patients
+# (General, then Surgery) fit in exactly three rooms per campus.
+CAMPUSES = [{"name": name, "wards": 1, "seed": seed, "type_mix": {"ICU": 1}}
+            for seed, name in enumerate(("North", "South", "East"))]
+
+
+@pytest.fixture
+def region():
+    graph = Graph()
+    graph.add_edge("North", "South", 40)
+    graph.add_edge("North", "East", 15)
+    graph.add_edge("East", "South", 10)
+    with ShardedHospital(CAMPUSES, graph) as hospital:
+        yield hospital
+
+
+def admit(name, campus, age=40, severity=3):
+    return {"op": "admit", "campus": campus, "name": name, "age": age, "gender": "F", "severity": severity}
+
+
+def test_region_routes_orders_and_merges(region):
+    # execute_many: results come back in command order, and each shard runs its own commands in order.
+    results = region.execute_many([
+        admit("A", "North"), admit("B", "South", age=50), {"op": "find_patient", "patient_id": 1},
+        admit("C", "North", age=30), {"op": "discharge", "patient_id": 1}, {"op": "find_patient", "patient_id": 1},
+        {"op": "find_patient", "patient_id": ID_BLOCK + 1},
+    ])
+    assert [result.ok for result in results] == [True, True, True, True, True, False, True]
+    assert (results[0].data["patient_id"], results[0].data["campus"]) == (1, "North")
+    assert (results[1].data["patient_id"], results[1].data["campus"]) == (ID_BLOCK + 1, "South")
+    assert results[2].data["name"] == "A"
+    assert results[3].data["patient_id"] == 2
+    assert results[6].data["name"] == "B"
+    assert region.mark_room_clean("North").ok
+
+    # shard_for: the ID block names the owning campus.
+    assert [region.shard_for(patient_id) for patient_id in (1, ID_BLOCK - 1, ID_BLOCK + 1, 2 * ID_BLOCK + 7)] \
+        == [0, 0, 1, 2]
+    with pytest.raises(ValueError):
+        region.shard_for(3 * ID_BLOCK + 1)
+    assert region.find_patient(ID_BLOCK + 1).data["campus"] == "South"
+
+    # next_patient: a merge of each shard's cached top key.
+    urgent = region.admit_patient("U", 60, "M", 1, campus="East")
+    assert urgent.data["patient_id"] == 2 * ID_BLOCK + 1
+    top = region.next_patient()
+    assert (top.data["patient_id"], top.data["campus"]) == (urgent.data["patient_id"], "East")
+    assert region.discharge(urgent.data["patient_id"]).ok
+    top = region.next_patient()
+    assert (top.data["name"], top.data["campus"]) == ("C", "North")  # (3, 30) beats South's (3, 50)
+
+    # _admit_elsewhere: a full home campus sends patients to the others, nearest first.
+    placed = [region.admit_patient(f"P{number}", 40, "F", 3, campus="North") for number in range(7)]
+    assert all(result.ok for result in placed)
+    assert [result.data["campus"] for result in placed] == ["North"] * 2 + ["East"] * 3 + ["South"] * 2
+    assert [result.data.get("transfer_minutes") for result in placed] == [None] * 2 + [15] * 3 + [25] * 2
+    assert not region.admit_patient("Overflow", 40, "F", 3, campus="North").ok
+    assert region.vacancy()["South"].get("General", 0) == 0
@@ -0,0 +1,34 @@
+from simulation import Scenario, Simulation, run_replicas, simulate, summarize
+
+SMALL = Scenario("small", days=4.0, warmup_days=1.0, beds={"General": 10, "ICU": 4, "Surgery": 3},
+                 arrival_rates={1: 0.1, 2: 0.3, 3: 0.5}, staff_count=5)
+
+
+def without_wall_time(report):
+    return {key: value for key, value in report.items() if key != "wall_seconds"}
+
+
+def test_same_seed_gives_the_same_report():
+    first, second = simulate(SMALL, seed=3), simulate(SMALL, seed=3)
+    assert without_wall_time(first) == without_wall_time(second)
+    assert without_wall_time(simulate(SMALL, seed=4)) != without_wall_time(first)
+    assert [without_wall_time(report) for report in run_replicas(SMALL, replicas=2, workers=1, first_seed=3)] \
+        == [without_wall_time(first), without_wall_time(simulate(SMALL, seed=4))]
+
+
+def test_small_scenario_keeps_its_books():
+    simulation = Simulation(SMALL.replace(rate_profile=[2.0] * 12 + [0.0] * 12), seed=1)
+    report = simulation.run()
+    assert report["days"] == SMALL.days - SMALL.warmup_days
+    assert sum(report["arrivals"].values()) > 0 and report["roomed"] > 0
+    assert report["still_waiting"] == len(simulation.system.waiting_queue)
+    vacant = simulation.system.room_manager.vacant_rooms
+    for room_type, beds in report["beds"].items():
+        assert beds["beds"] == SMALL.beds[room_type]
+        assert 0 <= beds["utilization"] <= 1 and 0 <= beds["cleaning_share"] <= 1
+        assert beds["peak_occupied"] <= beds["beds"]
+        # Every bed is occupied, held for cleaning or vacant.
+        levels = simulation.occupied[room_type].level + simulation.held[room_type].level
+        assert levels + len(vacant.get(room_type, ())) == beds["beds"]
+    summary = summarize([report, simulate(SMALL, seed=2)])
+    assert summary["replicas"] == 2 and set(summary["beds"]) == set(SMALL.beds)
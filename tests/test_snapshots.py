@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from main import EnhancedHospitalSystem
+from snapshots import HospitalSnapshot, PersistentMap, SnapshotPublisher
+from workload import make_campus
+
+
+def check_balanced(node):
+    """Height of the subtree, after checking stored heights, sizes and the AVL balance."""
+    if node is None:
+        return 0
+    left, right = check_balanced(node.left), check_balanced(node.right)
+    assert abs(left - right) <= 1
+    assert node.height == max(left, right) + 1
+    assert node.size == (node.left.size if node.left else 0) + (node.right.size if node.right else 0) + 1
+    return node.height
+
+
+def items(persistent):
+    pairs = []
+    stack, node = [], persistent.root
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        pairs.append((node.key, node.value))
+        node = node.right
+    return pairs
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_persistent_map_stays_balanced_and_old_versions_never_change(seed):
+    rng = random.Random(seed)
+    reference = {key: f"v{key}" for key in range(0, 200, 3)}
+    current = PersistentMap.from_sorted(sorted(reference.items()))
+    versions = [(current, dict(reference))]
+    for step in range(2000):
+        key = rng.randrange(300)
+        if rng.random() < 0.5:
+            current = current.set(key, f"v{key}.{step}")
+            reference[key] = f"v{key}.{step}"
+        else:
+            current = current.discard(key)
+            reference.pop(key, None)
+        if step % 50 == 0:
+            versions.append((current, dict(reference)))
+    versions.append((current, dict(reference)))
+    for version, expected in versions:
+        check_balanced(version.root)
+        assert len(version) == len(expected)
+        assert items(version) == sorted(expected.items())
+        offset = rng.randrange(len(expected) + 1)
+        assert list(version.values(offset)) == [value for _, value in sorted(expected.items())][offset:]
+        for key in range(0, 300, 7):
+            assert version.get(key) == expected.get(key)
+            assert (key in version) == (key in expected)
+
+
+def comparable(snapshot):
+    return {
+        "patients": list(snapshot.patients.values()),
+        "queue": list(snapshot.queue.values()),
+        "rooms": list(snapshot.rooms.values()),
+        "vacant": list(snapshot.vacant.values()),
+        "vacant_counts": {room_type: count for room_type, count in snapshot.vacant_counts.items() if count},
+        "cleaning": snapshot.cleaning,
+    }
+
+
+def test_published_snapshot_matches_a_full_capture_after_mixed_commands():
+    rng = random.Random(6)
+    hospital = EnhancedHospitalSystem()
+    make_campus(20, room_manager=hospital.room_manager)
+    hospital.register_staff("S1", "Staff 1", "Doctor")
+    publisher = SnapshotPublisher(hospital)
+    admitted, earlier = [], None
+    for step in range(600):
+        action = rng.random()
+        if action < 0.35:
+            result = hospital.admit_patient(f"P{step}", rng.randint(1, 90), "F", rng.randint(1, 3), wait=True)
+            admitted.append(result.data.patient_id)
+        elif action < 0.55 and admitted:
+            hospital.discharge(admitted.pop(rng.randrange(len(admitted))))
+        elif action < 0.65:
+            hospital.mark_room_clean()
+        elif action < 0.75 and admitted:
+            hospital.update_priority(rng.choice(admitted), severity=rng.randint(1, 3), age=rng.randint(1, 90))
+        elif action < 0.85 and admitted:
+            hospital.record_treatment(f"T{step}", rng.choice(admitted), "S1", "Checkup")
+        else:
+            hospital.assign_batch(k=4)
+        if step == 300:
+            earlier = publisher.current
+            earlier_state = comparable(earlier)
+    current = publisher.current
+    assert current.version > earlier.version
+    assert comparable(current) == comparable(HospitalSnapshot.capture(hospital))
+    assert comparable(earlier) == earlier_state
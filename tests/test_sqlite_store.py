@@ -0,0 +1,85 @@
+from main import EnhancedHospitalSystem
+from sqlite_store import SQLiteStore
+from workload import make_campus, make_patients
+
+
+def open_store(tmp_path, cache_size=None):
+    store = SQLiteStore(str(tmp_path / "hospital.db"), cache_size=cache_size)
+    return store, store.open()
+
+
+def test_cache_evicts_discharged_patients_and_faults_them_back_in(tmp_path):
+    store, hospital = open_store(tmp_path)
+    hospital.register_staff("S1", "Staff 1", "Doctor")
+    hospital.bulk_admit(make_patients(400))
+    admitted = [patient.patient_id for patient in hospital.avl_tree.range_scan()]
+    hospital.record_treatment("T1", admitted[0], "S1", "Checkup")
+    store.close()
+
+    store, hospital = open_store(tmp_path, cache_size=100)
+    cache = hospital.avl_tree
+    assert len(cache) == len(admitted)
+    for patient_id in admitted[:300]:
+        assert hospital.discharge(patient_id)
+    assert len(cache) == len(admitted) - 300
+    assert len(cache.cold) == 100
+
+    cache.hits = cache.misses = 0
+    first = hospital.find_patient(admitted[0]).data
+    assert cache.misses == 1
+    assert first.treatments == ["Checkup"]
+    assert any("Treatment 'Checkup'" in entry for entry in first.history)
+    assert hospital.find_patient(admitted[0]).data is first
+    assert cache.hits == 1
+    assert len(cache.cold) == 100
+
+
+def test_discharged_patients_are_read_only(tmp_path):
+    store, hospital = open_store(tmp_path, cache_size=10)
+    hospital.register_staff("S1", "Staff 1", "Doctor")
+    patient_id = hospital.admit_patient("Ann", 40, "F", 3).data.patient_id
+    assert hospital.discharge(patient_id)
+    assert hospital.find_patient(patient_id)
+    assert not hospital.discharge(patient_id)
+    assert not hospital.record_treatment("T1", patient_id, "S1", "Checkup")
+    assert patient_id not in [patient.patient_id for patient in hospital.avl_tree.range_scan()]
+    store.close()
+
+
+def test_admitted_patients_are_never_evicted(tmp_path):
+    store, hospital = open_store(tmp_path, cache_size=5)
+    hospital.bulk_admit(make_patients(50))
+    cache = hospital.avl_tree
+    assert len(cache) == len(hospital.priority_queue)
+    cache.misses = 0
+    for patient in hospital.priority_queue.top_k(len(hospital.priority_queue)):
+        assert hospital.find_patient(patient.patient_id).data is patient
+    assert cache.misses == 0
+    store.close()
+
+
+def corridors(hospital):
+    return {(frozenset((from_room, to_room)), weight) for from_room, to_room, weight in hospital.room_manager.graph.edges()}
+
+
+def test_campus_rooms_are_restored_from_their_stored_type(tmp_path):
+    campus = EnhancedHospitalSystem()
+    make_campus(30, room_manager=campus.room_manager)
+    store = SQLiteStore(str(tmp_path / "hospital.db"))
+    hospital = store.open(campus)
+    hospital.bulk_admit(make_patients(25))
+    discharged = next(hospital.avl_tree.range_scan()).patient_id
+    assert hospital.discharge(discharged)
+    expected = {room_id: (room.room_type, room.is_vacant, room.condition)
+                for room_id, room in hospital.room_manager.rooms.items()}
+    store.close()
+
+    store = SQLiteStore(str(tmp_path / "hospital.db"))
+    restored = store.open()  # the default layout, without the campus wards
+    assert {room_id: (room.room_type, room.is_vacant, room.condition)
+            for room_id, room in restored.room_manager.rooms.items()} == expected
+    assert list(restored.room_manager.cleaning_queue.cleaning_queue)
+    assert restored.room_manager.vacant_rooms == hospital.room_manager.vacant_rooms
+    assert corridors(restored) == corridors(hospital)
+    assert restored.admit_patient("Late", 50, "M", 1).ok
+    store.close()
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from main import Staff, StaffManager
+
+ROLES = ("Doctor", "Nurse", "Surgeon", "Technician")
+
+
+def names(staff_members):
+    return [staff.staff_id for staff in staff_members]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_random_registrations_match_a_plain_list(seed):
+    rng = random.Random(seed)
+    manager, reference = StaffManager(), []
+    for _ in range(600):
+        batch = [Staff(f"S{rng.randrange(400)}", "Name", rng.choice(ROLES)) for _ in range(rng.choice([1, 1, 3]))]
+        registered = {staff.staff_id for staff in reference}
+        batch_ids = [staff.staff_id for staff in batch]
+        clash = len(set(batch_ids)) < len(batch_ids) or registered.intersection(batch_ids)
+        if len(batch) == 1:
+            if clash:
+                with pytest.raises(ValueError):
+                    manager.add_staff(batch[0])
+            else:
+                manager.add_staff(batch[0])
+        elif clash:
+            with pytest.raises(ValueError):
+                manager.add_many(batch)
+        else:
+            manager.add_many(iter(batch))
+        if not clash:
+            reference.extend(batch)
+        assert len(manager) == len(reference)
+    assert names(manager.list_staff()) == names(reference)
+    for role in ROLES + ("Porter",):
+        assert names(manager.by_role(role)) == names(staff for staff in reference if staff.role == role)
+    by_id = {staff.staff_id: staff for staff in reference}
+    for number in range(400):
+        staff_id = f"S{number}"
+        assert manager.get(staff_id) is by_id.get(staff_id)
+        assert (staff_id in manager) == (staff_id in by_id)
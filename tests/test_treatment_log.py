@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from main import Treatment, TreatmentLog
+
+
+def random_treatment(rng, number):
+    # Mostly in date order, as records are logged, with some late entries.
+    day = min(28, number // 40 + 1) if rng.random() < 0.8 else rng.randint(1, 28)
+    return Treatment(f"T{number}", rng.randrange(30), f"S{rng.randrange(6)}", "Checkup", f"2026-10-{day:02d}")
+
+
+def ids(records):
+    return [treatment.treatment_id for treatment in records]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_indexes_match_a_plain_list(seed):
+    rng = random.Random(seed)
+    log, reference = TreatmentLog(), []
+    number = 0
+    while number < 1500:
+        if rng.random() < 0.1:
+            batch = [random_treatment(rng, number + offset) for offset in range(rng.randint(1, 60))]
+            log.extend(batch)
+            reference.extend(batch)
+            number += len(batch)
+        else:
+            treatment = random_treatment(rng, number)
+            log.append(treatment)
+            reference.append(treatment)
+            number += 1
+
+    assert len(log) == len(reference)
+    assert ids(log) == ids(reference)
+    assert ids(reversed(log)) == ids(reference[::-1])
+    by_date = sorted(reference, key=lambda treatment: treatment.date)  # stable: ties keep log order
+    for _ in range(100):
+        start, end = sorted(f"2026-10-{rng.randint(1, 28):02d}" for _ in range(2))
+        patient_id = rng.choice([None, rng.randrange(32)])
+        staff_id = rng.choice([None, f"S{rng.randrange(7)}"])
+        assert ids(log.records_between(start, end)) == ids(t for t in by_date if start <= t.date <= end)
+        assert ids(log.records_between(end_date=end)) == ids(t for t in by_date if t.date <= end)
+        if patient_id is not None:
+            assert ids(log.records_for_patient(patient_id)) == ids(t for t in reference
+                                                                   if t.patient_id == patient_id)
+        if staff_id is not None:
+            assert ids(log.records_for_staff(staff_id)) == ids(t for t in reference if t.staff_id == staff_id)
+        order = reference if patient_id is not None or staff_id is not None else by_date
+        expected = [t for t in order
+                    if (patient_id is None or t.patient_id == patient_id)
+                    and (staff_id is None or t.staff_id == staff_id)
+                    and start <= t.date <= end]
+        assert ids(log.iter_records(patient_id, staff_id, start, end)) == ids(expected)
+    assert ids(log.iter_records()) == ids(reference)
@@ -0,0 +1,165 @@
+"""Synthetic hospitals and workloads for benchmarks and regression runs.
+
+make_campus grows a RoomManager into a campus of wards joined by a random
+connected corridor graph, make_patients builds a patient population with a
+given severity mix, and generate_events produces a stream of batch commands
+(the ops of main.BATCH_COMMANDS) for arrivals, discharges, treatments,
+cleaning and lookups.
+
+generate_events plays the stream against its own copy of the campus while it
+generates it, so every discharge, treatment and lookup names a patient that
+is admitted at that point and admissions fail only when the real system
+would have no room either. Run the stream against a system whose rooms were
+built by make_campus with the same room_count and campus_seed.
+
+make_facility_graph builds a large bare corridor Graph (no rooms) for
+network-design benchmarks.
+"""
+import random
+import time
+
+from main import Graph, Patient, Room, RoomManager
+
+ROOM_TYPES = ("General", "ICU", "Surgery")
+
+# Share of arrivals per severity (1 is most urgent), roughly an emergency department's triage mix.
+SEVERITY_MIX = {1: 0.1, 2: 0.3, 3: 0.6}
+
+# Relative frequency of each command op in generate_events.
+EVENT_MIX = {
+    "admit": 0.25,
+    "discharge": 0.2,
+    "add_treatment": 0.3,
+    "clean_room": 0.1,
+    "find_patient": 0.1,
+    "next_patient": 0.05,
+}
+
+STAFF_ROLES = ("Doctor", "Nurse", "Surgeon", "Technician")
+TREATMENT_DETAILS = ("Checkup", "Blood test", "X-ray", "IV fluids", "Medication", "Surgery", "Physiotherapy")
+
+
+def make_campus(room_count, seed=7, neighbors=3, max_distance=20, type_mix=None, room_manager=None,
+                room_types=None):
+    """Add room_count wards joined by random corridors to room_manager (default: a new RoomManager).
+
+    Each ward gets corridors to `neighbors` earlier rooms, so the graph stays
+    connected. type_mix maps room type -> weight; None picks uniformly from
+    ROOM_TYPES. room_types, if given, lists each ward's type and replaces
+    room_count and type_mix.
+    """
+    rng = random.Random(seed)
+    if room_manager is None:
+        room_manager = RoomManager()
+    room_ids = list(room_manager.rooms)
+    if room_types is not None:
+        room_count = len(room_types)
+    elif type_mix is not None:
+        mix_types, mix_weights = list(type_mix), list(type_mix.values())
+    for number in range(room_count):
+        if room_types is not None:
+            room_type = room_types[number]
+        elif type_mix is None:
+            room_type = rng.choice(ROOM_TYPES)
+        else:
+            room_type = rng.choices(mix_types, mix_weights)[0]
+        room = Room(f"Ward {number}", room_type=room_type)
+        room_manager.add_room(room)
+        for neighbor in rng.sample(room_ids, min(neighbors, len(room_ids))):
+            room_manager.graph.add_edge(room.room_id, neighbor, rng.randint(1, max_distance))
+        room_ids.append(room.room_id)
+    return room_manager
+
+
+def make_facility_graph(node_count, edge_count, seed=7, max_weight=100):
+    """A connected Graph of node_count nodes 0..node_count-1 and edge_count random weighted edges.
+
+    A random tree keeps it connected; the remaining edges join random pairs,
+    so edge_count should be at least node_count - 1 and well below the
+    number of possible pairs.
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    graph.add_node(0)
+    for node in range(1, node_count):
+        graph.add_edge(node, rng.randrange(node), rng.randint(1, max_weight))
+    while graph.edge_count < edge_count:
+        from_node, to_node = rng.randrange(node_count), rng.randrange(node_count)
+        if from_node != to_node:
+            graph.add_edge(from_node, to_node, rng.randint(1, max_weight))
+    return graph
+
+
+def make_patients(count, seed=42, severity_mix=None):
+    """Patients 1..count arriving a millisecond apart; severity_mix None means uniform severities."""
+    rng = random.Random(seed)
+    start = time.time()
+    if severity_mix is None:
+        severity = lambda: rng.randint(1, 3)
+    else:
+        severities, weights = list(severity_mix), list(severity_mix.values())
+        severity = lambda: rng.choices(severities, weights)[0]
+    return [
+        Patient(i, f"Patient {i}", rng.randint(1, 95), rng.choice("MF"), severity(), start + i * 0.001)
+        for i in range(1, count + 1)
+    ]
+
+
+def generate_events(count, room_count=0, campus_seed=7, seed=11, severity_mix=None, event_mix=None,
+                    staff_count=20):
+    """Return staff registrations followed by `count` batch command dicts.
+
+    Discharge, treatment and lookup ops fall back to an admission while
+    nobody is admitted, and clean_room does the same while no room is dirty.
+    Patient IDs assume a system that starts with no patients.
+    """
+    rng = random.Random(seed)
+    severity_mix = SEVERITY_MIX if severity_mix is None else severity_mix
+    event_mix = EVENT_MIX if event_mix is None else event_mix
+    severities, severity_weights = list(severity_mix), list(severity_mix.values())
+    ops, op_weights = list(event_mix), list(event_mix.values())
+
+    campus = make_campus(room_count, campus_seed)
+    rooms = campus.rooms
+    cleaning_queue = campus.cleaning_queue
+    events = [{"op": "add_staff", "staff_id": f"S{number}", "name": f"Staff {number}",
+               "role": rng.choice(STAFF_ROLES)} for number in range(1, staff_count + 1)]
+    admitted = []  # [patient_id, room_id]; discharges swap the last entry into the hole
+    next_id = 0
+    treatments = 0
+    for number in range(1, count + 1):
+        op = rng.choices(ops, op_weights)[0]
+        if (op in ("discharge", "add_treatment", "find_patient") and not admitted
+                or op == "clean_room" and not cleaning_queue):
+            op = "admit"
+        if op == "admit":
+            severity = rng.choices(severities, severity_weights)[0]
+            events.append({"op": "admit", "name": f"Patient {number}", "age": rng.randint(1, 95),
+                           "gender": rng.choice("MF"), "severity": severity})
+            room_id = campus.find_room_for_severity("Reception", severity)
+            if room_id:
+                next_id += 1
+                rooms[room_id].is_vacant = False
+                admitted.append((next_id, room_id))
+        elif op == "discharge":
+            position = rng.randrange(len(admitted))
+            patient_id, room_id = admitted[position]
+            admitted[position] = admitted[-1]
+            admitted.pop()
+            rooms[room_id].is_vacant = True
+            cleaning_queue.add_room_to_cleaning(room_id)
+            events.append({"op": "discharge", "patient_id": patient_id})
+        elif op == "add_treatment":
+            treatments += 1
+            events.append({"op": "add_treatment", "treatment_id": f"T{treatments}",
+                           "patient_id": rng.choice(admitted)[0],
+                           "staff_id": f"S{rng.randint(1, staff_count)}",
+                           "treatment_details": rng.choice(TREATMENT_DETAILS)})
+        elif op == "clean_room":
+            cleaning_queue.pop_next_room()
+            events.append({"op": "clean_room"})
+        elif op == "find_patient":
+            events.append({"op": "find_patient", "patient_id": rng.choice(admitted)[0]})
+        else:
+            events.append({"op": op})
+    return events